@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of response decoding.
+
+Compares the previous ``request.text`` + ``json.loads`` path with
+``decoding.decode_response`` on a synthetic ``torrents/info`` body::
+
+    python benchmarks/bench_decoding.py --torrents 100000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from qbittorrentv2 import decoding  # noqa: E402
+
+
+def make_body(count):
+    torrents = [{
+        'hash': '%040x' % i,
+        'name': 'Some.Linux.Distribution.%d.iso' % i,
+        'state': 'uploading' if i % 3 else 'downloading',
+        'category': 'linux',
+        'tracker': 'udp://tracker.example.org:1337/announce',
+        'save_path': '/data/torrents/',
+        'size': 1024 * 1024 * (i % 4096 + 1),
+        'progress': (i % 100) / 100.0,
+        'dlspeed': i % 50000,
+        'upspeed': i % 70000,
+        'ratio': (i % 300) / 100.0,
+        'num_seeds': i % 40,
+        'num_leechs': i % 25,
+        'added_on': 1500000000 + i,
+    } for i in range(count)]
+    return json.dumps(torrents).encode('utf_8')
+
+
+def legacy_decode(content):
+    text = content.decode('utf_8')
+    if len(text) == 0:
+        return {}
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--torrents', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    body = make_body(args.torrents)
+    candidates = [
+        ('text + json.loads (previous)', lambda: legacy_decode(body)),
+        ('decode_response, json', lambda: decoding.decode_response(
+            body, 'application/json', json.loads)),
+    ]
+    if decoding.orjson is not None:
+        candidates.append(('decode_response, orjson', lambda: decoding.decode_response(
+            body, 'application/json', decoding.orjson.loads)))
+
+    print('body: %.1f MB, %d torrents' % (len(body) / 1e6, args.torrents))
+    for name, func in candidates:
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print('%-32s %8.1f ms' % (name, best * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Memory footprint of ``torrents()`` results as dicts and as records.
+
+Decodes a synthetic ``torrents/info`` body and measures the memory held
+by the list of dicts and by the equivalent ``Torrent`` records::
+
+    python benchmarks/bench_records.py --torrents 100000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from qbittorrentv2.records import Torrent, TORRENT_FIELDS  # noqa: E402
+
+STATES = ('uploading', 'stalledUP', 'downloading', 'pausedUP', 'queuedDL')
+
+
+def make_body(count):
+    torrents = []
+    for i in range(count):
+        torrent = dict((name, i) for name in TORRENT_FIELDS)
+        torrent.update({
+            'hash': '%040x' % i,
+            'name': 'Some.Linux.Distribution.%d.iso' % i,
+            'state': STATES[i % len(STATES)],
+            'category': 'linux-%d' % (i % 8),
+            'tags': '',
+            'tracker': 'udp://tracker%d.example.org:1337/announce' % (i % 20),
+            'save_path': '/data/torrents/',
+            'download_path': '',
+            'content_path': '/data/torrents/Some.Linux.Distribution.%d.iso' % i,
+            'magnet_uri': 'magnet:?xt=urn:btih:%040x' % i,
+            'progress': (i % 100) / 100.0,
+            'ratio': (i % 300) / 100.0,
+        })
+        torrents.append(torrent)
+    return json.dumps(torrents).encode('utf_8')
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--torrents', type=int, default=100000)
+    args = parser.parse_args()
+
+    body = make_body(args.torrents)
+    dicts, dict_size = measure(lambda: json.loads(body))
+    del dicts
+    records, record_size = measure(
+        lambda: [Torrent(t) for t in json.loads(body)])
+    del records
+
+    print('%d torrents' % args.torrents)
+    print('dicts:   %8.1f MB' % (dict_size / 1e6))
+    print('records: %8.1f MB (%.0f%% of dicts)' % (
+        record_size / 1e6, 100.0 * record_size / dict_size))
+
+
+if __name__ == '__main__':
+    main()
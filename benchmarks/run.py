@@ -0,0 +1,259 @@
+"""
+End-to-end client benchmarks against the simulated WebAPI.
+
+Starts ``stub_server.py`` in a separate process and runs each scenario
+in a fresh client process, so peak RSS is measured per scenario and
+excludes the server. Results are written as JSON to compare versions::
+
+    python benchmarks/run.py --torrents 100000 --output before.json
+    python benchmarks/run.py --torrents 100000 --output after.json
+    python benchmarks/run.py --compare before.json after.json
+
+Every scenario reports operations per second, latency percentiles in
+milliseconds and peak RSS in MB.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import qbittorrentv2  # noqa: E402
+from qbittorrentv2 import Client, SyncState  # noqa: E402
+
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return usage / (1024.0 * 1024 if sys.platform == 'darwin' else 1024.0)
+
+
+def revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'], cwd=HERE,
+            stderr=subprocess.DEVNULL).decode('utf_8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1,
+                int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def timed(operation, repeat):
+    """
+    Run ``operation()`` ``repeat`` times.
+
+    :return: Tuple of (total seconds, sorted latencies, items), where
+             items is the sum of what the operation returned.
+    """
+    latencies, items = [], 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        items += operation() or 0
+        latencies.append(time.perf_counter() - begin)
+    return time.perf_counter() - start, sorted(latencies), items
+
+
+def scenario_torrents(qb, args):
+    return lambda: len(qb.torrents())
+
+
+def scenario_torrents_paged(qb, args):
+    return lambda: sum(1 for _ in qb.iter_torrents(page_size=args.page_size))
+
+
+def scenario_sync_maindata(qb, args):
+    state = SyncState(qb)
+    state.update()
+
+    def operation():
+        changes = state.update()
+        return len(changes.updated)
+    return operation
+
+
+def scenario_bulk_pause(qb, args):
+    hashes = [t['hash'] for t in qb.torrents()]
+    return lambda: (qb.pause(hashes), len(hashes))[1]
+
+
+def scenario_upload(qb, args):
+    # minimal bencoded torrents with a unique name
+    files = [b'd4:infod6:lengthi1024e4:name%d:%s12:piece lengthi16384e'
+             b'6:pieces20:%see' % (len(str(i)), str(i).encode(), b'x' * 20)
+             for i in range(args.upload_files)]
+
+    def operation():
+        qb.download_from_file([io.BytesIO(f) for f in files])
+        return len(files)
+    return operation
+
+
+def scenario_log_poll(qb, args):
+    last = [-1]
+
+    def operation():
+        messages = qb.get_log(last_known_id=last[0])
+        if messages:
+            last[0] = messages[-1]['id']
+        return len(messages)
+    return operation
+
+
+def scenario_ingest_links(qb, args):
+    batches = iter(range(1, args.repeat + 1))
+
+    def operation():
+        # fresh magnets every run, the stub resolves their metadata
+        offset = next(batches) << 140
+        links = ['magnet:?xt=urn:btih:%040x' % (offset + i)
+                 for i in range(args.links)]
+        return len(qb.ingest_links(links, max_queued=None,
+                                   poll_interval=0.01).submitted)
+    return operation
+
+
+SCENARIOS = {
+    'torrents': scenario_torrents,
+    'torrents_paged': scenario_torrents_paged,
+    'sync_maindata': scenario_sync_maindata,
+    'bulk_pause': scenario_bulk_pause,
+    'upload': scenario_upload,
+    'log_poll': scenario_log_poll,
+    'ingest_links': scenario_ingest_links,
+}
+
+
+def run_scenario(name, url, args):
+    qb = Client(url)
+    qb.login('admin', 'adminadmin')
+    operation = SCENARIOS[name](qb, args)
+    seconds, latencies, items = timed(operation, args.repeat)
+    return {
+        'scenario': name,
+        'operations': args.repeat,
+        'items': items,
+        'seconds': seconds,
+        'ops_per_second': args.repeat / seconds if seconds else 0.0,
+        'items_per_second': items / seconds if seconds else 0.0,
+        'latency_ms': dict(
+            ('p%d' % q, percentile(latencies, q) * 1000)
+            for q in (50, 90, 99)),
+        'latency_ms_max': latencies[-1] * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def start_server(args):
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, 'stub_server.py'),
+         '--torrents', str(args.torrents), '--latency', str(args.latency),
+         '--churn', str(args.churn)],
+        stdout=subprocess.PIPE)
+    port = int(server.stdout.readline())
+    return server, 'http://127.0.0.1:%d/' % port
+
+
+def run_all(args):
+    server, url = start_server(args)
+    results = []
+    try:
+        for name in args.scenarios:
+            child = subprocess.run(
+                [sys.executable, __file__, '--url', url, '--scenario', name,
+                 '--repeat', str(args.repeat),
+                 '--page-size', str(args.page_size),
+                 '--upload-files', str(args.upload_files),
+                 '--links', str(args.links)],
+                stdout=subprocess.PIPE, check=True)
+            result = json.loads(child.stdout.decode('utf_8'))
+            results.append(result)
+            sys.stderr.write('%-15s %10.1f ops/s  p50 %8.2f ms  p99 %8.2f ms'
+                             '  rss %7.1f MB\n' % (
+                                 name, result['ops_per_second'],
+                                 result['latency_ms']['p50'],
+                                 result['latency_ms']['p99'],
+                                 result['peak_rss_mb']))
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'revision': revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'json_backend': qbittorrentv2.decoding.json_loads.__module__,
+        'config': {'torrents': args.torrents, 'latency': args.latency,
+                   'churn': args.churn, 'repeat': args.repeat},
+        'results': results,
+    }
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = dict((r['scenario'], r) for r in json.load(f)['results'])
+    with open(after_path) as f:
+        after = dict((r['scenario'], r) for r in json.load(f)['results'])
+    print('%-15s %12s %12s %12s' % ('scenario', 'ops/s', 'p50 ms', 'rss MB'))
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+
+        def change(a, b):
+            return '%+.1f%%' % (100.0 * (b - a) / a) if a else 'n/a'
+        print('%-15s %12s %12s %12s' % (
+            name, change(old['ops_per_second'], new['ops_per_second']),
+            change(old['latency_ms']['p50'], new['latency_ms']['p50']),
+            change(old['peak_rss_mb'], new['peak_rss_mb'])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--torrents', type=int, default=10000)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds the server adds to every response')
+    parser.add_argument('--churn', type=float, default=0.01,
+                        help='fraction of torrents changed per sync')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--upload-files', type=int, default=50)
+    parser.add_argument('--links', type=int, default=1000,
+                        help='magnets per ingest_links run')
+    parser.add_argument('--scenarios', nargs='+', default=sorted(SCENARIOS),
+                        choices=sorted(SCENARIOS))
+    parser.add_argument('--output', help='write the JSON report to a file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='compare two JSON reports')
+    # used internally to run one scenario in a child process
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+    if args.scenario:
+        json.dump(run_scenario(args.scenario, args.url, args), sys.stdout)
+        return
+
+    report = json.dumps(run_all(args), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
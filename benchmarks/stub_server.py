@@ -0,0 +1,428 @@
+"""
+Simulated qBittorrent WebAPI for benchmarks.
+
+Serves a configurable number of torrents with realistic fields,
+``sync/maindata`` deltas, torrent details, bulk hash operations, uploads and logs::
+
+    python benchmarks/stub_server.py --torrents 100000 --latency 0.002
+
+The listening port is printed on the first line of stdout.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from http.server import ThreadingHTTPServer
+except ImportError:  # Python < 3.7
+    from socketserver import ThreadingMixIn
+    from http.server import HTTPServer
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+from http.server import BaseHTTPRequestHandler
+
+STATES = ('uploading', 'stalledUP', 'downloading', 'stalledDL', 'pausedUP',
+          'pausedDL', 'queuedDL', 'checkingUP')
+CATEGORIES = ('', 'linux', 'bsd', 'movies', 'music', 'books', 'software')
+TRACKERS = tuple('udp://tracker%d.example.org:1337/announce' % i
+                 for i in range(25))
+PIECE_SIZE = 4 * 1024 * 1024
+DETAIL_ENDPOINTS = frozenset((
+    'torrents/properties', 'torrents/files', 'torrents/trackers',
+    'torrents/webseeds', 'torrents/pieceStates',
+))
+
+
+def make_torrent(i, rng):
+    size = rng.randint(1, 4096) * 1024 * 1024
+    progress = rng.choice((1.0, 1.0, 1.0, rng.random()))
+    infohash = '%040x' % (i * 2654435761 % (1 << 160))
+    return {
+        'added_on': 1500000000 + i * 17,
+        'amount_left': int(size * (1 - progress)),
+        'auto_tmm': False,
+        'availability': -1,
+        'category': rng.choice(CATEGORIES),
+        'completed': int(size * progress),
+        'completion_on': 1500000500 + i * 17 if progress == 1.0 else -1,
+        'content_path': '/data/torrents/Torrent.Name.%d' % i,
+        'dl_limit': -1,
+        'dlspeed': rng.choice((0, 0, 0, rng.randint(0, 10 ** 7))),
+        'downloaded': int(size * progress),
+        'downloaded_session': 0,
+        'eta': 8640000,
+        'f_l_piece_prio': False,
+        'force_start': False,
+        'hash': infohash,
+        'last_activity': 1600000000 + i,
+        'magnet_uri': 'magnet:?xt=urn:btih:%s&dn=Torrent.Name.%d' % (
+            infohash, i),
+        'max_ratio': -1,
+        'max_seeding_time': -1,
+        'name': 'Torrent.Name.%d' % i,
+        'num_complete': rng.randint(0, 500),
+        'num_incomplete': rng.randint(0, 100),
+        'num_leechs': rng.randint(0, 20),
+        'num_seeds': rng.randint(0, 50),
+        'priority': 0,
+        'progress': progress,
+        'ratio': round(rng.random() * 5, 3),
+        'ratio_limit': -2,
+        'save_path': '/data/torrents/',
+        'seeding_time_limit': -2,
+        'seen_complete': 1600000000,
+        'seq_dl': False,
+        'size': size,
+        'state': rng.choice(STATES),
+        'super_seeding': False,
+        'tags': '',
+        'time_active': rng.randint(0, 10 ** 7),
+        'total_size': size,
+        'tracker': rng.choice(TRACKERS),
+        'up_limit': -1,
+        'uploaded': rng.randint(0, size * 5),
+        'uploaded_session': 0,
+        'upspeed': rng.choice((0, 0, rng.randint(0, 10 ** 7))),
+    }
+
+
+class Simulation(object):
+    """
+    State of the simulated daemon.
+
+    :param torrents: Number of torrents.
+    :param churn: Fraction of torrents changing between sync responses.
+    :param log_rate: Log messages added per ``log/main`` request.
+    :param metadata_rate: Added magnets whose metadata is fetched per
+                          ``sync/maindata`` request.
+    :param first: Index of the first torrent, daemons simulated with
+                  distinct ranges hold distinct torrents.
+
+    :ivar preferences: dict() served by ``app/preferences``.
+    :ivar free_space: Free disk space reported in the server state.
+    :ivar requests: ``Counter`` of the requests per endpoint.
+    :ivar failing_hashes: set() of infohashes whose hash operations
+                          fail with a 500 error.
+    :ivar password: Password required by ``auth/login``, requests without
+                    a valid session are refused when it is set.
+    :ivar sessions: set() of valid session IDs, clear it to expire them.
+    :ivar outages: ``Counter`` of endpoint to the number of its next
+                   requests answered with a 503 error.
+    """
+    def __init__(self, torrents, churn=0.01, log_rate=20, seed=1,
+                 metadata_rate=50, first=0):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.torrents = [make_torrent(i, self.rng)
+                         for i in range(first, first + torrents)]
+        self.by_hash = dict((t['hash'], t) for t in self.torrents)
+        self.churn = churn
+        self.log_rate = log_rate
+        self.log = []
+        self.rid = 0
+        self.processed_hashes = 0
+        self.uploaded_bytes = 0
+        self.metadata_rate = metadata_rate
+        self.preferences = {'save_path': '/data/torrents/', 'dl_limit': 0,
+                            'up_limit': 0}
+        self.requests = Counter()
+        self.failing_hashes = set()
+        self.password = None
+        self.sessions = set()
+        self.outages = Counter()
+        self.free_space = 10 ** 13
+        self._fetching = []
+        self._added = []
+        self._sorted = {}
+
+    def info(self, params):
+        torrents = self.torrents
+        state = params.get('filter')
+        if state == 'downloading':
+            torrents = [t for t in torrents if t['progress'] < 1]
+        elif state == 'seeding':
+            torrents = [t for t in torrents if t['progress'] == 1]
+        if 'category' in params:
+            torrents = [t for t in torrents
+                        if t['category'] == params['category']]
+        if 'sort' in params:
+            key = (params['sort'], params.get('reverse') == 'True')
+            if torrents is self.torrents:
+                # paging sorts the full list on every request
+                if key not in self._sorted:
+                    self._sorted[key] = self._sort(torrents, *key)
+                torrents = self._sorted[key]
+            else:
+                torrents = self._sort(torrents, *key)
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 0))
+        if offset:
+            torrents = torrents[offset:]
+        if limit > 0:
+            torrents = torrents[:limit]
+        return torrents
+
+    @staticmethod
+    def _sort(torrents, field, reverse):
+        return sorted(torrents, key=lambda t: t[field], reverse=reverse)
+
+    def maindata(self, rid):
+        with self.lock:
+            if rid == 0 or rid != self.rid:
+                self.rid += 1
+                return {
+                    'rid': self.rid, 'full_update': True,
+                    'torrents': dict((t['hash'], t) for t in self.torrents),
+                    'categories': dict((c, {'name': c, 'savePath': ''})
+                                       for c in CATEGORIES if c),
+                    'server_state': self.server_state(),
+                }
+            self.rid += 1
+            changed = dict((t['hash'], t) for t in self._added)
+            self._added = []
+            for torrent in self._fetching[:self.metadata_rate]:
+                torrent['state'] = 'stalledDL'
+                changed.setdefault(torrent['hash'], {})['state'] = 'stalledDL'
+            del self._fetching[:self.metadata_rate]
+            count = max(1, int(len(self.torrents) * self.churn))
+            for torrent in self.rng.sample(self.torrents, count):
+                torrent['dlspeed'] = self.rng.randint(0, 10 ** 7)
+                torrent['upspeed'] = self.rng.randint(0, 10 ** 7)
+                changed.setdefault(torrent['hash'], {}).update(
+                    dlspeed=torrent['dlspeed'], upspeed=torrent['upspeed'])
+            return {'rid': self.rid, 'torrents': changed,
+                    'server_state': {'dl_info_speed':
+                                     self.rng.randint(0, 10 ** 8)}}
+
+    def add_links(self, urls):
+        """
+        Add magnets as torrents fetching metadata.
+        """
+        with self.lock:
+            for url in urls.splitlines():
+                topic = parse_qs(urlparse(url).query).get('xt', [''])[0]
+                infohash = topic.rpartition(':')[2].lower()
+                if len(infohash) != 40 or infohash in self.by_hash:
+                    continue
+                torrent = make_torrent(len(self.torrents), self.rng)
+                torrent.update(hash=infohash, state='metaDL', progress=0)
+                self.torrents.append(torrent)
+                self.by_hash[infohash] = torrent
+                self._fetching.append(torrent)
+                self._added.append(torrent)
+            self._sorted.clear()
+
+    def details(self, endpoint, infohash):
+        """
+        Response of a per-torrent detail endpoint, None if the torrent
+        is unknown.
+        """
+        torrent = self.by_hash.get(infohash)
+        if torrent is None:
+            return None
+        pieces = max(1, -(-torrent['size'] // PIECE_SIZE))
+        if endpoint == 'torrents/properties':
+            return {'save_path': torrent['save_path'],
+                    'total_size': torrent['size'], 'piece_size': PIECE_SIZE,
+                    'pieces_num': pieces,
+                    'pieces_have': int(pieces * torrent['progress'])}
+        if endpoint == 'torrents/files':
+            half = pieces // 2
+            return [{'index': 0, 'name': 'part1', 'size': half * PIECE_SIZE,
+                     'piece_range': [0, max(half - 1, 0)]},
+                    {'index': 1, 'name': 'part2',
+                     'size': torrent['size'] - half * PIECE_SIZE,
+                     'piece_range': [half, pieces - 1]}]
+        if endpoint == 'torrents/trackers':
+            return [{'url': torrent['tracker'], 'status': 2}]
+        if endpoint == 'torrents/webseeds':
+            return []
+        # downloaded pieces first, then the one being downloaded
+        have = int(pieces * torrent['progress'])
+        return ([2] * have + [1] * min(1, pieces - have) +
+                [0] * max(0, pieces - have - 1))
+
+    def server_state(self):
+        return {'dl_info_speed': 0, 'up_info_speed': 0,
+                'free_space_on_disk': self.free_space, 'queueing': True}
+
+    def main_log(self, last_known_id):
+        with self.lock:
+            for _ in range(self.log_rate):
+                self.log.append({
+                    'id': len(self.log),
+                    'message': 'Simulated log message %d' % len(self.log),
+                    'timestamp': int(time.time()),
+                    'type': self.rng.choice((1, 2, 4, 8)),
+                })
+            return self.log[last_known_id + 1:]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    simulation = None
+    latency = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body, content_type='text/plain; charset=UTF-8',
+               session=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf_8')
+            content_type = 'application/json'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if session is not None:
+            self.send_header('Set-Cookie', 'SID=%s; HttpOnly; path=/'
+                             % session)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlparse(self.path)
+        endpoint = url.path.split('/api/v2/', 1)[-1]
+        params = dict((k, v[-1]) for k, v in parse_qs(url.query).items())
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        content_type = self.headers.get('Content-Type', '')
+        if body and content_type.startswith('application/x-www-form-urlencoded'):
+            params.update((k, v[-1]) for k, v in
+                          parse_qs(body.decode('utf_8')).items())
+
+        sim = self.simulation
+        with sim.lock:
+            sim.requests[endpoint] += 1
+            outage = sim.outages[endpoint] > 0
+            if outage:
+                sim.outages[endpoint] -= 1
+        if outage:
+            return self._status(503)
+        if endpoint == 'auth/login':
+            if sim.password is not None and \
+                    params.get('password') != sim.password:
+                return self._reply(b'Fails.')
+            with sim.lock:
+                session = 'benchmark%d' % sim.requests[endpoint]
+                sim.sessions.add(session)
+            return self._reply(b'Ok.', session=session)
+        if sim.password is not None and self._session() not in sim.sessions:
+            return self._status(403)
+        if endpoint == 'auth/logout':
+            with sim.lock:
+                sim.sessions.discard(self._session())
+            return self._reply(b'')
+        if endpoint == 'app/preferences':
+            return self._reply(sim.preferences)
+        if endpoint == 'app/setPreferences':
+            sim.preferences.update(json.loads(params['json']))
+            return self._reply(b'')
+        if endpoint == 'app/version':
+            return self._reply(b'v4.6.0')
+        if endpoint == 'torrents/info':
+            return self._reply(sim.info(params))
+        if endpoint == 'sync/maindata':
+            return self._reply(sim.maindata(int(params.get('rid', 0))))
+        if endpoint == 'log/main':
+            return self._reply(sim.main_log(
+                int(params.get('last_known_id', -1))))
+        if endpoint == 'transfer/info':
+            return self._reply(sim.server_state())
+        if endpoint == 'torrents/add':
+            with sim.lock:
+                sim.uploaded_bytes += len(body)
+            if 'urls' in params:
+                sim.add_links(params['urls'])
+            elif content_type.startswith('multipart/form-data'):
+                # download_from_link sends the urls as a multipart field
+                match = re.search(
+                    br'name="urls"[^\r\n]*\r\n(?:[^\r\n]+\r\n)*\r\n(.*?)\r\n--', body, re.S)
+                if match:
+                    sim.add_links(match.group(1).decode('utf_8'))
+            return self._reply(b'Ok.')
+        if endpoint in DETAIL_ENDPOINTS:
+            details = sim.details(endpoint, params.get('hash', '').lower())
+            if details is None:
+                return self._status(404)
+            return self._reply(details)
+        if 'hashes' in params:
+            hashes = params['hashes'].split('|')
+            if sim.failing_hashes.intersection(hashes):
+                return self._status(500)
+            with sim.lock:
+                sim.processed_hashes += len(hashes)
+            return self._reply(b'')
+        self._status(404)
+
+    def _session(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', '')).get('SID')
+        return None if cookie is None else cookie.value
+
+    def _status(self, code):
+        self.send_response(code)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = do_POST = _handle
+
+
+def serve(torrents, latency=0.0, churn=0.01, log_rate=20, port=0,
+          host='127.0.0.1', metadata_rate=50, first=0):
+    """
+    Start a simulated daemon in a background thread.
+
+    :return: Tuple of (server, url).
+    """
+    handler = type('Handler', (Handler,), {
+        'simulation': Simulation(torrents, churn=churn, log_rate=log_rate,
+                                 metadata_rate=metadata_rate, first=first),
+        'latency': latency,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://%s:%d/' % server.server_address
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--torrents', type=int, default=10000)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every response')
+    parser.add_argument('--churn', type=float, default=0.01,
+                        help='fraction of torrents changed per sync')
+    parser.add_argument('--log-rate', type=int, default=20)
+    parser.add_argument('--metadata-rate', type=int, default=50,
+                        help='magnets resolved per sync')
+    parser.add_argument('--port', type=int, default=0)
+    args = parser.parse_args()
+
+    server, url = serve(args.torrents, args.latency, args.churn,
+                        args.log_rate, args.port,
+                        metadata_rate=args.metadata_rate)
+    sys.stdout.write('%d\n' % server.server_address[1])
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
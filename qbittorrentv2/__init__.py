@@ -1 +1,13 @@
-from qbittorrentv2.client import Client
\ No newline at end of file
+from qbittorrentv2.client import Client, LoginRequired, BulkRequestError
+from qbittorrentv2.async_client import AsyncClient
+from qbittorrentv2.sync import SyncState
+from qbittorrentv2.peers import PeerTable
+from qbittorrentv2.records import Torrent
+from qbittorrentv2.columnar import TorrentTable
+from qbittorrentv2.archive import LogArchive
+from qbittorrentv2.transport import TransportConfig
+from qbittorrentv2.pool import ClientPool
+from qbittorrentv2.bencode import TorrentInfo
+from qbittorrentv2.poller import SyncPoller, WaitTimeout
+from qbittorrentv2.events import EventWatcher, TorrentEvent
+from qbittorrentv2.pieces import PieceStates
@@ -0,0 +1,312 @@
+import json
+import os
+import sqlite3
+import time
+
+#: Message types of the main log, in increasing severity.
+LOG_NORMAL = 1
+LOG_INFO = 2
+LOG_WARNING = 4
+LOG_CRITICAL = 8
+
+_SCHEMA = {
+    'main': '''
+        CREATE TABLE IF NOT EXISTS main (
+            id INTEGER, timestamp INTEGER, type INTEGER, message TEXT);
+        CREATE UNIQUE INDEX IF NOT EXISTS main_entry ON main (id, timestamp);
+        CREATE INDEX IF NOT EXISTS main_time ON main (timestamp);
+        CREATE INDEX IF NOT EXISTS main_type ON main (type, timestamp);
+    ''',
+    'peers': '''
+        CREATE TABLE IF NOT EXISTS peers (
+            id INTEGER, timestamp INTEGER, ip TEXT,
+            blocked INTEGER, reason TEXT);
+        CREATE UNIQUE INDEX IF NOT EXISTS peers_entry ON peers (id, timestamp);
+        CREATE INDEX IF NOT EXISTS peers_time ON peers (timestamp);
+        CREATE INDEX IF NOT EXISTS peers_ip ON peers (ip, timestamp);
+    ''',
+}
+
+_COLUMNS = {
+    'main': ('id', 'timestamp', 'type', 'message'),
+    'peers': ('id', 'timestamp', 'ip', 'blocked', 'reason'),
+}
+
+
+def _seconds(timestamp):
+    """
+    Normalize a log timestamp to seconds, qBittorrent before 4.5
+    reported milliseconds.
+    """
+    timestamp = int(timestamp or 0)
+    if timestamp > 10 ** 11:
+        timestamp //= 1000
+    return timestamp
+
+
+class LogArchive(object):
+    """
+    Local append-only archive of the main and peers logs.
+
+    Entries are stored in SQLite segment files covering
+    ``segment_seconds`` each, indexed by id, timestamp and type (or
+    peer IP). Queries only open the segments overlapping the requested
+    time range and use the indexes, and old segments can be rotated
+    out, so the archive stays fast after months of logs::
+
+        archive = LogArchive('/var/lib/qbt-logs', max_segments=26)
+        archive.sync(qb)            # e.g. from a cron job
+        for message in archive.query(since=time.time() - 3600,
+                                     min_type=LOG_WARNING):
+            print(message['message'])
+
+    Writes are buffered and committed every ``batch_size`` entries in a
+    single transaction per segment. Timestamps are stored in seconds,
+    and an entry already archived with the same id and timestamp is
+    ignored.
+
+    :param path: Directory holding the segments.
+    :param segment_seconds: Time span covered by a segment.
+    :param max_segments: Number of segments kept, older ones are
+                         deleted on flush. None keeps everything.
+    :param batch_size: Number of buffered entries triggering a flush.
+    """
+    def __init__(self, path, segment_seconds=7 * 86400, max_segments=None,
+                 batch_size=1000):
+        self.path = path
+        self.segment_seconds = segment_seconds
+        self.max_segments = max_segments
+        self.batch_size = batch_size
+        self._buffer = []
+        self._connections = {}
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._cursor_file = os.path.join(path, 'cursor.json')
+        try:
+            with open(self._cursor_file) as f:
+                self.cursor = json.load(f)
+        except (IOError, OSError, ValueError):
+            self.cursor = {'main': -1, 'peers': -1}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Flush pending entries and close all segments.
+        """
+        self.flush()
+        for connection in self._connections.values():
+            connection.close()
+        self._connections.clear()
+
+    def segments(self):
+        """
+        Start timestamps of the existing segments, oldest first.
+        """
+        starts = []
+        for name in os.listdir(self.path):
+            if name.startswith('segment-') and name.endswith('.sqlite'):
+                starts.append(int(name[len('segment-'):-len('.sqlite')]))
+        return sorted(starts)
+
+    def _segment_path(self, start):
+        return os.path.join(self.path, 'segment-%d.sqlite' % start)
+
+    def _connect(self, start):
+        connection = self._connections.get(start)
+        if connection is None:
+            connection = sqlite3.connect(self._segment_path(start))
+            connection.row_factory = sqlite3.Row
+            for schema in _SCHEMA.values():
+                connection.executescript(schema)
+            self._connections[start] = connection
+        return connection
+
+    def add(self, kind, entries):
+        """
+        Buffer log entries for writing.
+
+        :param kind: ``'main'`` or ``'peers'``.
+        :param entries: Entries as returned by ``get_log``/``get_peer_log``.
+        """
+        if kind not in _COLUMNS:
+            raise ValueError("Unknown log kind: %s" % kind)
+        for entry in entries:
+            self._buffer.append((kind, entry))
+            if entry['id'] >= self.cursor.get(kind, -1):
+                self.cursor[kind] = entry['id']
+                self.cursor[kind + '_timestamp'] = _seconds(
+                    entry.get('timestamp'))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered entries, one transaction per segment, and
+        persist the sync cursor.
+        """
+        if not self._buffer:
+            return
+        rows = {}
+        for kind, entry in self._buffer:
+            timestamp = _seconds(entry.get('timestamp'))
+            start = timestamp - timestamp % self.segment_seconds
+            row = tuple(timestamp if c == 'timestamp' else entry.get(c)
+                        for c in _COLUMNS[kind])
+            rows.setdefault((start, kind), []).append(row)
+        self._buffer = []
+
+        for (start, kind), values in sorted(rows.items()):
+            columns = _COLUMNS[kind]
+            sql = 'INSERT OR IGNORE INTO %s (%s) VALUES (%s)' % (
+                kind, ', '.join(columns), ', '.join('?' * len(columns)))
+            with self._connect(start) as connection:
+                connection.executemany(sql, values)
+
+        tmp = self._cursor_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.cursor, f)
+        os.rename(tmp, self._cursor_file)
+
+        if self.max_segments is not None:
+            self.rotate(self.max_segments)
+
+    def sync(self, client, peers=True):
+        """
+        Fetch the messages logged since the last sync and archive them.
+
+        :param client: ``Client`` to fetch the logs from.
+        :param peers: Also archive the peers log.
+
+        :return: Number of fetched entries.
+        """
+        count = 0
+        entries = self._fetch('main', client.get_log)
+        self.add('main', entries)
+        count += len(entries)
+        if peers:
+            entries = self._fetch('peers', client.get_peer_log)
+            self.add('peers', entries)
+            count += len(entries)
+        self.flush()
+        return count
+
+    def _fetch(self, kind, get_log):
+        """
+        Entries logged after the cursor.
+
+        qBittorrent numbers messages from 0 again when it restarts. The
+        last archived entry is fetched again as a marker: if it is gone
+        or has another timestamp, the ids started over and the whole
+        log is fetched.
+        """
+        cursor = self.cursor.get(kind, -1)
+        if cursor < 0:
+            return get_log(last_known_id=-1)
+        entries = get_log(last_known_id=cursor - 1)
+        if entries and entries[0]['id'] == cursor and \
+                _seconds(entries[0].get('timestamp')) == \
+                self.cursor.get(kind + '_timestamp'):
+            return entries[1:]
+        self.cursor[kind] = -1
+        return get_log(last_known_id=-1)
+
+    def query(self, kind='main', since=None, until=None, types=None,
+              min_type=None, ip=None, after_id=None, limit=None):
+        """
+        Archived entries matching the criteria, oldest first.
+
+        :param kind: ``'main'`` or ``'peers'``.
+        :param since: Only entries logged at or after this timestamp.
+        :param until: Only entries logged before this timestamp.
+        :param types: Main log only, iterable of accepted message types.
+        :param min_type: Main log only, lowest accepted severity,
+                         e.g. ``LOG_WARNING`` for warnings and criticals.
+        :param ip: Peers log only, IP of the peer.
+        :param after_id: Only entries with a higher message id.
+        :param limit: Maximum number of entries.
+
+        :return: Generator of entry dicts.
+        """
+        if kind not in _COLUMNS:
+            raise ValueError("Unknown log kind: %s" % kind)
+        self.flush()
+
+        clauses, args = [], []
+        if since is not None:
+            clauses.append('timestamp >= ?')
+            args.append(int(since))
+        if until is not None:
+            clauses.append('timestamp < ?')
+            args.append(int(until))
+        if types is not None:
+            types = list(types)
+            clauses.append('type IN (%s)' % ', '.join('?' * len(types)))
+            args.extend(types)
+        if min_type is not None:
+            clauses.append('type >= ?')
+            args.append(min_type)
+        if ip is not None:
+            clauses.append('ip = ?')
+            args.append(ip)
+        if after_id is not None:
+            clauses.append('id > ?')
+            args.append(after_id)
+        sql = 'SELECT %s FROM %s' % (', '.join(_COLUMNS[kind]), kind)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY timestamp, id'
+
+        for start in self.segments():
+            if since is not None and start + self.segment_seconds <= since:
+                continue
+            if until is not None and start >= until:
+                break
+            segment_sql = sql
+            if limit is not None:
+                segment_sql += ' LIMIT %d' % limit
+            for row in self._connect(start).execute(segment_sql, args):
+                yield dict(row)
+                if limit is not None:
+                    limit -= 1
+                    if not limit:
+                        return
+
+    def rotate(self, max_segments=None, max_age=None):
+        """
+        Delete the oldest segments.
+
+        :param max_segments: Number of most recent segments to keep.
+        :param max_age: Delete segments entirely older than this many
+                        seconds.
+
+        :return: list() of deleted segment start timestamps.
+        """
+        starts = self.segments()
+        doomed = set()
+        if max_segments is not None and len(starts) > max_segments:
+            doomed.update(starts[:len(starts) - max_segments])
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            doomed.update(s for s in starts
+                          if s + self.segment_seconds <= cutoff)
+        for start in sorted(doomed):
+            connection = self._connections.pop(start, None)
+            if connection is not None:
+                connection.close()
+            os.remove(self._segment_path(start))
+        return sorted(doomed)
+
+    def compact(self):
+        """
+        Reclaim free space and refresh the query planner statistics of
+        all segments except the most recent one.
+        """
+        for start in self.segments()[:-1]:
+            connection = self._connect(start)
+            connection.execute('ANALYZE')
+            connection.execute('VACUUM')
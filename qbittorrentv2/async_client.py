@@ -0,0 +1,756 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from qbittorrentv2.client import (Client, LoginRequired, Preferences,
+                                  DETAIL_KINDS, TorrentDetail)
+from qbittorrentv2.decoding import decode_response
+from qbittorrentv2.links import LinkFeeder
+from qbittorrentv2.metrics import body_size
+from qbittorrentv2.pieces import PieceStates
+from qbittorrentv2.records import Torrent
+from qbittorrentv2.singleflight import request_key
+from qbittorrentv2.sync import SyncState
+from qbittorrentv2.transport import IDEMPOTENT_POSTS, UNSAFE_GETS
+from qbittorrentv2.upload import (DEFAULT_BATCH_BYTES, DEFAULT_BATCH_FILES,
+                                  IngestResult, MultipartBody,
+                                  add_options, check_added, plan_batches)
+
+
+def _form_value(value):
+    """
+    Convert a form/query value the same way ``requests`` does.
+
+    :param value: Value to convert.
+    """
+    if isinstance(value, (bytes, str)):
+        return value
+    return str(value)
+
+
+class AsyncPreferences(Preferences):
+    """
+    :class:`~qbittorrentv2.client.Preferences` view of an
+    :class:`AsyncClient`, whose reads and commits are awaited::
+
+        prefs = await qb.preferences        # dict of all preferences
+        limit = await qb.preferences.get('dl_limit')
+        await qb.preferences.update(dl_limit=1024000)
+
+        async with qb.preferences.batch() as prefs:
+            prefs['dl_limit'] = 1024000
+            prefs['up_limit'] = 512000
+
+    Items can only be assigned inside ``batch()``, reading them needs
+    :meth:`get`.
+    """
+    def __await__(self):
+        return self._current().__await__()
+
+    def __getitem__(self, key):
+        raise TypeError('Use "await prefs.get(key)" with AsyncClient.')
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if self._batch_depth:
+                self._pending[key] = value
+                return
+        raise TypeError('Assign preferences inside "async with '
+                        'prefs.batch()", or use "await prefs.update()".')
+
+    def __contains__(self, key):
+        raise TypeError('Use "await prefs" with AsyncClient.')
+
+    def __iter__(self):
+        raise TypeError('Use "await prefs" with AsyncClient.')
+
+    async def get(self, key, default=None):
+        """
+        Get a preference, or ``default`` if it does not exist.
+        """
+        return (await self._current()).get(key, default)
+
+    async def _current(self):
+        prefs = dict(await self._load())
+        with self._lock:
+            prefs.update(self._pending)
+        return prefs
+
+    async def _load(self):
+        with self._lock:
+            prefs = self._prefs
+            fresh = (prefs is not None and
+                     time.time() - self._fetched_at <= self.ttl)
+        if not fresh:
+            # not locked while awaiting, concurrent loads are coalesced
+            prefs = await self.client._get('app/preferences')
+            self._seed(prefs)
+        return prefs
+
+    async def update(self, **kwargs):
+        """
+        Stage preferences, sent immediately unless inside ``batch()``.
+        """
+        with self._lock:
+            self._pending.update(kwargs)
+            if self._batch_depth:
+                return None
+        return await self.commit()
+
+    async def commit(self):
+        """
+        Send the staged preferences, see :meth:`Preferences.commit`.
+        """
+        with self._lock:
+            staged = dict(self._pending)
+        if not staged:
+            return None
+        response = await self.client.set_preferences(**staged)
+        self._unstage(staged)
+        return response
+
+    @asynccontextmanager
+    async def batch(self):
+        """
+        Async context manager collecting assignments into one commit
+        on exit. Staged values are discarded if the block raises.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        except Exception:
+            with self._lock:
+                self._batch_depth -= 1
+            self.discard()
+            raise
+        with self._lock:
+            self._batch_depth -= 1
+            outermost = not self._batch_depth
+        if outermost:
+            await self.commit()
+
+
+class AsyncClient(Client):
+    """
+    asyncio flavour of :class:`Client`.
+
+    Every API method of ``Client`` is available and returns an awaitable
+    instead of the decoded response, properties included::
+
+        async with AsyncClient('http://127.0.0.1:8080/') as qb:
+            await qb.login('admin', 'adminadmin')
+            torrents = await qb.torrents(filter='downloading')
+            version = await qb.qbittorrent_version
+
+    Requests share a single pooled ``aiohttp`` session and at most
+    ``max_concurrency`` of them are in flight at any time, so large
+    ``asyncio.gather`` fan-outs are safe to issue directly.
+
+    Like ``Client``, the credentials of :meth:`login` are remembered
+    and an expired session is renewed transparently. The connection
+    pool is sized by ``max_concurrency`` instead of a ``TransportConfig``
+    and session cookies are not persisted.
+    """
+    _preferences_type = AsyncPreferences
+
+    def __init__(self, url, max_concurrency=32, timeout=None):
+        if aiohttp is None:
+            raise ImportError("AsyncClient requires the 'aiohttp' package.")
+
+        self._init_state(url)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.session = None
+        # created with the session, they belong to its event loop
+        self._semaphore = None
+        self._probe_lock = None
+        self._auth_lock = None
+        self._inflight = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the underlying HTTP session.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        """
+        Create the pooled HTTP session on first use, inside the running loop.
+        """
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            # qBittorrent is usually addressed by IP, which the default
+            # cookie jar refuses to store the SID cookie for.
+            self.session = aiohttp.ClientSession(
+                connector=connector, timeout=timeout,
+                cookie_jar=aiohttp.CookieJar(unsafe=True))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._probe_lock = asyncio.Lock()
+            self._auth_lock = asyncio.Lock()
+        return self.session
+
+    def pool_stats(self):
+        """
+        Usage of the aiohttp connection pool of this client, with the
+        keys of :meth:`Client.pool_stats`.
+
+        aiohttp does not count opened connections nor requests, those
+        are None. Empty before the first request.
+        """
+        session = self.session
+        if session is None or session.closed:
+            return []
+        connector = session.connector
+        # aiohttp keeps no public counters, read its pool bookkeeping
+        idle = sum(len(conns) for conns in
+                   getattr(connector, '_conns', {}).values())
+        parts = urlsplit(self.url)
+        return [{
+            'host': '%s://%s:%s' % (parts.scheme, parts.hostname,
+                                    parts.port or
+                                    (443 if parts.scheme == 'https' else 80)),
+            'maxsize': connector.limit,
+            'idle': idle,
+            'in_use': len(getattr(connector, '_acquired', ())),
+            'opened': None,
+            'requests': None,
+        }]
+
+    async def _probe(self):
+        """
+        Check whether the WebAPI can be used without logging in.
+        """
+        async with self._probe_lock:
+            if self._is_authenticated is not None:
+                return
+            session = self._get_session()
+            async with session.get(self.url + 'app/preferences') as check:
+                status = check.status
+                await check.read()
+
+            if status == 404:
+                self._is_authenticated = False
+                raise RuntimeError("""
+                This wrapper only supports qBittorrent applications
+                 with version higher than 4.1+
+                 Please use the latest qBittorrent release.
+                """)
+            self._is_authenticated = status == 200
+
+    async def _request(self, endpoint, method, data=None, **kwargs):
+        """
+        Method to hanle both GET and POST requests asynchronously.
+
+        Takes the same arguments as :meth:`Client._request`.
+
+        :return: Response for the request.
+        """
+        cache = self.cache
+        key = None
+        if method == 'get' and endpoint not in UNSAFE_GETS:
+            key = request_key(endpoint, kwargs)
+        cached = (key is not None and cache is not None and
+                  cache.cacheable(endpoint))
+        if cached:
+            found, response = cache.get(key)
+            if found:
+                return response
+            generation = cache.generation(endpoint)
+
+        try:
+            if key is not None and self.coalesce_requests:
+                response = await self._coalesce(key, self._perform(
+                    endpoint, method, data, **kwargs))
+            else:
+                response = await self._perform(endpoint, method, data,
+                                               **kwargs)
+        finally:
+            # reads in flight may predate the write, release their keys
+            # before invalidating so no read started after the
+            # invalidation joins them
+            if key is None and endpoint not in IDEMPOTENT_POSTS:
+                self._inflight.clear()
+            if cache is not None and key is None:
+                cache.on_write(endpoint)
+
+        if cached:
+            cache.set(key, response, generation)
+        return response
+
+    async def _coalesce(self, key, coro):
+        """
+        Await ``coro`` unless an identical request is in flight, in
+        which case share its result.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            coro.close()
+            return await asyncio.shield(future)
+        future = self._inflight[key] = asyncio.ensure_future(coro)
+
+        def release(_=None):
+            # the key may have been released early by a write
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                release()
+            else:
+                # the leader was cancelled, let the request finish for
+                # the other waiters
+                future.add_done_callback(release)
+
+    async def _perform(self, endpoint, method, data=None, **kwargs):
+        """
+        Authenticate if needed, send the request and decode the response.
+        """
+        session = self._get_session()
+        if self._is_authenticated is None:
+            await self._probe()
+        if not self._is_authenticated:
+            if self._credentials is None:
+                raise LoginRequired
+            await self._relogin()
+
+        final_url = self.url + endpoint
+        params = kwargs.pop('params', None)
+        if params:
+            kwargs['params'] = dict((k, _form_value(v))
+                                    for k, v in params.items())
+
+        if method == 'get':
+            # ``Client._get`` callers may pass form data to GET endpoints.
+            data = kwargs.pop('data', None)
+        files = kwargs.pop('files', None)
+        if not files and isinstance(data, dict):
+            data = dict((k, _form_value(v)) for k, v in data.items())
+
+        metrics = self.metrics
+        async with self._semaphore:
+            if metrics is not None:
+                started = time.perf_counter()
+            try:
+                generation = self._session_generation
+                response, content = await self._send_once(
+                    session, method, final_url, data, files, kwargs)
+
+                if response.status == 403 and self._credentials is not None:
+                    # the session expired, log in again once and retry
+                    await self._relogin(generation)
+                    response, content = await self._send_once(
+                        session, method, final_url, data, files, kwargs)
+
+                response.raise_for_status()
+            except Exception as e:
+                if metrics is not None:
+                    metrics.observe(endpoint, time.perf_counter() - started,
+                                    status=getattr(e, 'status', None),
+                                    error=e)
+                raise
+
+        content_type = response.headers.get('Content-Type')
+        if metrics is None:
+            return decode_response(content, content_type, self.json_loads)
+
+        latency = time.perf_counter() - started
+        decode_started = time.perf_counter()
+        result = decode_response(content, content_type, self.json_loads)
+        metrics.observe(endpoint, latency, status=response.status,
+                        request_bytes=0 if files else body_size(data),
+                        response_bytes=len(content),
+                        decode_seconds=time.perf_counter() - decode_started)
+        return result
+
+    async def _send_once(self, session, method, url, data, files, kwargs):
+        """
+        Send one request, the multipart form is built for each attempt
+        as aiohttp consumes it.
+
+        :return: Tuple of the response and its content.
+        """
+        options = dict(kwargs)
+        if files:
+            options['data'] = self._build_form(data, files)
+        elif data is not None:
+            options['data'] = data
+        async with session.request(method.upper(), url,
+                                   **options) as response:
+            content = await response.read()
+        return response, content
+
+    @staticmethod
+    def _build_form(data, files):
+        """
+        Build a multipart form from ``requests``-style ``data`` and ``files``.
+
+        :param data: Dict of form fields.
+        :param files: Dict of field name to file object or
+                      ``(filename, content)`` tuple.
+        """
+        form = aiohttp.FormData()
+        for name, value in (data or {}).items():
+            form.add_field(name, _form_value(value))
+        for name, value in files.items():
+            if isinstance(value, tuple):
+                filename, content = value[0], value[1]
+                if filename is None:
+                    form.add_field(name, content)
+                else:
+                    form.add_field(name, content, filename=filename)
+            else:
+                form.add_field(name, value, filename=name)
+        return form
+
+    async def _post_hashes(self, endpoint, infohash_list, extra=None,
+                           ordered=False):
+        """
+        Async counterpart of :meth:`Client._post_hashes`, chunks are
+        gathered concurrently within the client's ``max_concurrency``.
+        """
+        chunk_size = self.hash_chunk_size
+        if (not isinstance(infohash_list, list) or not chunk_size or
+                len(infohash_list) <= chunk_size):
+            data = self._process_infohash_list(infohash_list)
+            data.update(extra or {})
+            return await self._post(endpoint, data=data)
+
+        chunks = [infohash_list[i:i + chunk_size]
+                  for i in range(0, len(infohash_list), chunk_size)]
+
+        async def send(chunk):
+            data = self._process_infohash_list(chunk)
+            data.update(extra or {})
+            return await self._post(endpoint, data=data)
+
+        if ordered:
+            outcomes = []
+            for chunk in chunks:
+                try:
+                    outcomes.append(await send(chunk))
+                except Exception as e:
+                    outcomes.append(e)
+        else:
+            outcomes = await asyncio.gather(*[send(c) for c in chunks],
+                                            return_exceptions=True)
+        errors = [o if isinstance(o, Exception) else None for o in outcomes]
+        results = [None if isinstance(o, Exception) else o for o in outcomes]
+        return self._merge_chunks(chunks, errors, results)
+
+    async def login(self, username='admin', password='admin'):
+        """
+        Method to authenticate the qBittorrent Client.
+
+        The credentials are remembered so an expired session is renewed
+        transparently. Else, shows the login error.
+
+        :param username: Username.
+        :param password: Password.
+
+        :return: Response to login request to the API.
+        """
+        self._credentials = (username, password)
+        self._get_session()
+        async with self._auth_lock:
+            return await self._login(username, password)
+
+    async def _login(self, username, password):
+        """
+        Send the login request.
+        """
+        session = self._get_session()
+        session.cookie_jar.clear()
+        async with session.post(self.url + 'auth/login',
+                                data={'username': username,
+                                      'password': password}) as login:
+            text = await login.text()
+        if text == 'Ok.':
+            self._is_authenticated = True
+            self._session_generation += 1
+            if self.cache is not None:
+                self.cache.on_write('auth/login')
+        else:
+            self._is_authenticated = False
+            return text
+
+    async def _relogin(self, generation=None):
+        """
+        Log in again with the remembered credentials, once for all the
+        requests which found the session of ``generation`` expired.
+        """
+        async with self._auth_lock:
+            if self._is_authenticated and \
+                    generation != self._session_generation:
+                return
+            error = await self._login(*self._credentials)
+        if error is not None:
+            raise LoginRequired
+
+    async def logout(self):
+        """
+        Logout the current session.
+        """
+        response = await self._get('auth/logout')
+        self._is_authenticated = False
+        self._credentials = None
+        return response
+
+    @property
+    def preferences(self):
+        """
+        :class:`AsyncPreferences` view of the qBittorrent preferences::
+
+            prefs = await qb.preferences
+            await qb.preferences.update(dl_limit=1024000)
+        """
+        return self._preferences
+
+    async def set_preferences(self, **kwargs):
+        """
+        Set preferences of qBittorrent.
+
+        Takes the same arguments as :meth:`Client.set_preferences`.
+        """
+        json_data = "json={}".format(json.dumps(kwargs))
+        headers = {'content-type': 'application/x-www-form-urlencoded'}
+        response = await self._post('app/setPreferences', data=json_data,
+                                    headers=headers)
+        self._preferences._merge(kwargs)
+        return response
+
+    async def torrents(self, typed=False, **filters):
+        """
+        Returns a list of torrents matching the supplied filters.
+
+        Takes the same arguments as :meth:`Client.torrents`.
+        """
+        torrents = await Client.torrents(self, **filters)
+        if typed:
+            return [Torrent(t) for t in torrents]
+        return torrents
+
+    async def get_torrent_pieces_state(self, infohash, packed=False,
+                                       piece_size=None):
+        """
+        Get pieces' state for the torrent.
+
+        Takes the same arguments as :meth:`Client.get_torrent_pieces_state`.
+        """
+        states = await Client.get_torrent_pieces_state(self, infohash)
+        if packed:
+            return PieceStates.from_states(states, piece_size)
+        return states
+
+    @staticmethod
+    async def _tail(fetch, last_known_id, min_interval, max_interval,
+                    backoff):
+        """
+        Async generator counterpart of ``Client._tail``, used by
+        ``tail_log`` and ``tail_peer_log``::
+
+            async for message in qb.tail_log():
+                ...
+        """
+        interval = min_interval
+        while True:
+            entries = await fetch(last_known_id)
+            if entries:
+                last_known_id = max(last_known_id, entries[-1]['id'])
+                interval = min_interval
+                for entry in entries:
+                    yield entry
+            else:
+                interval = min(max_interval, interval * backoff)
+            await asyncio.sleep(interval)
+
+    async def iter_torrents(self, page_size=1000, prefetch=True,
+                            typed=False, **filters):
+        """
+        Async generator counterpart of :meth:`Client.iter_torrents`::
+
+            async for torrent in qb.iter_torrents(page_size=5000):
+                ...
+        """
+        filters.setdefault('sort', 'hash')
+        offset = filters.pop('offset', 0)
+        remaining = filters.pop('limit', None)
+
+        def next_size():
+            if remaining is None:
+                return page_size
+            return min(page_size, remaining)
+
+        upcoming = None
+        try:
+            size = next_size()
+            page = (await self.torrents(typed=typed, offset=offset,
+                                        limit=size, **filters)
+                    if size else [])
+            while page:
+                offset += len(page)
+                if remaining is not None:
+                    remaining -= len(page)
+                last = len(page) < size
+                size = next_size()
+                if last or not size:
+                    upcoming = None
+                else:
+                    upcoming = self.torrents(typed=typed, offset=offset,
+                                             limit=size, **filters)
+                    if prefetch:
+                        upcoming = asyncio.ensure_future(upcoming)
+                for torrent in page:
+                    yield torrent
+                if upcoming is None:
+                    break
+                page, upcoming = await upcoming, None
+        finally:
+            if isinstance(upcoming, asyncio.Future):
+                upcoming.cancel()
+            elif upcoming is not None:
+                upcoming.close()
+
+    async def get_torrents_details(self, infohash_list,
+                                   kinds=('properties', 'files',
+                                          'trackers', 'webseeds'),
+                                   max_workers=None):
+        """
+        Async generator counterpart of :meth:`Client.get_torrents_details`.
+
+        Concurrency is bounded by ``max_workers`` if given, and by the
+        client's ``max_concurrency`` in any case::
+
+            async for detail in qb.get_torrents_details(hashes):
+                ...
+
+        :return: Async generator of ``TorrentDetail(hash, kind, data, error)``.
+        """
+        for kind in kinds:
+            if kind not in DETAIL_KINDS:
+                raise ValueError("Unknown detail kind: %s" % kind)
+
+        window = max_workers or self.max_concurrency
+
+        async def fetch(infohash, kind):
+            try:
+                data = await getattr(self, DETAIL_KINDS[kind])(infohash)
+            except Exception as e:
+                return TorrentDetail(infohash, kind, None, e)
+            return TorrentDetail(infohash, kind, data, None)
+
+        jobs = ((infohash, kind) for infohash in infohash_list
+                for kind in kinds)
+        pending = set()
+        try:
+            while True:
+                for infohash, kind in jobs:
+                    pending.add(asyncio.ensure_future(fetch(infohash, kind)))
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def ingest_files(self, files, max_batch_bytes=DEFAULT_BATCH_BYTES,
+                           max_batch_files=DEFAULT_BATCH_FILES,
+                           max_workers=4, isolate_failures=True,
+                           parse=True, known=None, **kwargs):
+        """
+        Async counterpart of :meth:`Client.ingest_files`.
+
+        :return: :class:`~qbittorrentv2.upload.IngestResult`.
+        """
+        fields = add_options(kwargs)
+        window = asyncio.Semaphore(max_workers)
+
+        async def send(batch):
+            body = MultipartBody(fields, batch)
+            async with window:
+                try:
+                    return check_added(await self._post(
+                        'torrents/add', data=body,
+                        headers=body.headers)), None
+                except Exception as e:
+                    return None, e
+
+        result = IngestResult()
+        batches = plan_batches(result._prepare(files, known, parse),
+                               max_batch_bytes, max_batch_files)
+        while batches:
+            retry = []
+            outcomes = await asyncio.gather(*[send(b) for b in batches])
+            for batch, (response, error) in zip(batches, outcomes):
+                result._record(batch, response, error)
+                if error is not None and isolate_failures and len(batch) > 1:
+                    retry.extend([source] for source in batch)
+            batches = retry
+        return result
+
+    async def ingest_links(self, links, batch_size=100, max_metadata=100,
+                           max_queued=1000, poll_interval=1.0, timeout=None,
+                           sync_state=None, **kwargs):
+        """
+        Async counterpart of :meth:`Client.ingest_links`.
+
+        :return: :class:`~qbittorrentv2.links.LinkIngestResult`.
+        """
+        state = sync_state if sync_state is not None else SyncState(self)
+        await state.async_update()
+        feeder = LinkFeeder(links, state.torrents, batch_size, max_metadata,
+                            max_queued)
+        deadline = None if timeout is None else time.time() + timeout
+        while feeder:
+            feeder.observe(state)
+            count = feeder.room()
+            while count > 0 and feeder:
+                batch = feeder.take(count)
+                try:
+                    await self.download_from_link(
+                        [link for link, _ in batch], **kwargs)
+                except Exception as e:
+                    feeder.sent(batch, e)
+                else:
+                    feeder.sent(batch)
+                count = feeder.room()
+            if not feeder or (deadline is not None and
+                              time.time() >= deadline):
+                break
+            await asyncio.sleep(poll_interval)
+            await state.async_update()
+        return feeder.finish()
+
+    async def wait_for(self, infohash_list, predicate, timeout=None):
+        """
+        Async counterpart of :meth:`Client.wait_for`, the poller runs
+        as a task of the event loop.
+        """
+        return await self.poller.async_wait_for(infohash_list, predicate,
+                                                timeout)
+
+    def _start_poller(self):
+        self.poller.start_async()
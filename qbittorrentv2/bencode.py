@@ -0,0 +1,318 @@
+import hashlib
+import mmap
+import os
+
+#: Keys of the info dict which are not materialized by :class:`TorrentInfo`.
+SKIPPED_INFO_KEYS = frozenset((b'pieces',))
+
+#: Deepest nesting of lists and dicts accepted, well below the
+#: interpreter recursion limit.
+MAX_DEPTH = 256
+
+
+class BencodeError(ValueError):
+    """
+    The data is not valid bencode.
+    """
+
+
+def _find(buf, char, pos):
+    end = buf.find(char, pos)
+    if end < 0:
+        raise BencodeError('Unterminated value at offset %d.' % pos)
+    return end
+
+
+def _decode(buf, pos, skip=None, depth=0):
+    """
+    Decode the value starting at ``pos``.
+
+    :param skip: Dict keys whose values are skipped instead of decoded.
+    :param depth: Nesting level of the value.
+
+    :return: Tuple of (value, end offset).
+    """
+    try:
+        token = buf[pos]
+    except IndexError:
+        raise BencodeError('Unexpected end of data.')
+    if token == 0x69:  # i
+        end = _find(buf, b'e', pos + 1)
+        try:
+            return int(buf[pos + 1:end]), end + 1
+        except ValueError:
+            raise BencodeError('Invalid integer at offset %d.' % pos)
+    if 0x30 <= token <= 0x39:  # 0-9
+        colon = _find(buf, b':', pos)
+        try:
+            start, length = colon + 1, int(buf[pos:colon])
+        except ValueError:
+            raise BencodeError('Invalid string length at offset %d.' % pos)
+        end = start + length
+        if end > len(buf):
+            raise BencodeError('Truncated string at offset %d.' % pos)
+        return bytes(buf[start:end]), end
+    if token in (0x6c, 0x64) and depth >= MAX_DEPTH:
+        raise BencodeError('Nesting deeper than %d at offset %d.'
+                           % (MAX_DEPTH, pos))
+    if token == 0x6c:  # l
+        pos += 1
+        items = []
+        while buf[pos:pos + 1] != b'e':
+            value, pos = _decode(buf, pos, depth=depth + 1)
+            items.append(value)
+        return items, pos + 1
+    if token == 0x64:  # d
+        pos += 1
+        items = {}
+        while buf[pos:pos + 1] != b'e':
+            key, pos = _decode(buf, pos, depth=depth + 1)
+            if not isinstance(key, bytes):
+                raise BencodeError('Dict key at offset %d is not a string.'
+                                   % pos)
+            if skip and key in skip:
+                pos = _skip(buf, pos, depth + 1)
+            else:
+                items[key], pos = _decode(buf, pos, depth=depth + 1)
+        return items, pos + 1
+    raise BencodeError('Invalid token %r at offset %d.' % (chr(token), pos))
+
+
+def _skip(buf, pos, depth=0):
+    """
+    Offset following the value starting at ``pos``, without decoding it.
+    """
+    try:
+        token = buf[pos]
+    except IndexError:
+        raise BencodeError('Unexpected end of data.')
+    if 0x30 <= token <= 0x39:
+        colon = _find(buf, b':', pos)
+        try:
+            end = colon + 1 + int(buf[pos:colon])
+        except ValueError:
+            raise BencodeError('Invalid string length at offset %d.' % pos)
+        if end > len(buf):
+            raise BencodeError('Truncated string at offset %d.' % pos)
+        return end
+    if token == 0x69:
+        return _find(buf, b'e', pos) + 1
+    if token in (0x6c, 0x64):
+        if depth >= MAX_DEPTH:
+            raise BencodeError('Nesting deeper than %d at offset %d.'
+                               % (MAX_DEPTH, pos))
+        pos += 1
+        while buf[pos:pos + 1] != b'e':
+            if pos >= len(buf):
+                raise BencodeError('Unexpected end of data.')
+            pos = _skip(buf, pos, depth + 1)
+        return pos + 1
+    raise BencodeError('Invalid token %r at offset %d.' % (chr(token), pos))
+
+
+def _buffer(data):
+    """
+    Searchable buffer over bytes-like data, without copying bytes,
+    bytearray and mmap objects.
+    """
+    if isinstance(data, (bytes, bytearray, mmap.mmap)):
+        return data
+    return bytes(data)
+
+
+def decode(data):
+    """
+    Decode bencoded data.
+
+    Strings and dict keys are returned as bytes.
+
+    :param data: bytes-like object.
+
+    :raises BencodeError: if the data is invalid or has trailing bytes.
+    """
+    buf = _buffer(data)
+    value, end = _decode(buf, 0)
+    if end != len(buf):
+        raise BencodeError('Trailing data at offset %d.' % end)
+    return value
+
+
+def _encode(value, out):
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        out.append(b'i%de' % value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out.append(b'%d:' % len(value))
+        out.append(bytes(value))
+    elif isinstance(value, str):
+        _encode(value.encode('utf_8'), out)
+    elif isinstance(value, (list, tuple)):
+        out.append(b'l')
+        for item in value:
+            _encode(item, out)
+        out.append(b'e')
+    elif isinstance(value, dict):
+        out.append(b'd')
+        items = [(k.encode('utf_8') if isinstance(k, str) else k, v)
+                 for k, v in value.items()]
+        for key, item in sorted(items):
+            _encode(key, out)
+            _encode(item, out)
+        out.append(b'e')
+    else:
+        raise TypeError('Cannot bencode %s.' % type(value).__name__)
+
+
+def encode(value):
+    """
+    Bencode a value made of ints, strings, bytes, lists and dicts.
+    Dict keys are sorted as the format requires.
+
+    :return: bytes.
+    """
+    out = []
+    _encode(value, out)
+    return b''.join(out)
+
+
+def _text(value):
+    return value.decode('utf_8', 'replace')
+
+
+def _v1_files(info, name):
+    if b'files' not in info:
+        return [(name, info.get(b'length', 0))]
+    files = []
+    for entry in info[b'files']:
+        if b'p' in entry.get(b'attr', b''):
+            continue  # padding file of a hybrid torrent
+        parts = entry.get(b'path.utf-8') or entry.get(b'path', [])
+        files.append(('/'.join([name] + [_text(p) for p in parts]),
+                      entry.get(b'length', 0)))
+    return files
+
+
+def _v2_files(tree, prefix, files):
+    for key in sorted(tree):
+        node = tree[key]
+        if key == b'':
+            files.append((prefix, node.get(b'length', 0)))
+        else:
+            _v2_files(node, prefix + '/' + _text(key) if prefix
+                      else _text(key), files)
+    return files
+
+
+class TorrentInfo(object):
+    """
+    Metadata of a .torrent file, parsed locally.
+
+    The infohashes are computed over the raw bytes of the info dict,
+    which are hashed in place, and the piece hashes are skipped rather
+    than copied::
+
+        info = TorrentInfo.from_file('/drop/file.torrent')
+        info.hash            # id qBittorrent uses for the torrent
+        info.total_size
+        info.files           # [(path, length), ...]
+
+    :ivar infohash_v1: SHA-1 hex digest of the info dict, None for
+                       v2-only torrents.
+    :ivar infohash_v2: SHA-256 hex digest of the info dict, None for
+                       v1-only torrents.
+    :ivar name: Name of the torrent.
+    :ivar files: list() of ``(path, length)``, padding files excluded.
+    :ivar total_size: Sum of the file lengths.
+    :ivar piece_length: Bytes per piece.
+    :ivar private: True if the torrent is private.
+    :ivar trackers: list() of announce URLs.
+    """
+    __slots__ = ('infohash_v1', 'infohash_v2', 'name', 'files',
+                 'total_size', 'piece_length', 'private', 'trackers')
+
+    @property
+    def hash(self):
+        """
+        Infohash identifying the torrent in qBittorrent: the v1 hash,
+        or the v2 hash truncated to 20 bytes for v2-only torrents.
+        """
+        return self.infohash_v1 or self.infohash_v2[:40]
+
+    def __repr__(self):
+        return '<TorrentInfo %s %s>' % (self.hash, self.name)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Parse the content of a .torrent file.
+
+        :param data: bytes-like object.
+
+        :raises BencodeError: if the data is not a valid torrent.
+        """
+        buf = _buffer(data)
+        if buf[:1] != b'd':
+            raise BencodeError('Torrent data is not a dict.')
+        pos, span, info, meta = 1, None, None, {}
+        while buf[pos:pos + 1] != b'e':
+            key, pos = _decode(buf, pos, depth=1)
+            if key == b'info':
+                info, end = _decode(buf, pos, skip=SKIPPED_INFO_KEYS, depth=1)
+                span = (pos, end)
+                pos = end
+            elif key in (b'announce', b'announce-list'):
+                meta[key], pos = _decode(buf, pos, depth=1)
+            else:
+                pos = _skip(buf, pos, 1)
+        if not isinstance(info, dict):
+            raise BencodeError('Torrent has no info dict.')
+
+        self = cls()
+        view = memoryview(buf)
+        try:
+            raw = view[span[0]:span[1]]
+            version = info.get(b'meta version', 1)
+            # hybrid torrents carry the v1 file keys next to the file tree
+            has_v1 = version != 2 or b'files' in info or b'length' in info
+            self.infohash_v1 = hashlib.sha1(raw).hexdigest() if has_v1 else None
+            self.infohash_v2 = (hashlib.sha256(raw).hexdigest()
+                                if version == 2 else None)
+            raw.release()
+        finally:
+            view.release()
+
+        self.name = _text(info.get(b'name.utf-8') or info.get(b'name', b''))
+        if self.infohash_v1 is not None:
+            self.files = _v1_files(info, self.name)
+        else:
+            self.files = _v2_files(info.get(b'file tree', {}), '', [])
+            if len(self.files) != 1 or self.files[0][0] != self.name:
+                self.files = [(self.name + '/' + path, length)
+                              for path, length in self.files]
+        self.total_size = sum(length for _, length in self.files)
+        self.piece_length = info.get(b'piece length', 0)
+        self.private = info.get(b'private') == 1
+
+        trackers = []
+        for tier in meta.get(b'announce-list', ()):
+            trackers.extend(_text(url) for url in tier
+                            if _text(url) not in trackers)
+        announce = meta.get(b'announce')
+        if announce and _text(announce) not in trackers:
+            trackers.insert(0, _text(announce))
+        self.trackers = trackers
+        return self
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Parse a .torrent file, read through mmap.
+
+        :param path: Path of the file.
+        """
+        with open(path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                raise BencodeError('%s is empty.' % path)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return cls.from_bytes(data)
@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import OrderedDict
+
+#: Default time to live, in seconds, of the cached endpoints.
+DEFAULT_TTLS = {
+    'app/version': 3600,
+    'app/webapiVersion': 3600,
+    'app/buildInfo': 3600,
+    'app/defaultSavePath': 300,
+    'app/preferences': 60,
+    'rss/rules': 60,
+    'rss/items': 30,
+    'torrents/categories': 60,
+    'torrents/tags': 60,
+    'transfer/speedLimitsMode': 30,
+    'transfer/downloadLimit': 30,
+    'transfer/uploadLimit': 30,
+}
+
+#: Endpoints whose cached responses are dropped when another endpoint
+#: is called. ``None`` drops everything.
+INVALIDATIONS = {
+    'auth/login': None,
+    'auth/logout': None,
+    'app/setPreferences': ('app/preferences', 'app/defaultSavePath',
+                           'transfer/downloadLimit',
+                           'transfer/uploadLimit'),
+    'rss/setRule': ('rss/rules',),
+    'rss/renameRule': ('rss/rules',),
+    'rss/removeRule': ('rss/rules',),
+    'rss/addFolder': ('rss/items',),
+    'rss/addFeed': ('rss/items',),
+    'rss/removeItem': ('rss/items',),
+    'rss/moveItem': ('rss/items',),
+    'rss/refreshItem': ('rss/items',),
+    'torrents/createCategory': ('torrents/categories',),
+    'torrents/editCategory': ('torrents/categories',),
+    'torrents/removeCategories': ('torrents/categories',),
+    'torrents/createTags': ('torrents/tags',),
+    'torrents/deleteTags': ('torrents/tags',),
+    'transfer/toggleSpeedLimitsMode': ('transfer/speedLimitsMode',
+                                       'transfer/downloadLimit',
+                                       'transfer/uploadLimit'),
+    'transfer/setSpeedLimitsMode': ('transfer/speedLimitsMode',
+                                    'transfer/downloadLimit',
+                                    'transfer/uploadLimit'),
+    'transfer/setDownloadLimit': ('transfer/downloadLimit',
+                                  'app/preferences'),
+    'transfer/setUploadLimit': ('transfer/uploadLimit', 'app/preferences'),
+}
+
+
+class ResponseCache(object):
+    """
+    TTL and LRU bounded cache of read-mostly GET responses.
+
+    Only endpoints with a TTL are cached. Calling an endpoint listed in
+    ``invalidations`` drops the cached responses of the endpoints it
+    affects, e.g. ``app/setPreferences`` drops ``app/preferences``.
+    Cached responses are shared between callers, do not modify them.
+
+    A response whose request was sent before an invalidation of its
+    endpoint may predate the write: pass the :meth:`generation` read
+    before sending it to :meth:`set`, which then skips it.
+
+    :param ttls: dict() of endpoint to TTL in seconds, defaults to
+                 ``DEFAULT_TTLS``.
+    :param maxsize: Maximum number of cached responses.
+    :param invalidations: dict() of mutating endpoint to the endpoints
+                          it invalidates, defaults to ``INVALIDATIONS``.
+
+    :ivar hits: Number of requests served from the cache.
+    :ivar misses: Number of cacheable requests sent to the server.
+    """
+    def __init__(self, ttls=None, maxsize=256, invalidations=None):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.maxsize = maxsize
+        self.invalidations = dict(INVALIDATIONS if invalidations is None
+                                  else invalidations)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        # invalidation counters, of everything and per endpoint
+        self._cleared = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def cacheable(self, endpoint):
+        """
+        Whether responses of an endpoint are cached.
+        """
+        return bool(self.ttls.get(endpoint))
+
+    def get(self, key):
+        """
+        Look up a response.
+
+        :param key: Request key, its first item is the endpoint.
+
+        :return: Tuple of (found, response).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def generation(self, endpoint):
+        """
+        Counter of the invalidations of an endpoint, read before sending
+        a request whose response is passed to :meth:`set`.
+        """
+        with self._lock:
+            return self._cleared + self._generations.get(endpoint, 0)
+
+    def set(self, key, value, generation=None):
+        """
+        Store a response, evicting the least recently used ones beyond
+        ``maxsize``.
+
+        :param key: Request key, its first item is the endpoint.
+        :param value: Decoded response.
+        :param generation: :meth:`generation` of the endpoint when the
+                           request was sent, the response is dropped if
+                           the endpoint was invalidated since.
+        """
+        ttl = self.ttls.get(key[0])
+        if not ttl:
+            return
+        with self._lock:
+            if generation is not None and generation != \
+                    self._cleared + self._generations.get(key[0], 0):
+                return
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *endpoints):
+        """
+        Drop the cached responses of endpoints, all of them if none
+        is given.
+        """
+        with self._lock:
+            if not endpoints:
+                self._cleared += 1
+                self._entries.clear()
+                return
+            endpoints = set(endpoints)
+            for endpoint in endpoints:
+                self._generations[endpoint] = \
+                    self._generations.get(endpoint, 0) + 1
+            for key in [k for k in self._entries if k[0] in endpoints]:
+                del self._entries[key]
+
+    def on_write(self, endpoint):
+        """
+        Invalidate what a call to a mutating endpoint affects.
+        """
+        if endpoint not in self.invalidations:
+            return
+        affected = self.invalidations[endpoint]
+        if affected is None:
+            self.invalidate()
+        else:
+            self.invalidate(*affected)
+
+    def stats(self):
+        """
+        Snapshot of the cache counters.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self._entries),
+                'maxsize': self.maxsize}
@@ -1,5 +1,27 @@
 import requests
 import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from qbittorrentv2.cache import ResponseCache
+from qbittorrentv2.decoding import decode_response
+from qbittorrentv2.events import EventWatcher
+from qbittorrentv2.links import LinkFeeder
+from qbittorrentv2.metrics import DEFAULT_BUCKETS, Metrics, body_size
+from qbittorrentv2.pieces import PieceStates
+from qbittorrentv2.poller import SyncPoller
+from qbittorrentv2.records import Torrent
+from qbittorrentv2.singleflight import SingleFlight, request_key
+from qbittorrentv2.sync import SyncState
+from qbittorrentv2.transport import (IDEMPOTENT_POSTS, UNSAFE_GETS,
+                                     TransportConfig, pool_stats)
+from qbittorrentv2.upload import (DEFAULT_BATCH_BYTES, DEFAULT_BATCH_FILES,
+                                  IngestResult, MultipartBody,
+                                  add_options, check_added, plan_batches)
 
 
 class LoginRequired(Exception):
@@ -7,19 +29,303 @@ class LoginRequired(Exception):
         return 'Please login first.'
 
 
+class BulkRequestError(Exception):
+    """
+    Some chunks of a chunked infohash list operation failed.
+
+    :ivar chunks: list() of the infohash chunks sent.
+    :ivar results: list() of the chunk results, None for failed chunks.
+    :ivar errors: dict() of chunk index to the exception it raised.
+    """
+    def __init__(self, chunks, results, errors):
+        super(BulkRequestError, self).__init__(chunks, results, errors)
+        self.chunks = chunks
+        self.results = results
+        self.errors = errors
+
+    def __str__(self):
+        return '%d of %d chunks failed: %s' % (
+            len(self.errors), len(self.chunks),
+            next(iter(self.errors.values())))
+
+    @property
+    def failed_hashes(self):
+        """
+        Infohashes of the failed chunks.
+        """
+        return [h for i in sorted(self.errors) for h in self.chunks[i]]
+
+
+TorrentDetail = namedtuple('TorrentDetail', 'hash kind data error')
+
+# detail kind -> Client method fetching it for a single infohash
+DETAIL_KINDS = {
+    'properties': 'get_torrent',
+    'files': 'get_torrent_files',
+    'trackers': 'get_torrent_trackers',
+    'webseeds': 'get_torrent_webseeds',
+    'pieces_state': 'get_torrent_pieces_state',
+    'pieces_hashes': 'get_torrent_pieces_hashes',
+}
+
+
+class Preferences(object):
+    """
+    Cached view of the qBittorrent preferences.
+
+    The preferences are fetched once and reused for ``ttl`` seconds.
+    Assigning a single preference sends it right away, several
+    assignments can be grouped into one ``app/setPreferences`` request::
+
+        In [5]: prefs = qb.preferences
+
+        In [6]: prefs['autorun_enabled']
+        Out[6]: True
+
+        In [7]: prefs['autorun_enabled'] = False
+
+        In [8]: with qb.preferences.batch() as prefs:
+           ...:     prefs['dl_limit'] = 1024000
+           ...:     prefs['up_limit'] = 512000
+
+    :param client: ``Client`` the preferences belong to.
+    :param ttl: Seconds the fetched preferences stay valid.
+    """
+    def __init__(self, client, ttl=5):
+        self.client = client
+        self.ttl = ttl
+        self._prefs = None
+        self._fetched_at = 0
+        self._pending = {}
+        self._batch_depth = 0
+        self._lock = threading.RLock()
+
+    def __call__(self):
+        return self._current()
+
+    def __getitem__(self, key):
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self.update(**{key: value})
+
+    def __contains__(self, key):
+        return key in self._current()
+
+    def __iter__(self):
+        return iter(self._current())
+
+    def get(self, key, default=None):
+        """
+        Get a preference, or ``default`` if it does not exist.
+        """
+        return self._current().get(key, default)
+
+    def _current(self):
+        """
+        Preferences dict including staged, uncommitted values.
+        """
+        prefs = dict(self._load())
+        with self._lock:
+            prefs.update(self._pending)
+        return prefs
+
+    def _load(self):
+        """
+        Return the cached preferences, fetching them if stale.
+        """
+        with self._lock:
+            if (self._prefs is None or
+                    time.time() - self._fetched_at > self.ttl):
+                self._seed(self.client._get('app/preferences'))
+            return self._prefs
+
+    def _seed(self, prefs):
+        with self._lock:
+            self._prefs = prefs
+            self._fetched_at = time.time()
+
+    def _merge(self, prefs):
+        """
+        Apply values that were sent to qBittorrent to the cache.
+        """
+        with self._lock:
+            if self._prefs is not None:
+                self._prefs.update(prefs)
+
+    def invalidate(self):
+        """
+        Drop the cached preferences, the next read fetches them again.
+        """
+        with self._lock:
+            self._prefs = None
+
+    def update(self, **kwargs):
+        """
+        Stage preferences, sent immediately unless inside ``batch()``.
+
+        :param kwargs: preferences in kwargs form.
+        """
+        with self._lock:
+            self._pending.update(kwargs)
+            if self._batch_depth:
+                return None
+        return self.commit()
+
+    def commit(self):
+        """
+        Send the staged preferences in a single ``set_preferences`` call.
+
+        Every staged value is sent: the cached preferences may be stale,
+        so comparing against them could skip a value another client
+        changed on the daemon. Values stay staged if the request fails.
+
+        :return: Response of ``set_preferences``, or None if nothing
+                 was staged.
+        """
+        with self._lock:
+            staged = dict(self._pending)
+        if not staged:
+            return None
+        response = self.client.set_preferences(**staged)
+        self._unstage(staged)
+        return response
+
+    def _unstage(self, staged):
+        """
+        Drop the values of a successful commit from the staged ones.
+        """
+        with self._lock:
+            for key, value in staged.items():
+                # keep values staged again while the request was sent
+                if self._pending.get(key, staged) is value:
+                    del self._pending[key]
+
+    def discard(self):
+        """
+        Drop the staged preferences without sending them.
+        """
+        with self._lock:
+            self._pending.clear()
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager collecting assignments into one commit on exit.
+        Staged values are discarded if the block raises.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        except Exception:
+            with self._lock:
+                self._batch_depth -= 1
+            self.discard()
+            raise
+        with self._lock:
+            self._batch_depth -= 1
+            outermost = not self._batch_depth
+        if outermost:
+            self.commit()
+
+
 class Client(object):
-    """class to interact with qBittorrent WEB API"""
-    def __init__(self, url):
+    """
+    class to interact with qBittorrent WEB API
+
+    :param url: URL of the qBittorrent WEB UI.
+    :param lazy: Defer the connection check until the first request.
+    :param cookie_file: Path of a file where the session cookie is
+                        persisted, so later processes can reuse it
+                        instead of logging in again.
+    :param transport: :class:`~qbittorrentv2.transport.TransportConfig`
+                      with pool, timeout and retry settings.
+
+    :ivar poller: :class:`~qbittorrentv2.poller.SyncPoller` serving
+                  :meth:`wait_for` and :attr:`events`.
+    :ivar events: :class:`~qbittorrentv2.events.EventWatcher` of the
+                  torrent lifecycle events.
+    """
+
+    #: JSON parser for responses, defaults to ``decoding.json_loads``.
+    json_loads = None
+
+    #: Share one in-flight request between concurrent identical GETs.
+    #: Coalesced callers receive the same decoded object, which must
+    #: not be modified. A GET sent after a write of this client never
+    #: joins one sent before it.
+    coalesce_requests = True
+
+    #: Opt-in :class:`~qbittorrentv2.cache.ResponseCache`,
+    #: see :meth:`enable_cache`.
+    cache = None
+
+    #: Opt-in :class:`~qbittorrentv2.metrics.Metrics`,
+    #: see :meth:`enable_metrics`.
+    metrics = None
+
+    #: Infohash lists longer than this are sent in several requests.
+    hash_chunk_size = 1000
+
+    #: Number of infohash chunks sent concurrently.
+    hash_chunk_workers = 4
+
+    # view class of the ``preferences`` property
+    _preferences_type = Preferences
+
+    def __init__(self, url, lazy=False, cookie_file=None, transport=None):
+        self._init_state(url, cookie_file)
+        self._auth_lock = threading.Lock()
+        self._inflight = SingleFlight()
+        self.transport = transport or TransportConfig()
+        self.session = requests.Session()
+        self.transport.mount(self.session)
+
+        loaded = bool(cookie_file) and self._load_cookies()
+        if loaded and lazy:
+            # trust the persisted session, it is validated by the
+            # first request and renewed if it expired
+            self._is_authenticated = True
+            self._cookie_reused = True
+
+        if not lazy:
+            self._connect()
+            # the probe accepted the persisted session, login() can skip
+            self._cookie_reused = loaded and self._is_authenticated
+
+    def _init_state(self, url, cookie_file=None):
+        """
+        Set up the session state shared with ``AsyncClient``.
+        """
         if not url.endswith('/api/v2/'):
             url += '/api/v2/'
         self.url = url
 
-        session = requests.Session()
-        check_prefs = session.get(url+'app/preferences')
+        self.cookie_file = cookie_file
+        self._credentials = None
+        self._is_authenticated = None
+        self._cookie_reused = False
+        self._session_generation = 0
+        self._preferences = self._preferences_type(self)
+        self.poller = SyncPoller(self)
+        self.events = EventWatcher(self)
+
+    def _connect(self):
+        """
+        Check whether the WEB API is usable without logging in.
+        """
+        check_prefs = self._send('app/preferences', 'get')
 
         if check_prefs.status_code == 200:
             self._is_authenticated = True
-            self.session = session
+            # the probe already returned the preferences, keep them
+            self._preferences._seed(decode_response(
+                check_prefs.content, check_prefs.headers.get('Content-Type'),
+                self.json_loads))
 
         elif check_prefs.status_code == 404:
             self._is_authenticated = False
@@ -32,6 +338,40 @@ class Client(object):
         else:
             self._is_authenticated = False
 
+    def _load_cookies(self):
+        """
+        Load the persisted session cookies into the session.
+
+        :return: True if cookies were loaded.
+        """
+        try:
+            with open(self.cookie_file) as f:
+                cookies = json.load(f)
+        except (IOError, OSError, ValueError):
+            return False
+        for name, value in cookies.items():
+            self.session.cookies.set(name, value)
+        return bool(cookies)
+
+    def _save_cookies(self):
+        """
+        Persist the session cookies, readable by the current user only.
+        """
+        if not self.cookie_file:
+            return
+        cookies = requests.utils.dict_from_cookiejar(self.session.cookies)
+        fd = os.open(self.cookie_file,
+                     os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cookies, f)
+
+    def _clear_cookies(self):
+        """
+        Forget the session cookies, persisted ones included.
+        """
+        self.session.cookies.clear()
+        if self.cookie_file and os.path.exists(self.cookie_file):
+            os.remove(self.cookie_file)
 
     """ 
     Request Methods
@@ -72,29 +412,168 @@ class Client(object):
 
         :return: Response for the request.
         """
-        final_url = self.url + endpoint
+        cache = self.cache
+        key = None
+        if method == 'get' and endpoint not in UNSAFE_GETS:
+            key = request_key(endpoint, kwargs)
+        cached = (key is not None and cache is not None and
+                  cache.cacheable(endpoint))
+        if cached:
+            found, response = cache.get(key)
+            if found:
+                return response
+            generation = cache.generation(endpoint)
+
+        try:
+            if key is not None and self.coalesce_requests:
+                response = self._inflight.do(key, lambda: self._perform(
+                    endpoint, method, data, **kwargs))
+            else:
+                response = self._perform(endpoint, method, data, **kwargs)
+        finally:
+            # reads in flight may predate the write, release their keys
+            # before invalidating so no read started after the
+            # invalidation joins them
+            if key is None and endpoint not in IDEMPOTENT_POSTS:
+                self._inflight.forget()
+            if cache is not None and key is None:
+                cache.on_write(endpoint)
+
+        if cached:
+            cache.set(key, response, generation)
+        return response
 
+    def _perform(self, endpoint, method, data=None, **kwargs):
+        """
+        Authenticate if needed, send the request and decode the response.
+        """
+        if self._is_authenticated is None:
+            self._connect()
         if not self._is_authenticated:
-            raise LoginRequired
+            if self._credentials is None:
+                raise LoginRequired
+            self._relogin()
+
+        metrics = self.metrics
+        if metrics is not None:
+            started = time.perf_counter()
+
+        try:
+            generation = self._session_generation
+            request = self._send(endpoint, method, data, **kwargs)
+
+            if request.status_code == 403 and self._credentials is not None:
+                # the session expired, log in again once and retry
+                self._relogin(generation)
+                request = self._send(endpoint, method, data, **kwargs)
+
+            request.raise_for_status()
+        except Exception as e:
+            if metrics is not None:
+                response = getattr(e, 'response', None)
+                metrics.observe(
+                    endpoint, time.perf_counter() - started,
+                    status=getattr(response, 'status_code', None),
+                    response_bytes=len(response.content) if response is not None else 0,
+                    error=e)
+            raise
+
+        if metrics is None:
+            return decode_response(request.content,
+                                   request.headers.get('Content-Type'),
+                                   self.json_loads)
+
+        latency = time.perf_counter() - started
+        decode_started = time.perf_counter()
+        response = decode_response(request.content,
+                                   request.headers.get('Content-Type'),
+                                   self.json_loads)
+        metrics.observe(endpoint, latency, status=request.status_code,
+                        request_bytes=body_size(request.request.body),
+                        response_bytes=len(request.content),
+                        decode_seconds=time.perf_counter() - decode_started)
+        return response
 
-        rq = self.session
-        if method == 'get':
-            request = rq.get(final_url, **kwargs)
-        else:
-            request = rq.post(final_url, data, **kwargs)
 
-        request.raise_for_status()
-        request.encoding = 'utf_8'
+    def _send(self, endpoint, method, data=None, **kwargs):
+        """
+        Send a request, retrying idempotent ones on connection errors
+        and on the retryable statuses of the transport configuration.
 
-        if len(request.text) == 0:
-            data = json.loads('{}')
-        else:
+        :return: ``requests.Response`` of the last attempt.
+        """
+        transport = self.transport
+        final_url = self.url + endpoint
+        kwargs.setdefault('timeout', transport.timeout_for(endpoint))
+        retries = (transport.retries
+                   if transport.is_idempotent(method, endpoint) else 0)
+
+        attempt = 0
+        while True:
             try:
-                data = json.loads(request.text)
-            except ValueError:
-                data = request.text
+                if method == 'get':
+                    request = self.session.get(final_url, **kwargs)
+                else:
+                    request = self.session.post(final_url, data, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+            else:
+                if (attempt >= retries or
+                        request.status_code not in transport.retry_statuses):
+                    return request
+            time.sleep(transport.backoff(attempt))
+            attempt += 1
 
-        return data
+    def enable_cache(self, ttls=None, maxsize=256):
+        """
+        Cache the responses of read-mostly endpoints such as
+        ``api_version``, ``preferences`` or ``get_rules``.
+
+        Cached responses are dropped after their TTL and whenever a
+        related mutating method is called. ``self.cache.stats()``
+        reports hits and misses.
+
+        :param ttls: dict() of endpoint to TTL in seconds, defaults to
+                     ``cache.DEFAULT_TTLS``.
+        :param maxsize: Maximum number of cached responses.
+
+        :return: The :class:`~qbittorrentv2.cache.ResponseCache`.
+        """
+        self.cache = ResponseCache(ttls=ttls, maxsize=maxsize)
+        return self.cache
+
+    def disable_cache(self):
+        """
+        Stop caching responses.
+        """
+        self.cache = None
+
+    def enable_metrics(self, buckets=DEFAULT_BUCKETS):
+        """
+        Record per-endpoint latency, payload size, decode time, status
+        and error metrics of the requests sent by this client.
+
+        :param buckets: Upper bounds of the latency histogram, in seconds.
+
+        :return: The :class:`~qbittorrentv2.metrics.Metrics`, also
+                 available as ``self.metrics``.
+        """
+        self.metrics = Metrics(buckets)
+        return self.metrics
+
+    def disable_metrics(self):
+        """
+        Stop recording metrics.
+        """
+        self.metrics = None
+
+    def pool_stats(self):
+        """
+        Usage of the HTTP connection pools of this client.
+        See :func:`~qbittorrentv2.transport.pool_stats`.
+        """
+        return pool_stats(self.session)
 
 
     """
@@ -106,8 +585,10 @@ class Client(object):
         """
         Method to authenticate the qBittorrent Client.
 
-        Declares a class attribute named ``session`` which
-        stores the authenticated session if the login is correct.
+        The credentials are remembered so an expired session is renewed
+        transparently. If a session cookie was loaded from ``cookie_file``
+        and not rejected by the connection check, the login request is
+        skipped until the server rejects that cookie.
         Else, shows the login error.
 
         :param username: Username.
@@ -115,21 +596,57 @@ class Client(object):
 
         :return: Response to login request to the API.
         """
-        self.session = requests.Session()
-        login = self.session.post(self.url+'auth/login',
-                                  data={'username': username,
-                                        'password': password})
+        self._credentials = (username, password)
+        if self._cookie_reused:
+            return None
+        with self._auth_lock:
+            return self._login(username, password)
+
+    def _login(self, username, password):
+        """
+        Send the login request and persist the new session cookie.
+        """
+        self._cookie_reused = False
+        self.session.cookies.clear()
+        login = self._send('auth/login', 'post',
+                           data={'username': username,
+                                 'password': password})
         if login.text == 'Ok.':
             self._is_authenticated = True
+            self._session_generation += 1
+            self._save_cookies()
+            if self.cache is not None:
+                # _send bypasses _request, apply the login invalidation
+                self.cache.on_write('auth/login')
         else:
+            self._is_authenticated = False
             return login.text
 
+    def _relogin(self, generation=None):
+        """
+        Log in again with the remembered credentials.
+
+        Threads hitting an expired session together log in only once:
+        the others find the session renewed since ``generation``, the
+        session their request was sent with, and just retry.
+        """
+        with self._auth_lock:
+            if self._is_authenticated and \
+                    generation != self._session_generation:
+                return
+            error = self._login(*self._credentials)
+        if error is not None:
+            raise LoginRequired
+
     def logout(self):
         """
         Logout the current session.
         """
         response = self._get('auth/logout')
         self._is_authenticated = False
+        self._credentials = None
+        self._cookie_reused = False
+        self._clear_cookies()
         return response
 
 
@@ -160,62 +677,20 @@ class Client(object):
     @property
     def preferences(self):
         """
-        Get the current qBittorrent preferences.
-        Can also be used to assign individual preferences.
-        For setting multiple preferences at once,
-        see ``set_preferences`` method.
-
-        Note: Even if this is a ``property``,
-        to fetch the current preferences dict, you are required
-        to call it like a bound method.
+        :class:`Preferences` view of the qBittorrent preferences.
 
-        Wrong::
+        Items are read and assigned on the view itself, and calling it
+        returns the preferences as a dict::
 
-            qb.preferences
-
-        Right::
-
-            qb.preferences()
+            qb.preferences['dl_limit']
+            qb.preferences['dl_limit'] = 1024000
+            qb.preferences()            # dict of all preferences
 
+        Preferences are fetched once and cached for ``Preferences.ttl``
+        seconds. For setting multiple preferences at once, see
+        ``set_preferences`` or ``Preferences.batch``.
         """
-        prefs = self._get('app/preferences')
-
-        class Proxy(Client):
-            """
-            Proxy class to to allow assignment of individual preferences.
-            this class overrides some methods to ease things.
-
-            Because of this, settings can be assigned like::
-
-                In [5]: prefs = qb.preferences()
-
-                In [6]: prefs['autorun_enabled']
-                Out[6]: True
-
-                In [7]: prefs['autorun_enabled'] = False
-
-                In [8]: prefs['autorun_enabled']
-                Out[8]: False
-
-            """
-
-            def __init__(self, url, prefs, auth, session):
-                super(Proxy, self).__init__(url)
-                self.prefs = prefs
-                self._is_authenticated = auth
-                self.session = session
-
-            def __getitem__(self, key):
-                return self.prefs[key]
-
-            def __setitem__(self, key, value):
-                kwargs = {key: value}
-                return self.set_preferences(**kwargs)
-
-            def __call__(self):
-                return self.prefs
-
-        return Proxy(self.url, prefs, self._is_authenticated, self.session)
+        return self._preferences
 
     def set_preferences(self, **kwargs):
         """
@@ -226,8 +701,10 @@ class Client(object):
         """
         json_data = "json={}".format(json.dumps(kwargs))
         headers = {'content-type': 'application/x-www-form-urlencoded'}
-        return self._post('app/setPreferences', data=json_data,
-                          headers=headers)
+        response = self._post('app/setPreferences', data=json_data,
+                              headers=headers)
+        self._preferences._merge(kwargs)
+        return response
 
     @property
     def get_default_save_path(self):
@@ -264,6 +741,64 @@ class Client(object):
         data = {'last_known_id': last_known_id}
         return self._post('log/peers', data=data)
 
+    def tail_log(self, last_known_id=-1, min_interval=0.5, max_interval=30,
+                 backoff=2, **levels):
+        """
+        Follow the qBittorrent log, yielding new messages as they arrive.
+
+        The cursor advances automatically. The poll interval doubles
+        (``backoff``) while nothing happens, up to ``max_interval``, and
+        drops back to ``min_interval`` as soon as messages arrive.
+        Resume from a persisted position by passing the ``id`` of the
+        last message processed as ``last_known_id``::
+
+            for message in qb.tail_log(last_known_id=saved_id, normal=False):
+                ship(message)
+                saved_id = message['id']
+
+        :param last_known_id: Only yield messages with a higher id.
+        :param min_interval: Shortest delay between polls, in seconds.
+        :param max_interval: Longest delay between polls, in seconds.
+        :param backoff: Factor the delay grows by on idle polls.
+        :param levels: ``normal``, ``info``, ``warning`` and ``critical``
+                       flags of :meth:`get_log`.
+
+        :return: Generator of log messages.
+        """
+        fetch = lambda last_id: self.get_log(last_known_id=last_id, **levels)
+        return self._tail(fetch, last_known_id, min_interval, max_interval,
+                          backoff)
+
+    def tail_peer_log(self, last_known_id=-1, min_interval=0.5,
+                      max_interval=30, backoff=2):
+        """
+        Follow the peers log, yielding new entries as they arrive.
+
+        Same as :meth:`tail_log`, for :meth:`get_peer_log`.
+
+        :return: Generator of peer log entries.
+        """
+        fetch = lambda last_id: self.get_peer_log(last_known_id=last_id)
+        return self._tail(fetch, last_known_id, min_interval, max_interval,
+                          backoff)
+
+    @staticmethod
+    def _tail(fetch, last_known_id, min_interval, max_interval, backoff):
+        """
+        Poll ``fetch(last_known_id)`` with an adaptive interval.
+        """
+        interval = min_interval
+        while True:
+            entries = fetch(last_known_id)
+            if entries:
+                last_known_id = max(last_known_id, entries[-1]['id'])
+                interval = min_interval
+                for entry in entries:
+                    yield entry
+            else:
+                interval = min(max_interval, interval * backoff)
+            time.sleep(interval)
+
 
     """
     Sync methods
@@ -351,10 +886,12 @@ class Client(object):
     """
 
 
-    def torrents(self, **filters):
+    def torrents(self, typed=False, **filters):
         """
         Returns a list of torrents matching the supplied filters.
 
+        :param typed: Return compact :class:`~qbittorrentv2.records.Torrent`
+                      records instead of dicts.
         :param filter: Current status of the torrents.
         :param category: Fetch all torrents with the supplied label.
         :param sort: Sort torrents by.
@@ -370,7 +907,72 @@ class Client(object):
             name = 'filter' if name == 'status' else name
             params[name] = value
 
-        return self._get('torrents/info', params=params)
+        torrents = self._get('torrents/info', params=params)
+        if typed:
+            return [Torrent(t) for t in torrents]
+        return torrents
+
+    def iter_torrents(self, page_size=1000, prefetch=True, typed=False,
+                      **filters):
+        """
+        Iterate over torrents one page at a time.
+
+        Pages are requested with ``limit``/``offset`` and sorted by
+        ``hash`` unless another ``sort`` is given, so the order stays
+        stable between pages. Only one or two pages are held in memory
+        at any time. With ``prefetch`` the next page is requested in the
+        background while the current one is being consumed::
+
+            for torrent in qb.iter_torrents(page_size=5000, filter='seeding'):
+                ...
+
+        :param page_size: Number of torrents requested per page.
+        :param prefetch: Request the next page while iterating.
+        :param typed: Yield :class:`~qbittorrentv2.records.Torrent` records.
+        :param filters: Filters of :meth:`torrents`, ``limit`` caps the
+                        total number of torrents and ``offset`` sets
+                        where to start.
+
+        :return: Generator of torrents.
+        """
+        filters.setdefault('sort', 'hash')
+        offset = filters.pop('offset', 0)
+        remaining = filters.pop('limit', None)
+
+        def fetch(offset, limit):
+            return self.torrents(typed=typed, offset=offset, limit=limit,
+                                 **filters)
+
+        def next_size():
+            if remaining is None:
+                return page_size
+            return min(page_size, remaining)
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            size = next_size()
+            page = fetch(offset, size) if size else []
+            while page:
+                offset += len(page)
+                if remaining is not None:
+                    remaining -= len(page)
+                last = len(page) < size
+                size = next_size()
+                upcoming = None
+                if not last and size:
+                    if executor is not None:
+                        upcoming = executor.submit(fetch, offset, size)
+                    else:
+                        upcoming = lambda: fetch(offset, size)
+                for torrent in page:
+                    yield torrent
+                if upcoming is None:
+                    break
+                page = (upcoming.result() if executor is not None
+                        else upcoming())
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
 
     def get_torrent(self, infohash):
         """
@@ -404,13 +1006,21 @@ class Client(object):
         """
         return self._post('torrents/files', data={'hash': infohash})
 
-    def get_torrent_pieces_state(self, infohash):
+    def get_torrent_pieces_state(self, infohash, packed=False,
+                                 piece_size=None):
         """
         Get pieces' state for the torrent.
 
         :param infohash: INFO HASH of the torrent.
+        :param packed: Return a :class:`~qbittorrentv2.pieces.PieceStates`
+                       holding two bits per piece instead of a list.
+        :param piece_size: Bytes per piece of the packed states, see
+                           ``get_torrent``, for byte range queries.
         """
-        return self._post('torrents/pieceStates', data={'hash': infohash})
+        states = self._post('torrents/pieceStates', data={'hash': infohash})
+        if packed:
+            return PieceStates.from_states(states, piece_size)
+        return states
 
     def get_torrent_pieces_hashes(self, infohash):
         """
@@ -419,6 +1029,83 @@ class Client(object):
         :param infohash: INFO HASH of the torrent.
         """
         return self._post('torrents/pieceHashes', data={'hash': infohash})
+
+    def wait_for(self, infohash_list, predicate, timeout=None):
+        """
+        Wait until torrents satisfy a condition.
+
+        All waiters of the client are served by ``self.poller``, which
+        polls ``sync/maindata`` once per ``self.poller.interval``
+        seconds however many torrents are watched::
+
+            from qbittorrentv2.poller import has_metadata, is_completed
+
+            qb.wait_for(hashes, has_metadata, timeout=300)
+            qb.wait_for(infohash, is_completed)
+
+        :param infohash_list: Single or list() of infohashes.
+        :param predicate: Callable taking the torrent dict, or None if
+                          the torrent is not present.
+        :param timeout: Maximum number of seconds to wait.
+
+        :return: dict() of infohash to torrent.
+        :raises WaitTimeout: if the timeout expires first.
+        """
+        return self.poller.wait_for(infohash_list, predicate, timeout)
+
+    def _start_poller(self):
+        self.poller.start()
+
+    def get_torrents_details(self, infohash_list,
+                             kinds=('properties', 'files', 'trackers', 'webseeds'),
+                             max_workers=8):
+        """
+        Fetch details of many torrents concurrently.
+
+        Requests run on a pool of ``max_workers`` threads sharing this
+        client's session. Results are yielded in completion order, a
+        failing request is reported in ``error`` instead of aborting the
+        whole batch::
+
+            for detail in qb.get_torrents_details(hashes, kinds=['files']):
+                if detail.error is None:
+                    files[detail.hash] = detail.data
+
+        :param infohash_list: Iterable of infohashes.
+        :param kinds: Details to fetch, any of ``DETAIL_KINDS``.
+        :param max_workers: Maximum number of concurrent requests.
+
+        :return: Generator of ``TorrentDetail(hash, kind, data, error)``.
+        """
+        for kind in kinds:
+            if kind not in DETAIL_KINDS:
+                raise ValueError("Unknown detail kind: %s" % kind)
+
+        jobs = ((infohash, kind) for infohash in infohash_list
+                for kind in kinds)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending = {}
+        try:
+            while True:
+                # keep a bounded window of submitted jobs so huge hash
+                # lists don't turn into as many queued futures
+                for infohash, kind in jobs:
+                    method = getattr(self, DETAIL_KINDS[kind])
+                    pending[executor.submit(method, infohash)] = (infohash, kind)
+                    if len(pending) >= max_workers * 2:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    infohash, kind = pending.pop(future)
+                    error = future.exception()
+                    data = None if error is not None else future.result()
+                    yield TorrentDetail(infohash, kind, data, error)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
     
     def pause(self, infohash_list):
         """
@@ -426,8 +1113,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/pause', data=data)
+        return self._post_hashes('torrents/pause', infohash_list)
 
     def pause_all(self):
         """
@@ -441,8 +1127,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/resume', data=data)
+        return self._post_hashes('torrents/resume', infohash_list)
 
     def resume_all(self):
         """
@@ -456,9 +1141,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        data['deleteFiles'] = False
-        return self._post('torrents/delete', data=data)
+        return self._post_hashes('torrents/delete', infohash_list, {'deleteFiles': False})
 
     def delete_permanently(self, infohash_list):
         """
@@ -466,9 +1149,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        data['deleteFiles'] = True
-        return self._post('torrents/delete', data=data)
+        return self._post_hashes('torrents/delete', infohash_list, {'deleteFiles': True})
 
     def recheck(self, infohash_list):
         """
@@ -476,8 +1157,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/recheck', data=data)
+        return self._post_hashes('torrents/recheck', infohash_list)
         
     def recheck_all(self):
         """
@@ -491,8 +1171,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/reannounce', data=data)
+        return self._post_hashes('torrents/reannounce', infohash_list)
         
     def reannounce_all(self):
         """
@@ -530,6 +1209,62 @@ class Client(object):
 
         return self._post('torrents/add', data=options, files=dummy_file)
 
+    def ingest_links(self, links, batch_size=100, max_metadata=100,
+                     max_queued=1000, poll_interval=1.0, timeout=None,
+                     sync_state=None, **kwargs):
+        """
+        Add many torrents from links without flooding the daemon.
+
+        Magnets whose infohash is already known, or repeated in
+        ``links``, are skipped without a request. The others are sent
+        in batches while the number of torrents fetching metadata or
+        queued, polled through ``sync/maindata``, stays under the
+        limits::
+
+            result = qb.ingest_links(magnets, max_metadata=200,
+                                     category='linux')
+            result.hashes       # infohashes of the submitted magnets
+            result.skipped      # duplicates
+
+        :param links: list() of magnet URIs or URLs.
+        :param batch_size: Maximum number of links per request.
+        :param max_metadata: Maximum number of torrents fetching metadata,
+                             None for no limit.
+        :param max_queued: Maximum number of queued torrents, None for
+                           no limit.
+        :param poll_interval: Seconds between polls while throttled.
+        :param timeout: Seconds after which unsent links are given up
+                        and listed in ``result.pending``.
+        :param sync_state: ``SyncState`` of this client to reuse.
+        :param kwargs: Options of ``download_from_link``.
+
+        :return: :class:`~qbittorrentv2.links.LinkIngestResult`.
+        """
+        state = sync_state if sync_state is not None else SyncState(self)
+        state.update()
+        feeder = LinkFeeder(links, state.torrents, batch_size, max_metadata,
+                            max_queued)
+        deadline = None if timeout is None else time.time() + timeout
+        while feeder:
+            feeder.observe(state)
+            count = feeder.room()
+            while count > 0 and feeder:
+                batch = feeder.take(count)
+                try:
+                    self.download_from_link([link for link, _ in batch],
+                                            **kwargs)
+                except Exception as e:
+                    feeder.sent(batch, e)
+                else:
+                    feeder.sent(batch)
+                count = feeder.room()
+            if not feeder or (deadline is not None and
+                              time.time() >= deadline):
+                break
+            time.sleep(poll_interval)
+            state.update()
+        return feeder.finish()
+
     def download_from_file(self, file_buffer, **kwargs):
         """
         Download torrent using a file.
@@ -553,6 +1288,64 @@ class Client(object):
             data.update({'savepath': data['save_path']})
         return self._post('torrents/add', data=data, files=torrent_files)
 
+    def ingest_files(self, files, max_batch_bytes=DEFAULT_BATCH_BYTES,
+                     max_batch_files=DEFAULT_BATCH_FILES, max_workers=4,
+                     isolate_failures=True, parse=True, known=None,
+                     **kwargs):
+        """
+        Add many torrents from files, in batches of streamed requests.
+
+        Files are parsed locally for their infohash, then read again
+        only while their batch is sent, paths through mmap, so memory
+        use does not grow with the number of files.
+        Batches are limited by total size and number of files and up to
+        ``max_workers`` of them are sent concurrently::
+
+            result = qb.ingest_files(glob.glob('/drop/*.torrent'),
+                                     category='linux')
+            result.batch_of(path).error    # None if accepted
+            result.hashes                  # infohashes of accepted files
+            result.failed                  # invalid or rejected files
+
+        :param files: list() of paths, bytes or binary file objects.
+        :param max_batch_bytes: Maximum total file size of a request.
+        :param max_batch_files: Maximum number of files of a request.
+        :param max_workers: Maximum number of concurrent requests.
+        :param isolate_failures: Resend the files of a rejected batch
+                                 one per request, so a single bad file
+                                 does not reject the others.
+        :param parse: Parse the files locally to learn their infohashes,
+                      skip duplicates and leave out invalid files.
+        :param known: Infohashes of torrents already added, their files
+                      are skipped. Requires ``parse``.
+        :param kwargs: Options of ``download_from_file``.
+
+        :return: :class:`~qbittorrentv2.upload.IngestResult`.
+        """
+        fields = add_options(kwargs)
+
+        def send(batch):
+            body = MultipartBody(fields, batch)
+            try:
+                return check_added(self._post('torrents/add', data=body,
+                                              headers=body.headers)), None
+            except Exception as e:
+                return None, e
+
+        result = IngestResult()
+        batches = plan_batches(result._prepare(files, known, parse),
+                               max_batch_bytes, max_batch_files)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while batches:
+                retry = []
+                for batch, (response, error) in zip(
+                        batches, executor.map(send, batches)):
+                    result._record(batch, response, error)
+                    if error is not None and isolate_failures and len(batch) > 1:
+                        retry.extend([source] for source in batch)
+                batches = retry
+        return result
+
     def add_trackers(self, infohash, trackers):
         """
         Add trackers to a torrent.
@@ -570,8 +1363,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/increasePrio', data=data)
+        return self._post_hashes('torrents/increasePrio', infohash_list, ordered=True)
 
     def decrease_priority(self, infohash_list):
         """
@@ -579,8 +1371,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/decreasePrio', data=data)
+        return self._post_hashes('torrents/decreasePrio', infohash_list, ordered=True)
 
     def set_max_priority(self, infohash_list):
         """
@@ -588,8 +1379,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/topPrio', data=data)
+        return self._post_hashes('torrents/topPrio', infohash_list, ordered=True)
 
     def set_min_priority(self, infohash_list):
         """
@@ -597,8 +1387,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/bottomPrio', data=data)
+        return self._post_hashes('torrents/bottomPrio', infohash_list, ordered=True)
 
     def set_file_priority(self, infohash, file_id, priority):
         """
@@ -625,8 +1414,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/downloadLimit', data=data)
+        return self._post_hashes('torrents/downloadLimit', infohash_list)
 
     def set_torrent_download_limit(self, infohash_list, limit):
         """
@@ -635,9 +1423,7 @@ class Client(object):
         :param infohash_list: Single or list() of infohashes.
         :param limit: Speed limit in bytes.
         """
-        data = self._process_infohash_list(infohash_list)
-        data.update({'limit': limit})
-        return self._post('torrents/setDownloadLimit', data=data)
+        return self._post_hashes('torrents/setDownloadLimit', infohash_list, {'limit': limit})
 
     def set_torrent_share_limit(self, infohash_list, ratioLimit=-2, seedingTimeLimit=-2):
         """
@@ -647,9 +1433,7 @@ class Client(object):
         :param ratioLimit: Max ratio the torrent should be seeded until. -2 means the global limit, -1 means no limit.
         :param seedingTimeLimit: Max amount of time the torrent should be seeded. -2 means the global limit, -1 means no limit.
         """
-        data = self._process_infohash_list(infohash_list)
-        data.update({'ratioLimit': ratioLimit, 'seedingTimeLimit': seedingTimeLimit})
-        return self._post('torrents/setShareLimits', data=data)
+        return self._post_hashes('torrents/setShareLimits', infohash_list, {'ratioLimit': ratioLimit, 'seedingTimeLimit': seedingTimeLimit})
 
     def get_torrent_upload_limit(self, infohash_list):
         """
@@ -657,8 +1441,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/uploadLimit', data=data)
+        return self._post_hashes('torrents/uploadLimit', infohash_list)
 
     def set_torrent_upload_limit(self, infohash_list, limit):
         """
@@ -667,9 +1450,7 @@ class Client(object):
         :param infohash_list: Single or list() of infohashes.
         :param limit: Speed limit in bytes.
         """
-        data = self._process_infohash_list(infohash_list)
-        data.update({'limit': limit})
-        return self._post('torrents/setUploadLimit', data=data)
+        return self._post_hashes('torrents/setUploadLimit', infohash_list, {'limit': limit})
 
     def set_location(self, infohash_list, location):
         """
@@ -678,9 +1459,7 @@ class Client(object):
         :param infohash_list: Single or list() of infohashes.
         :param location: Location to download the torrent to.
         """
-        data = self._process_infohash_list(infohash_list)
-        data.update({'location': location})
-        return self._post('torrents/setLocation', data=data)
+        return self._post_hashes('torrents/setLocation', infohash_list, {'location': location})
 
     def set_torrent_name(self, infohash, name):
         """
@@ -699,9 +1478,7 @@ class Client(object):
         :param infohash_list: Single or list() of infohashes.
         :param category: The torrent category to set.
         """
-        data = self._process_infohash_list(infohash_list)
-        data['category'] = category
-        return self._post('torrents/setCategory', data=data)
+        return self._post_hashes('torrents/setCategory', infohash_list, {'category': category})
     
     def add_category(self, category):
         """
@@ -740,9 +1517,7 @@ class Client(object):
         :param infohash_list: Single or list() of infohashes.
         :param enable: Enable or disable automatic torrent management.
         """
-        data = self._process_infohash_list(infohash_list)
-        data['enable'] = enable
-        return self._post('torrents/setAutoManagement', data=data)
+        return self._post_hashes('torrents/setAutoManagement', infohash_list, {'enable': enable})
 
     def set_automatic_torrent_all(self, enable=False):
         """
@@ -758,8 +1533,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/toggleSequentialDownload', data=data)
+        return self._post_hashes('torrents/toggleSequentialDownload', infohash_list)
 
     def toggle_first_last_piece_priority(self, infohash_list):
         """
@@ -767,8 +1541,7 @@ class Client(object):
 
         :param infohash_list: Single or list() of infohashes.
         """
-        data = self._process_infohash_list(infohash_list)
-        return self._post('torrents/toggleFirstLastPiecePrio', data=data)
+        return self._post_hashes('torrents/toggleFirstLastPiecePrio', infohash_list)
 
     def force_start(self, infohash_list, value=True):
         """
@@ -777,9 +1550,7 @@ class Client(object):
         :param infohash_list: Single or list() of infohashes.
         :param value: Force start value (bool)
         """
-        data = self._process_infohash_list(infohash_list)
-        data.update({'value': json.dumps(value)})
-        return self._post('torrents/setForceStart', data=data)
+        return self._post_hashes('torrents/setForceStart', infohash_list, {'value': json.dumps(value)})
 
     def set_super_seeding(self, infohash_list, value):
         """
@@ -788,9 +1559,7 @@ class Client(object):
         :param infohash_list: Single or list() of infohashes.
         :param value: Enable or disable super seeding.
         """
-        data = self._process_infohash_list(infohash_list)
-        data['value'] = value
-        return self._post('torrents/setSuperSeeding', data=data)
+        return self._post_hashes('torrents/setSuperSeeding', infohash_list, {'value': value})
 
     def set_super_seeding_all(self, value=False):
         """
@@ -800,6 +1569,62 @@ class Client(object):
         """
         return self._post('torrents/setSuperSeeding', data={'hashes': 'all', 'value': value})
         
+    def _post_hashes(self, endpoint, infohash_list, extra=None,
+                     ordered=False):
+        """
+        POST an infohash list operation, split into chunks.
+
+        Lists longer than ``hash_chunk_size`` are sent in chunks, at
+        most ``hash_chunk_workers`` at a time (one at a time if
+        ``ordered``), so no single request carries a huge body.
+        Dict results of the chunks are merged, other results are
+        returned as a list with one entry per chunk.
+
+        :param endpoint: Endpoint of the API.
+        :param infohash_list: Single or list() of infohashes.
+        :param extra: Other POST DATA sent with every chunk.
+        :param ordered: Send the chunks sequentially, in order.
+
+        :raises BulkRequestError: if any chunk failed.
+        """
+        chunk_size = self.hash_chunk_size
+        if (not isinstance(infohash_list, list) or not chunk_size or
+                len(infohash_list) <= chunk_size):
+            data = self._process_infohash_list(infohash_list)
+            data.update(extra or {})
+            return self._post(endpoint, data=data)
+
+        chunks = [infohash_list[i:i + chunk_size]
+                  for i in range(0, len(infohash_list), chunk_size)]
+
+        def send(chunk):
+            data = self._process_infohash_list(chunk)
+            data.update(extra or {})
+            return self._post(endpoint, data=data)
+
+        workers = 1 if ordered else self.hash_chunk_workers
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(send, chunk) for chunk in chunks]
+        errors = [f.exception() for f in futures]
+        results = [None if e is not None else f.result()
+                   for f, e in zip(futures, errors)]
+        return self._merge_chunks(chunks, errors, results)
+
+    @staticmethod
+    def _merge_chunks(chunks, errors, results):
+        """
+        Aggregate the per-chunk results of ``_post_hashes``.
+        """
+        errors = dict((i, e) for i, e in enumerate(errors) if e is not None)
+        if errors:
+            raise BulkRequestError(chunks, results, errors)
+        if all(isinstance(r, dict) for r in results):
+            merged = {}
+            for result in results:
+                merged.update(result)
+            return merged
+        return results
+
     @staticmethod
     def _process_infohash_list(infohash_list):
         """
@@ -0,0 +1,301 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+#: Numeric columns and their ``array`` typecode.
+NUMERIC_COLUMNS = {
+    'added_on': 'q', 'amount_left': 'q', 'completed': 'q',
+    'dl_limit': 'q', 'dlspeed': 'q', 'downloaded': 'q', 'eta': 'q',
+    'num_complete': 'q', 'num_incomplete': 'q', 'num_leechs': 'q',
+    'num_seeds': 'q', 'priority': 'q', 'progress': 'd', 'ratio': 'd',
+    'size': 'q', 'time_active': 'q', 'total_size': 'q', 'up_limit': 'q',
+    'uploaded': 'q', 'upspeed': 'q',
+}
+
+#: String columns stored as dictionary-encoded codes.
+STRING_COLUMNS = ('hash', 'name', 'state', 'category', 'tags', 'tracker',
+                  'save_path')
+
+_DTYPES = {'q': 'int64', 'd': 'float64', 'i': 'int32'}
+
+
+def _as_vector(values, typecode):
+    """
+    Wrap an ``array`` as a zero-copy NumPy array if NumPy is available.
+    """
+    if numpy is not None and isinstance(values, array):
+        if not values:
+            return numpy.zeros(0, dtype=_DTYPES[typecode])
+        return numpy.frombuffer(values, dtype=_DTYPES[typecode])
+    return values
+
+
+class TorrentTable(object):
+    """
+    Column oriented copy of a torrent list for fleet-wide aggregates.
+
+    Numeric fields are stored in contiguous ``array`` columns and string
+    fields as integer codes into a per-column dictionary of distinct
+    values. When NumPy is installed the columns are NumPy arrays and
+    every operation is vectorized, without it the same API works with
+    plain Python loops::
+
+        table = TorrentTable.from_torrents(qb.torrents())
+        downloading = table.where(state='downloading')
+        downloading.sum('dlspeed')
+        table.group_sum('category', 'size')
+        table.percentile('ratio', 95)
+
+    :param columns: dict() of numeric column name to array.
+    :param codes: dict() of string column name to array of codes.
+    :param dictionaries: dict() of string column name to list of values.
+    :param length: Number of rows.
+    """
+    def __init__(self, columns, codes, dictionaries, length):
+        self.columns = columns
+        self.codes = codes
+        self.dictionaries = dictionaries
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    @classmethod
+    def from_torrents(cls, torrents, numeric=None, strings=STRING_COLUMNS):
+        """
+        Build a table from ``torrents()`` results.
+
+        :param torrents: Iterable of torrent dicts or ``Torrent`` records.
+        :param numeric: Numeric columns to keep, defaults to all
+                        of ``NUMERIC_COLUMNS``.
+        :param strings: String columns to keep.
+        """
+        if numeric is None:
+            numeric = sorted(NUMERIC_COLUMNS)
+        columns = dict((name, array(NUMERIC_COLUMNS.get(name, 'd')))
+                       for name in numeric)
+        codes = dict((name, array('i')) for name in strings)
+        dictionaries = dict((name, []) for name in strings)
+        lookups = dict((name, {}) for name in strings)
+
+        length = 0
+        for torrent in torrents:
+            get = torrent.get
+            for name, values in columns.items():
+                values.append(get(name) or 0)
+            for name, values in codes.items():
+                value = get(name)
+                if value is None:
+                    value = ''
+                lookup = lookups[name]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                    dictionaries[name].append(value)
+                values.append(code)
+            length += 1
+
+        columns = dict((name, _as_vector(values, values.typecode))
+                       for name, values in columns.items())
+        codes = dict((name, _as_vector(values, 'i'))
+                     for name, values in codes.items())
+        return cls(columns, codes, dictionaries, length)
+
+    @classmethod
+    def from_sync_state(cls, state, **kwargs):
+        """
+        Build a table from the torrents of a ``SyncState``.
+
+        :param state: ``SyncState`` instance.
+        :param kwargs: Passed to :meth:`from_torrents`.
+        """
+        return cls.from_torrents(state.torrents.values(), **kwargs)
+
+    def column(self, name):
+        """
+        Numeric column, or the codes of a string column.
+
+        :param name: Name of the column.
+        """
+        if name in self.columns:
+            return self.columns[name]
+        return self.codes[name]
+
+    def values(self, name):
+        """
+        Decoded values of a column as a list.
+
+        :param name: Name of the column.
+        """
+        if name in self.columns:
+            return list(self.columns[name])
+        dictionary = self.dictionaries[name]
+        return [dictionary[code] for code in self.codes[name]]
+
+    def mask(self, name, condition):
+        """
+        Boolean selection of the rows matching a condition on a column.
+
+        The condition is a value to compare for equality, a set of
+        accepted values, or a callable. For string columns the callable
+        is evaluated once per distinct value. For numeric columns it is
+        called with the whole NumPy column when NumPy is installed and
+        once per value otherwise, so comparisons like
+        ``lambda v: v > 1000`` work in both cases.
+
+        :param name: Name of the column.
+        :param condition: Value, set() of values or callable.
+
+        :return: NumPy bool array, or list() of bools without NumPy.
+        """
+        if name in self.codes:
+            dictionary = self.dictionaries[name]
+            if callable(condition):
+                accepted = [bool(condition(v)) for v in dictionary]
+            elif isinstance(condition, (set, frozenset)):
+                accepted = [v in condition for v in dictionary]
+            else:
+                accepted = [v == condition for v in dictionary]
+            codes = self.codes[name]
+            if numpy is not None:
+                return numpy.array(accepted, dtype=bool)[codes]
+            return [accepted[code] for code in codes]
+
+        values = self.columns[name]
+        if numpy is not None:
+            if callable(condition):
+                return numpy.asarray(condition(values), dtype=bool)
+            if isinstance(condition, (set, frozenset)):
+                return numpy.isin(values, list(condition))
+            return values == condition
+        if callable(condition):
+            return [bool(condition(v)) for v in values]
+        if isinstance(condition, (set, frozenset)):
+            return [v in condition for v in values]
+        return [v == condition for v in values]
+
+    def where(self, **conditions):
+        """
+        Rows matching all conditions, as a new table.
+
+        See :meth:`mask` for the accepted conditions::
+
+            table.where(state={'downloading', 'stalledDL'},
+                        dlspeed=lambda v: v > 0)
+
+        :param conditions: Column name to condition.
+        """
+        selection = None
+        for name, condition in conditions.items():
+            mask = self.mask(name, condition)
+            if selection is None:
+                selection = mask
+            elif numpy is not None:
+                selection = selection & mask
+            else:
+                selection = [a and b for a, b in zip(selection, mask)]
+        if selection is None:
+            return self
+        return self.filter(selection)
+
+    def filter(self, selection):
+        """
+        Rows selected by a boolean mask, as a new table.
+
+        :param selection: Sequence of bools, one per row.
+        """
+        if numpy is not None:
+            selection = numpy.asarray(selection, dtype=bool)
+            columns = dict((n, v[selection]) for n, v in self.columns.items())
+            codes = dict((n, v[selection]) for n, v in self.codes.items())
+            length = int(selection.sum())
+        else:
+            indexes = [i for i, keep in enumerate(selection) if keep]
+            columns = dict((n, array(v.typecode, [v[i] for i in indexes]))
+                           for n, v in self.columns.items())
+            codes = dict((n, array('i', [v[i] for i in indexes]))
+                         for n, v in self.codes.items())
+            length = len(indexes)
+        return TorrentTable(columns, codes, self.dictionaries, length)
+
+    def sum(self, name):
+        """
+        Sum of a numeric column.
+        """
+        values = self.columns[name]
+        if numpy is not None:
+            return values.sum().item()
+        return sum(values)
+
+    def mean(self, name):
+        """
+        Mean of a numeric column, None for an empty table.
+        """
+        if not self.length:
+            return None
+        return self.sum(name) / float(self.length)
+
+    def percentile(self, name, q):
+        """
+        Percentile of a numeric column with linear interpolation,
+        None for an empty table.
+
+        :param name: Name of the column.
+        :param q: Percentile between 0 and 100.
+        """
+        if not self.length:
+            return None
+        values = self.columns[name]
+        if numpy is not None:
+            return float(numpy.percentile(values, q))
+        ordered = sorted(values)
+        rank = (len(ordered) - 1) * q / 100.0
+        low = int(rank)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+    def group_sum(self, by, name):
+        """
+        Sum of a numeric column per value of a string column.
+
+        :param by: Name of the string column to group by.
+        :param name: Name of the numeric column to sum.
+
+        :return: dict() of group value to sum.
+        """
+        dictionary = self.dictionaries[by]
+        codes = self.codes[by]
+        values = self.columns[name]
+        if numpy is not None:
+            # add.at keeps integer columns exact, unlike bincount weights
+            sums = numpy.zeros(len(dictionary), dtype=values.dtype)
+            numpy.add.at(sums, codes, values)
+            present = numpy.bincount(codes, minlength=len(dictionary))
+            return dict((dictionary[i], sums[i].item())
+                        for i in numpy.flatnonzero(present))
+        sums = {}
+        for code, value in zip(codes, values):
+            sums[code] = sums.get(code, 0) + value
+        return dict((dictionary[code], total) for code, total in sums.items())
+
+    def group_count(self, by):
+        """
+        Number of rows per value of a string column.
+
+        :param by: Name of the string column to group by.
+
+        :return: dict() of group value to count.
+        """
+        dictionary = self.dictionaries[by]
+        codes = self.codes[by]
+        if numpy is not None:
+            counts = numpy.bincount(codes, minlength=len(dictionary))
+            return dict((dictionary[i], int(counts[i]))
+                        for i in numpy.flatnonzero(counts))
+        counts = {}
+        for code in codes:
+            counts[code] = counts.get(code, 0) + 1
+        return dict((dictionary[code], count) for code, count in counts.items())
@@ -0,0 +1,100 @@
+import codecs
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if orjson is not None:
+    json_loads = orjson.loads
+else:
+    json_loads = json.loads
+
+# qBittorrent answers some endpoints (speedLimitsMode, downloadLimit,
+# webapiVersion, ...) with a bare number as text/plain
+_NUMBER = re.compile(r'-?\d+(\.\d+)?')
+
+_CHARSET = re.compile(r';\s*charset\s*=\s*"?([^";\s]+)')
+
+
+def set_json_backend(loads):
+    """
+    Set the function used to parse JSON responses.
+
+    The default is ``orjson.loads`` when orjson is installed and
+    ``json.loads`` otherwise. The function receives the raw ``bytes``
+    of the response body.
+
+    :param loads: Callable parsing JSON from bytes, None for the default.
+    """
+    global json_loads
+    if loads is None:
+        loads = orjson.loads if orjson is not None else json.loads
+    json_loads = loads
+
+
+def decode_text(text):
+    """
+    Decode the body of an API response.
+
+    Empty bodies are returned as an empty dict, JSON bodies are
+    parsed and anything else is returned as plain text.
+
+    :param text: Decoded text of the response body.
+
+    :return: Parsed response data.
+    """
+    if len(text) == 0:
+        return {}
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def decode_response(content, content_type, loads=None):
+    """
+    Decode the raw body of an API response using its Content-Type.
+
+    JSON is parsed straight from the bytes, without building an
+    intermediate ``str``. Plain text bodies are returned as ``str``,
+    except bare numbers which are returned as ``int`` or ``float``.
+    Text is decoded with the charset of the Content-Type, UTF-8 by
+    default, replacing undecodable bytes.
+    Responses without a known Content-Type fall back to
+    :func:`decode_text`.
+
+    :param content: Body of the response as bytes.
+    :param content_type: Value of the Content-Type header.
+    :param loads: JSON parser to use instead of the module default.
+
+    :return: Parsed response data.
+    """
+    if not content:
+        return {}
+
+    content_type = (content_type or '').lower()
+    if 'json' in content_type:
+        return (loads or json_loads)(content)
+
+    text = content.decode(_charset(content_type), 'replace')
+    if content_type.startswith('text/'):
+        if len(text) < 32 and _NUMBER.fullmatch(text):
+            return json.loads(text)
+        return text
+    return decode_text(text)
+
+
+def _charset(content_type):
+    """
+    Charset of a lowercased Content-Type, UTF-8 if missing or unknown.
+    """
+    match = _CHARSET.search(content_type)
+    if match is None:
+        return 'utf_8'
+    try:
+        return codecs.lookup(match.group(1)).name
+    except LookupError:
+        return 'utf_8'
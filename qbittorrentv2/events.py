@@ -0,0 +1,313 @@
+import threading
+from collections import deque, namedtuple
+
+ADDED = 'added'
+REMOVED = 'removed'
+STATE_CHANGE = 'state_change'
+COMPLETED = 'completed'
+CATEGORY_CHANGE = 'category_change'
+
+#: Event kinds derived from ``sync/maindata`` deltas.
+EVENT_KINDS = (ADDED, REMOVED, STATE_CHANGE, COMPLETED, CATEGORY_CHANGE)
+
+#: Overflow policies of a full subscription queue.
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+DISCONNECT = 'disconnect'
+
+# torrent fields compared to derive events
+_TRACKED = frozenset(('state', 'progress', 'category'))
+
+TorrentEvent = namedtuple('TorrentEvent', 'kind hash torrent previous current')
+TorrentEvent.__doc__ = """
+Change of a torrent.
+
+:ivar kind: One of ``EVENT_KINDS``.
+:ivar hash: Infohash of the torrent.
+:ivar torrent: Copy of the torrent data when the event was derived,
+               the last known data for ``removed``.
+:ivar previous: Previous state or category for ``state_change`` and
+                ``category_change``, else None.
+:ivar current: New state or category for ``state_change`` and
+               ``category_change``, else None.
+"""
+
+
+class Subscription(object):
+    """
+    Bounded queue of the events matching a subscriber's filters.
+
+    Events are either delivered to a callback from a thread of the
+    subscription, or consumed with :meth:`get` or by iterating. The
+    poller never waits for a subscriber: when the queue is full the
+    ``overflow`` policy applies and ``dropped`` is incremented.
+
+    :ivar dropped: Number of events lost to the overflow policy.
+    :ivar errors: Last exceptions raised by the callback.
+    """
+    def __init__(self, watcher, kinds, callback=None, category=None,
+                 tag=None, hashes=None, maxsize=1000, overflow=DROP_OLDEST):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST, DISCONNECT):
+            raise ValueError('Unknown overflow policy: %s' % overflow)
+        for kind in kinds:
+            if kind not in EVENT_KINDS:
+                raise ValueError('Unknown event kind: %s' % kind)
+        self.watcher = watcher
+        self.kinds = frozenset(kinds)
+        self.callback = callback
+        self.category = category
+        self.tag = tag
+        self.hashes = (None if hashes is None else
+                       frozenset(h.lower() for h in hashes))
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self.closed = False
+        self.errors = deque(maxlen=100)
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        if callback is not None:
+            self._thread = threading.Thread(target=self._deliver,
+                                            name='qbittorrent-events')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def __iter__(self):
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def __len__(self):
+        return len(self._queue)
+
+    def matches(self, event):
+        """
+        Whether an event passes the filters of the subscription.
+        """
+        if event.kind not in self.kinds:
+            return False
+        if self.hashes is not None and event.hash not in self.hashes:
+            return False
+        torrent = event.torrent
+        if self.category is not None and \
+                torrent.get('category') != self.category:
+            return False
+        if self.tag is not None and self.tag not in [
+                t.strip() for t in torrent.get('tags', '').split(',')]:
+            return False
+        return True
+
+    def put(self, event):
+        """
+        Queue an event without blocking, applying the overflow policy
+        if the queue is full.
+        """
+        with self._condition:
+            if self.closed:
+                return
+            if len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                if self.overflow == DROP_NEWEST:
+                    return
+                if self.overflow == DISCONNECT:
+                    self.closed = True
+                    self._condition.notify_all()
+                    self.watcher.unsubscribe(self)
+                    return
+                self._queue.popleft()
+            self._queue.append(event)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        Next event, waiting up to ``timeout`` seconds for one.
+
+        :return: :class:`TorrentEvent`, None on timeout or once the
+                 subscription is closed and drained.
+        """
+        with self._condition:
+            if not self._queue and not self.closed:
+                self._condition.wait(timeout)
+            if self._queue:
+                return self._queue.popleft()
+            return None
+
+    def close(self):
+        """
+        Stop receiving events. Queued events can still be consumed.
+        """
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        self.watcher.unsubscribe(self)
+
+    def _deliver(self):
+        for event in self:
+            try:
+                self.callback(event)
+            except Exception as e:
+                self.errors.append(e)
+
+
+class EventWatcher(object):
+    """
+    Torrent lifecycle events derived from the ``sync/maindata`` deltas
+    of a client's :class:`~qbittorrentv2.poller.SyncPoller`.
+
+    The poller runs while there are subscriptions, events are only
+    derived for changes seen after the first one was made::
+
+        qb.events.on_completed(lambda e: print(e.torrent['name']),
+                               category='linux')
+        qb.events.on_state_change(handle, hashes=watched, maxsize=100,
+                                  overflow='drop_newest')
+
+        sub = qb.events.subscribe(['added', 'removed'])
+        for event in sub:
+            ...
+
+    With ``AsyncClient``, subscribe from the event loop, the poller
+    runs as one of its tasks.
+    """
+    def __init__(self, client):
+        self.client = client
+        self.subscriptions = []
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, kinds=EVENT_KINDS, callback=None, category=None,
+                  tag=None, hashes=None, maxsize=1000, overflow=DROP_OLDEST):
+        """
+        Subscribe to torrent events.
+
+        :param kinds: list() of event kinds, defaults to all.
+        :param callback: Called with each :class:`TorrentEvent` from a
+                         thread of the subscription. Without it, events
+                         are consumed from the returned subscription.
+        :param category: Only events of torrents in this category.
+        :param tag: Only events of torrents with this tag.
+        :param hashes: Only events of these infohashes.
+        :param maxsize: Maximum number of queued events.
+        :param overflow: Policy when the queue is full:
+                         ``'drop_oldest'``, ``'drop_newest'`` or
+                         ``'disconnect'``.
+
+        :return: :class:`Subscription`.
+        """
+        if isinstance(kinds, str):
+            kinds = [kinds]
+        subscription = Subscription(self, kinds, callback, category, tag,
+                                    hashes, maxsize, overflow)
+        with self._lock:
+            self.subscriptions.append(subscription)
+            first = len(self.subscriptions) == 1
+        if first:
+            self.client.poller.add_listener(self._on_changes)
+        self.client._start_poller()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Remove a subscription, the poller stops once none is left.
+        """
+        with self._lock:
+            if subscription not in self.subscriptions:
+                return
+            self.subscriptions.remove(subscription)
+            last = not self.subscriptions
+            if last:
+                self._snapshot = None
+        if last:
+            self.client.poller.remove_listener(self._on_changes)
+
+    def on_added(self, callback, **filters):
+        """
+        Call ``callback(event)`` when a torrent is added.
+
+        :param filters: ``category``, ``tag``, ``hashes``, ``maxsize``
+                        and ``overflow`` of :meth:`subscribe`.
+        """
+        return self.subscribe([ADDED], callback, **filters)
+
+    def on_removed(self, callback, **filters):
+        """
+        Call ``callback(event)`` when a torrent is removed.
+        """
+        return self.subscribe([REMOVED], callback, **filters)
+
+    def on_state_change(self, callback, **filters):
+        """
+        Call ``callback(event)`` when the state of a torrent changes.
+        """
+        return self.subscribe([STATE_CHANGE], callback, **filters)
+
+    def on_completed(self, callback, **filters):
+        """
+        Call ``callback(event)`` when a torrent finishes downloading.
+        """
+        return self.subscribe([COMPLETED], callback, **filters)
+
+    def on_category_change(self, callback, **filters):
+        """
+        Call ``callback(event)`` when the category of a torrent changes.
+        """
+        return self.subscribe([CATEGORY_CHANGE], callback, **filters)
+
+    def _on_changes(self, changes, state):
+        """
+        Poller listener deriving events from a delta.
+        """
+        torrents = state.torrents
+        snapshot = self._snapshot
+        if snapshot is None:
+            # first delta since subscribing, only remember the state
+            self._snapshot = dict((h, _tracked(t))
+                                  for h, t in torrents.items())
+            return
+
+        events = []
+        for infohash in changes.added:
+            torrent = torrents.get(infohash)
+            if torrent is not None:
+                snapshot[infohash] = _tracked(torrent)
+                events.append(TorrentEvent(ADDED, infohash, dict(torrent),
+                                           None, None))
+        for infohash, fields in changes.updated.items():
+            if _TRACKED.isdisjoint(fields):
+                continue
+            torrent = torrents.get(infohash)
+            old = snapshot.get(infohash)
+            if torrent is None or old is None:
+                continue
+            new = snapshot[infohash] = _tracked(torrent)
+            copy = dict(torrent)
+            if new[0] != old[0]:
+                events.append(TorrentEvent(STATE_CHANGE, infohash, copy,
+                                           old[0], new[0]))
+            if new[1] >= 1 > old[1]:
+                events.append(TorrentEvent(COMPLETED, infohash, copy,
+                                           None, None))
+            if new[2] != old[2]:
+                events.append(TorrentEvent(CATEGORY_CHANGE, infohash, copy,
+                                           old[2], new[2]))
+        for infohash, torrent in changes.removed.items():
+            snapshot.pop(infohash, None)
+            events.append(TorrentEvent(REMOVED, infohash, dict(torrent),
+                                       None, None))
+
+        if not events:
+            return
+        with self._lock:
+            subscriptions = list(self.subscriptions)
+        for event in events:
+            for subscription in subscriptions:
+                if subscription.matches(event):
+                    subscription.put(event)
+
+
+def _tracked(torrent):
+    return (torrent.get('state'), torrent.get('progress', 0),
+            torrent.get('category'))
@@ -0,0 +1,191 @@
+import base64
+import binascii
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+#: Torrent states of magnets whose metadata is being fetched.
+METADATA_STATES = frozenset(('metaDL', 'forcedMetaDL'))
+
+#: Torrent states waiting in the download queue.
+QUEUED_STATES = frozenset(('queuedDL', 'checkingResumeData', 'allocating'))
+
+
+def infohash_from_magnet(link):
+    """
+    Infohash of a magnet URI as lowercase hex, None if the link is not
+    a magnet or has no usable ``xt`` parameter.
+
+    Hex and base32 ``urn:btih`` hashes are supported, as well as v2
+    ``urn:btmh`` multihashes, which qBittorrent identifies by their
+    first 20 bytes.
+
+    :param link: Magnet URI or other link.
+    """
+    if not link.startswith('magnet:'):
+        return None
+    query = urlsplit(link).query or link.partition('?')[2]
+    v2 = None
+    for topic in parse_qs(query).get('xt', ()):
+        kind, _, value = topic.lower().rpartition(':')
+        if kind == 'urn:btih':
+            if len(value) == 40:
+                try:
+                    int(value, 16)
+                except ValueError:
+                    continue
+                return value
+            if len(value) == 32:
+                try:
+                    return binascii.hexlify(
+                        base64.b32decode(value.upper())).decode('ascii')
+                except (binascii.Error, ValueError):
+                    continue
+        elif kind == 'urn:btmh' and value.startswith('1220') and \
+                len(value) == 68:
+            v2 = value[4:44]
+    return v2
+
+
+class LinkIngestResult(object):
+    """
+    Outcome of a bulk link submission.
+
+    :ivar submitted: list() of links accepted by the daemon.
+    :ivar hashes: list() of the infohashes of the submitted magnets.
+    :ivar skipped: list() of links whose torrent was already known or
+                   appeared earlier in the input.
+    :ivar failed: list() of links whose request failed.
+    :ivar errors: list() of the exceptions of the failed requests.
+    :ivar pending: list() of links not sent before the timeout.
+    """
+    def __init__(self):
+        self.submitted = []
+        self.hashes = []
+        self.skipped = []
+        self.failed = []
+        self.errors = []
+        self.pending = []
+
+    def __repr__(self):
+        return ('<LinkIngestResult submitted=%d skipped=%d failed=%d '
+                'pending=%d>' % (len(self.submitted), len(self.skipped),
+                                 len(self.failed), len(self.pending)))
+
+
+class LinkFeeder(object):
+    """
+    Decides how many links can be sent to the daemon, from the number
+    of torrents fetching metadata or queued in a ``SyncState``.
+
+    Links sent but not yet visible in the state are counted as fetching
+    metadata, until they show up or ``seen_timeout`` expires.
+
+    :param links: Links to send.
+    :param known: Infohashes already present, their links are skipped.
+    :param batch_size: Maximum number of links per request.
+    :param max_metadata: Maximum number of torrents fetching metadata,
+                         None for no limit.
+    :param max_queued: Maximum number of queued torrents, None for no
+                       limit.
+    :param seen_timeout: Seconds after which a sent link which did not
+                         show up in the state is no longer counted.
+    """
+    def __init__(self, links, known, batch_size=100, max_metadata=100,
+                 max_queued=1000, seen_timeout=30):
+        self.batch_size = batch_size
+        self.max_metadata = max_metadata
+        self.max_queued = max_queued
+        self.seen_timeout = seen_timeout
+        self.result = LinkIngestResult()
+        self.metadata = 0
+        self.queued = 0
+        self._queue = deque()
+        self._unseen = {}
+        self._blind = 0
+
+        seen = set(h.lower() for h in known)
+        for link in links:
+            infohash = infohash_from_magnet(link)
+            if infohash is not None:
+                if infohash in seen:
+                    self.result.skipped.append(link)
+                    continue
+                seen.add(infohash)
+            self._queue.append((link, infohash))
+
+    def __bool__(self):
+        return bool(self._queue)
+
+    def observe(self, state):
+        """
+        Count the torrents fetching metadata or queued in an updated
+        ``SyncState``.
+        """
+        now = time.time()
+        torrents = state.torrents
+        for infohash, sent in list(self._unseen.items()):
+            if infohash in torrents or now - sent > self.seen_timeout:
+                del self._unseen[infohash]
+        # links without infohash can't be tracked, count them for a tick
+        self._blind = 0
+
+        metadata = queued = 0
+        for torrent in torrents.values():
+            torrent_state = torrent.get('state')
+            if torrent_state in METADATA_STATES:
+                metadata += 1
+            elif torrent_state in QUEUED_STATES:
+                queued += 1
+        self.metadata = metadata
+        self.queued = queued
+
+    def room(self):
+        """
+        Number of links which can be sent now.
+        """
+        in_flight = len(self._unseen) + self._blind
+        room = self.batch_size
+        if self.max_metadata is not None:
+            room = min(room, self.max_metadata - self.metadata - in_flight)
+        if self.max_queued is not None:
+            room = min(room, self.max_queued - self.queued - in_flight)
+        return room
+
+    def take(self, count):
+        """
+        Remove up to ``count`` links from the queue.
+
+        :return: list() of ``(link, infohash)``.
+        """
+        return [self._queue.popleft()
+                for _ in range(min(count, len(self._queue)))]
+
+    def sent(self, batch, error=None):
+        """
+        Record the outcome of the request sending a batch.
+        """
+        result = self.result
+        links = [link for link, _ in batch]
+        if error is not None:
+            result.failed.extend(links)
+            result.errors.append(error)
+            return
+        result.submitted.extend(links)
+        now = time.time()
+        for _, infohash in batch:
+            if infohash is None:
+                self._blind += 1
+            else:
+                result.hashes.append(infohash)
+                self._unseen[infohash] = now
+
+    def finish(self):
+        """
+        Record the links left unsent.
+
+        :return: :class:`LinkIngestResult`.
+        """
+        self.result.pending.extend(link for link, _ in self._queue)
+        self._queue.clear()
+        return self.result
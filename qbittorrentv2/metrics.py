@@ -0,0 +1,195 @@
+import threading
+from bisect import bisect_left
+from urllib.parse import urlencode
+
+#: Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def body_size(body):
+    """
+    Size in bytes of a request body, 0 if it is unknown or empty.
+    """
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode('utf_8'))
+    if isinstance(body, dict):
+        # form fields, sent url-encoded
+        return len(urlencode(body, doseq=True))
+    # streamed bodies which know their size
+    if hasattr(body, '__len__') and not isinstance(body, (dict, list, tuple)):
+        return len(body)
+    return 0
+
+
+class EndpointStats(object):
+    """
+    Counters of the requests sent to one endpoint.
+    """
+    __slots__ = ('count', 'buckets', 'latency_sum', 'request_bytes',
+                 'response_bytes', 'decode_seconds', 'statuses', 'errors')
+
+    def __init__(self, bucket_count):
+        self.count = 0
+        self.buckets = [0] * (bucket_count + 1)
+        self.latency_sum = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.decode_seconds = 0.0
+        self.statuses = {}
+        self.errors = {}
+
+
+class Metrics(object):
+    """
+    Per-endpoint request metrics of a client.
+
+    Records the number of requests, a latency histogram, request and
+    response sizes, time spent decoding responses, HTTP statuses and
+    errors. Metrics are only collected once enabled with
+    ``Client.enable_metrics()``, a disabled client pays a single
+    attribute check per request::
+
+        metrics = qb.enable_metrics()
+        ...
+        metrics.snapshot()['torrents/info']['count']
+        print(metrics.render_prometheus())
+
+    :param buckets: Upper bounds of the latency histogram, in seconds.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bucket_bounds = tuple(sorted(buckets))
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, endpoint):
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = EndpointStats(
+                len(self.bucket_bounds))
+        return stats
+
+    def observe(self, endpoint, latency, status=None, request_bytes=0,
+                response_bytes=0, decode_seconds=0.0, error=None):
+        """
+        Record one request.
+
+        :param endpoint: Endpoint of the API.
+        :param latency: Seconds until the response was received.
+        :param status: HTTP status, None if no response was received.
+        :param request_bytes: Size of the request body.
+        :param response_bytes: Size of the response body.
+        :param decode_seconds: Seconds spent decoding the response.
+        :param error: Exception raised by the request, if any.
+        """
+        with self._lock:
+            stats = self._stats(endpoint)
+            stats.count += 1
+            stats.buckets[bisect_left(self.bucket_bounds, latency)] += 1
+            stats.latency_sum += latency
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+            stats.decode_seconds += decode_seconds
+            if status is not None:
+                stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if error is not None:
+                name = type(error).__name__
+                stats.errors[name] = stats.errors.get(name, 0) + 1
+
+    def reset(self):
+        """
+        Drop all recorded metrics.
+        """
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self):
+        """
+        Recorded metrics as a dict of endpoint to counters.
+
+        The ``latency_buckets`` list holds cumulative counts, in the
+        order of ``bucket_bounds`` followed by ``+Inf``.
+        """
+        with self._lock:
+            snapshot = {}
+            for endpoint, stats in self._endpoints.items():
+                cumulative, total = [], 0
+                for count in stats.buckets:
+                    total += count
+                    cumulative.append(total)
+                snapshot[endpoint] = {
+                    'count': stats.count,
+                    'latency_sum': stats.latency_sum,
+                    'latency_buckets': cumulative,
+                    'request_bytes': stats.request_bytes,
+                    'response_bytes': stats.response_bytes,
+                    'decode_seconds': stats.decode_seconds,
+                    'statuses': dict(stats.statuses),
+                    'errors': dict(stats.errors),
+                }
+            return snapshot
+
+    def render_prometheus(self, prefix='qbittorrent_client'):
+        """
+        Recorded metrics in the Prometheus text exposition format.
+
+        :param prefix: Prefix of the metric names.
+        """
+        snapshot = self.snapshot()
+        bounds = ['%g' % b for b in self.bucket_bounds] + ['+Inf']
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append('# HELP %s_%s %s' % (prefix, name, help_text))
+            lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+
+        def label(endpoint, **extra):
+            labels = [('endpoint', endpoint)] + sorted(extra.items())
+            return '{%s}' % ','.join(
+                '%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                for k, v in labels)
+
+        endpoints = sorted(snapshot)
+        family('requests_total', 'counter', 'Requests sent per endpoint.')
+        for e in endpoints:
+            lines.append('%s_requests_total%s %d' % (
+                prefix, label(e), snapshot[e]['count']))
+
+        family('request_duration_seconds', 'histogram',
+               'Request latency per endpoint.')
+        for e in endpoints:
+            stats = snapshot[e]
+            for bound, count in zip(bounds, stats['latency_buckets']):
+                lines.append('%s_request_duration_seconds_bucket%s %d' % (
+                    prefix, label(e, le=bound), count))
+            lines.append('%s_request_duration_seconds_sum%s %r' % (
+                prefix, label(e), stats['latency_sum']))
+            lines.append('%s_request_duration_seconds_count%s %d' % (
+                prefix, label(e), stats['count']))
+
+        for name, key, help_text in (
+                ('request_bytes_total', 'request_bytes',
+                 'Bytes sent in request bodies.'),
+                ('response_bytes_total', 'response_bytes',
+                 'Bytes received in response bodies.'),
+                ('decode_seconds_total', 'decode_seconds',
+                 'Seconds spent decoding responses.')):
+            family(name, 'counter', help_text)
+            for e in endpoints:
+                lines.append('%s_%s%s %r' % (prefix, name, label(e),
+                                             snapshot[e][key]))
+
+        family('responses_total', 'counter', 'Responses per HTTP status.')
+        for e in endpoints:
+            for status, count in sorted(snapshot[e]['statuses'].items()):
+                lines.append('%s_responses_total%s %d' % (
+                    prefix, label(e, status=status), count))
+
+        family('errors_total', 'counter', 'Failed requests per error type.')
+        for e in endpoints:
+            for error, count in sorted(snapshot[e]['errors'].items()):
+                lines.append('%s_errors_total%s %d' % (
+                    prefix, label(e, error=error), count))
+
+        return '\n'.join(lines) + '\n'
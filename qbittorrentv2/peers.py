@@ -0,0 +1,172 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class PeerTable(object):
+    """
+    Swarm-wide view of connected peers, built from
+    ``sync/torrentPeers`` deltas.
+
+    Each torrent keeps its own response ID so only changed peers are
+    transferred. Only actively transferring torrents are polled, using
+    at most ``max_workers`` concurrent requests::
+
+        peers = PeerTable(qb)
+        peers.update()
+        peers.torrents_with_peer('203.0.113.7')
+        peers.client_counts().most_common(10)
+
+    Peers are indexed by IP and by client name, so these queries do not
+    require any request.
+
+    :param client: ``Client`` instance to poll.
+    :param max_workers: Maximum number of concurrent requests.
+    :param sync_state: Optional ``SyncState`` used to find active torrents
+                       instead of requesting ``torrents(filter='active')``.
+    """
+    def __init__(self, client, max_workers=8, sync_state=None):
+        self.client = client
+        self.max_workers = max_workers
+        self.sync_state = sync_state
+        self.peers = {}
+        self.rids = {}
+        self._by_ip = {}
+        self._by_client = {}
+
+    def __len__(self):
+        return sum(len(peers) for peers in self.peers.values())
+
+    def active_hashes(self):
+        """
+        Infohashes of the torrents currently transferring data.
+        """
+        if self.sync_state is not None:
+            return [h for h, t in self.sync_state.torrents.items()
+                    if t.get('dlspeed') or t.get('upspeed')]
+        return [t['hash'] for t in self.client.torrents(filter='active')]
+
+    def update(self, hashes=None):
+        """
+        Poll the peers of the active torrents and merge the deltas.
+
+        Torrents that are no longer polled are dropped from the table,
+        they are fetched in full again once they become active.
+
+        :param hashes: Infohashes to poll, defaults to the active torrents.
+
+        :return: dict() of infohash to the exception raised while polling it.
+        """
+        if hashes is None:
+            hashes = self.active_hashes()
+        hashes = set(h.lower() for h in hashes)
+
+        for infohash in list(self.peers):
+            if infohash not in hashes:
+                self.forget(infohash)
+
+        errors = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = dict(
+                (executor.submit(self.client.get_sync_torrentPeers,
+                                 infohash, self.rids.get(infohash, 0)),
+                 infohash)
+                for infohash in hashes)
+            for future in as_completed(futures):
+                infohash = futures[future]
+                try:
+                    delta = future.result()
+                except Exception as e:
+                    errors[infohash] = e
+                    continue
+                self.apply(infohash, delta)
+        return errors
+
+    def apply(self, infohash, delta):
+        """
+        Merge a raw ``sync/torrentPeers`` response for one torrent.
+
+        :param infohash: INFO HASH of the torrent.
+        :param delta: Decoded ``sync/torrentPeers`` response.
+        """
+        if delta.get('full_update'):
+            self.forget(infohash)
+        peers = self.peers.setdefault(infohash, {})
+
+        for key, fields in delta.get('peers', {}).items():
+            peer = peers.get(key)
+            if peer is None:
+                peer = peers[key] = dict(fields)
+            else:
+                self._unindex(infohash, key, peer)
+                peer.update(fields)
+            self._index(infohash, key, peer)
+        for key in delta.get('peers_removed', ()):
+            peer = peers.pop(key, None)
+            if peer is not None:
+                self._unindex(infohash, key, peer)
+
+        self.rids[infohash] = delta.get('rid', 0)
+
+    def forget(self, infohash):
+        """
+        Drop all peers of a torrent.
+
+        :param infohash: INFO HASH of the torrent.
+        """
+        for key, peer in self.peers.pop(infohash, {}).items():
+            self._unindex(infohash, key, peer)
+        self.rids.pop(infohash, None)
+
+    def _index(self, infohash, key, peer):
+        entry = (infohash, key)
+        self._by_ip.setdefault(peer.get('ip'), set()).add(entry)
+        self._by_client.setdefault(peer.get('client'), set()).add(entry)
+
+    def _unindex(self, infohash, key, peer):
+        entry = (infohash, key)
+        for index, value in ((self._by_ip, peer.get('ip')),
+                             (self._by_client, peer.get('client'))):
+            entries = index.get(value)
+            if entries is not None:
+                entries.discard(entry)
+                if not entries:
+                    del index[value]
+
+    def torrents_with_peer(self, ip):
+        """
+        Infohashes of the torrents connected to a peer IP.
+
+        :param ip: IP address of the peer.
+        """
+        return set(h for h, _ in self._by_ip.get(ip, ()))
+
+    def peers_by_ip(self, ip):
+        """
+        List of ``(infohash, peer)`` for every connection to a peer IP.
+
+        :param ip: IP address of the peer.
+        """
+        return [(h, self.peers[h][k]) for h, k in self._by_ip.get(ip, ())]
+
+    def peers_by_client(self, client):
+        """
+        List of ``(infohash, peer)`` for every peer using a client.
+
+        :param client: Client name as reported by qBittorrent.
+        """
+        return [(h, self.peers[h][k])
+                for h, k in self._by_client.get(client, ())]
+
+    def client_counts(self):
+        """
+        Counter() of connected peers per client name.
+        """
+        return Counter(dict((c, len(e)) for c, e in self._by_client.items()))
+
+    def country_counts(self):
+        """
+        Counter() of connected peers per country.
+        """
+        return Counter(peer.get('country')
+                       for peers in self.peers.values()
+                       for peer in peers.values())
@@ -0,0 +1,315 @@
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+#: Piece states of ``torrents/pieceStates``.
+NOT_DOWNLOADED = 0
+DOWNLOADING = 1
+DOWNLOADED = 2
+
+_MASK = 0x03
+_ALL_DOWNLOADED = 0xaa  # four pieces in state 2
+
+
+def _count_table(state):
+    """
+    Translation table mapping a packed byte to the number of its four
+    pieces in ``state``.
+    """
+    return bytes(sum(1 for shift in (0, 2, 4, 6)
+                     if (byte >> shift) & _MASK == state)
+                 for byte in range(256))
+
+
+_COUNTS = dict((state, _count_table(state))
+               for state in (NOT_DOWNLOADED, DOWNLOADING, DOWNLOADED))
+
+
+def pack(states):
+    """
+    Pack piece states at two bits per piece, four pieces per byte,
+    the first piece in the low bits.
+
+    The states are converted to one byte each and interleaved as large
+    integers, so no Python loop runs per piece.
+
+    :param states: Iterable of ints in 0..3, e.g. the response of
+                   ``get_torrent_pieces_state``.
+
+    :return: bytes of ``ceil(len(states) / 4)`` bytes.
+    """
+    raw = bytes(states)
+    if raw and max(raw) > _MASK:
+        raise ValueError('Piece states must be in 0..3.')
+    raw += b'\x00' * (-len(raw) % 4)
+    size = len(raw) // 4
+    packed = 0
+    for shift in range(4):
+        packed |= int.from_bytes(raw[shift::4], 'little') << (2 * shift)
+    return packed.to_bytes(size, 'little')
+
+
+def unpack(data, length):
+    """
+    Inverse of :func:`pack`.
+
+    :param data: Packed bytes-like object.
+    :param length: Number of pieces.
+
+    :return: bytearray with one state per byte.
+    """
+    size = len(data)
+    value = int.from_bytes(data, 'little')
+    mask = int.from_bytes(b'\x03' * size, 'little')
+    out = bytearray(size * 4)
+    for shift in range(4):
+        out[shift::4] = ((value >> (2 * shift)) & mask).to_bytes(size, 'little')
+    del out[length:]
+    return out
+
+
+class PieceStates(object):
+    """
+    Piece states of a torrent packed at two bits per piece.
+
+    A torrent with a million pieces takes 250 KB instead of a list of a
+    million ints. Counts and range queries work on whole bytes through
+    lookup tables, and are vectorized with NumPy when it is installed::
+
+        pieces = qb.get_torrent_pieces_state(infohash, packed=True,
+                                             piece_size=props['piece_size'])
+        pieces.downloaded, pieces.downloading, pieces.progress
+        pieces.has_range(offset, length)
+        pieces.file_progress(qb.get_torrent_files(infohash))
+
+    :param data: Packed states as returned by :func:`pack`, a bytearray
+                 allows updating pieces in place.
+    :param length: Number of pieces.
+    :param piece_size: Bytes per piece, needed by byte range queries.
+    """
+    __slots__ = ('data', 'length', 'piece_size')
+
+    def __init__(self, data, length, piece_size=None):
+        if len(data) != (length + 3) // 4:
+            raise ValueError('%d bytes do not hold %d pieces.'
+                             % (len(data), length))
+        self.data = data
+        self.length = length
+        self.piece_size = piece_size
+
+    @classmethod
+    def from_states(cls, states, piece_size=None, mutable=False):
+        """
+        Pack the response of ``get_torrent_pieces_state``.
+
+        :param states: list() of piece states.
+        :param piece_size: Bytes per piece.
+        :param mutable: Store the states in a bytearray.
+        """
+        data = pack(states)
+        if mutable:
+            data = bytearray(data)
+        return cls(data, len(states), piece_size)
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return '<PieceStates %d/%d downloaded>' % (self.downloaded,
+                                                   self.length)
+
+    def __eq__(self, other):
+        return (isinstance(other, PieceStates) and
+                self.length == other.length and
+                bytes(self.data) == bytes(other.data))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('piece index out of range')
+        return (self.data[index >> 2] >> ((index & 3) * 2)) & _MASK
+
+    def __setitem__(self, index, state):
+        if not isinstance(self.data, bytearray):
+            raise TypeError('PieceStates is read-only, use mutable=True.')
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('piece index out of range')
+        if not 0 <= state <= _MASK:
+            raise ValueError('Piece states must be in 0..3.')
+        shift = (index & 3) * 2
+        byte = self.data[index >> 2] & ~(_MASK << shift)
+        self.data[index >> 2] = byte | (state << shift)
+
+    def tolist(self):
+        """
+        Unpacked states, as returned by ``get_torrent_pieces_state``.
+        """
+        return list(unpack(self.data, self.length))
+
+    def count(self, state, first=0, last=None):
+        """
+        Number of pieces in ``state`` among pieces ``first`` to ``last``,
+        ``last`` excluded.
+
+        :param state: One of ``NOT_DOWNLOADED``, ``DOWNLOADING``
+                      or ``DOWNLOADED``.
+        :param first: Index of the first piece.
+        :param last: Index following the last piece, defaults to the
+                     number of pieces.
+        """
+        if last is None or last > self.length:
+            last = self.length
+        first = max(first, 0)
+        if first >= last:
+            return 0
+        # partial bytes at both ends are counted piece by piece
+        count = 0
+        start, end = (first + 3) >> 2, last >> 2
+        if start > end:
+            return sum(1 for i in range(first, last) if self[i] == state)
+        for i in range(first, start << 2):
+            count += self[i] == state
+        for i in range(end << 2, last):
+            count += self[i] == state
+        if start < end:
+            count += self._count_bytes(state, start, end)
+        return count
+
+    def _count_bytes(self, state, start, end):
+        table = _COUNTS[state]
+        if numpy is not None:
+            chunk = numpy.frombuffer(self.data, dtype='uint8',
+                                     count=end - start, offset=start)
+            return int(numpy.frombuffer(table, dtype='uint8')[chunk].sum(
+                dtype='int64'))
+        return sum(bytes(self.data[start:end]).translate(table))
+
+    @property
+    def downloaded(self):
+        """
+        Number of downloaded pieces.
+        """
+        return self.count(DOWNLOADED)
+
+    @property
+    def downloading(self):
+        """
+        Number of pieces being downloaded.
+        """
+        return self.count(DOWNLOADING)
+
+    @property
+    def missing(self):
+        """
+        Number of pieces neither downloaded nor being downloaded.
+        """
+        return self.count(NOT_DOWNLOADED)
+
+    @property
+    def progress(self):
+        """
+        Fraction of downloaded pieces.
+        """
+        if not self.length:
+            return 0.0
+        return self.downloaded / float(self.length)
+
+    def is_complete(self, first=0, last=None):
+        """
+        Whether every piece from ``first`` to ``last``, ``last``
+        excluded, is downloaded.
+        """
+        if last is None or last > self.length:
+            last = self.length
+        first = max(first, 0)
+        start, end = (first + 3) >> 2, last >> 2
+        if start < end:
+            # whole bytes first, they fail fast on any missing piece
+            chunk = bytes(self.data[start:end])
+            if chunk.count(_ALL_DOWNLOADED) != len(chunk):
+                return False
+            return (all(self[i] == DOWNLOADED for i in range(first, start << 2))
+                    and all(self[i] == DOWNLOADED
+                            for i in range(end << 2, last)))
+        return all(self[i] == DOWNLOADED for i in range(first, last))
+
+    def piece_span(self, offset, length):
+        """
+        Pieces holding a byte range of the torrent data.
+
+        :param offset: Offset of the first byte.
+        :param length: Number of bytes.
+
+        :return: Tuple of (first, last) piece index, ``last`` excluded.
+        """
+        if not self.piece_size:
+            raise ValueError('piece_size is needed for byte ranges.')
+        if length <= 0:
+            return offset // self.piece_size, offset // self.piece_size
+        return (offset // self.piece_size,
+                (offset + length - 1) // self.piece_size + 1)
+
+    def has_range(self, offset, length):
+        """
+        Whether a byte range of the torrent data is downloaded.
+
+        :param offset: Offset of the first byte.
+        :param length: Number of bytes.
+        """
+        first, last = self.piece_span(offset, length)
+        if last > self.length:
+            return False
+        return self.is_complete(first, last)
+
+    def file_progress(self, files):
+        """
+        Fraction of downloaded pieces of each file.
+
+        Pieces shared with neighbouring files count for each of them.
+
+        :param files: Response of ``get_torrent_files``, whose entries
+                      have a ``piece_range`` of the first and last piece.
+
+        :return: dict() of file name to progress.
+        """
+        progress = {}
+        for entry in files:
+            first, last = entry['piece_range']
+            total = last - first + 1
+            if total <= 0:
+                progress[entry['name']] = 1.0
+                continue
+            done = self.count(DOWNLOADED, first, last + 1)
+            progress[entry['name']] = done / float(total)
+        return progress
+
+    def complete_files(self, files):
+        """
+        Names of the files whose pieces are all downloaded.
+
+        :param files: Response of ``get_torrent_files``.
+        """
+        return [entry['name'] for entry in files
+                if self.is_complete(entry['piece_range'][0],
+                                    entry['piece_range'][1] + 1)]
+
+    def heatmap(self, buckets):
+        """
+        Fraction of downloaded pieces in ``buckets`` equal spans of the
+        torrent, for piece maps.
+
+        :return: list() of floats.
+        """
+        if not self.length or buckets <= 0:
+            return []
+        buckets = min(buckets, self.length)
+        bounds = [self.length * i // buckets for i in range(buckets + 1)]
+        return [self.count(DOWNLOADED, bounds[i], bounds[i + 1]) /
+                float(bounds[i + 1] - bounds[i]) for i in range(buckets)]
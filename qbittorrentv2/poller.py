@@ -0,0 +1,384 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+
+from qbittorrentv2.links import METADATA_STATES
+from qbittorrentv2.sync import SyncState
+
+
+class WaitTimeout(TimeoutError):
+    """
+    Not every torrent met the condition before the timeout.
+
+    :ivar satisfied: dict() of infohash to torrent for those which did.
+    :ivar pending: set() of infohashes which did not.
+    """
+    def __init__(self, satisfied, pending):
+        super(WaitTimeout, self).__init__(satisfied, pending)
+        self.satisfied = satisfied
+        self.pending = pending
+
+    def __str__(self):
+        return '%d of %d torrents did not meet the condition in time.' % (
+            len(self.pending), len(self.pending) + len(self.satisfied))
+
+
+def has_metadata(torrent):
+    """
+    The torrent is known and its metadata was fetched.
+    """
+    return torrent is not None and torrent.get('state') not in METADATA_STATES
+
+
+def is_completed(torrent):
+    """
+    All wanted pieces of the torrent are downloaded.
+    """
+    return torrent is not None and torrent.get('progress', 0) >= 1
+
+
+def is_paused(torrent):
+    """
+    The torrent is paused (stopped in qBittorrent 5).
+    """
+    return torrent is not None and torrent.get('state', '').startswith(
+        ('paused', 'stopped'))
+
+
+def is_removed(torrent):
+    """
+    The torrent is not, or no longer, in the daemon.
+    """
+    return torrent is None
+
+
+def in_state(*states):
+    """
+    Predicate matching torrents in one of the given states.
+    """
+    states = frozenset(states)
+    return lambda torrent: (torrent is not None and
+                            torrent.get('state') in states)
+
+
+def moved_to(save_path):
+    """
+    Predicate matching torrents saved in ``save_path`` once their
+    files are no longer being moved.
+    """
+    save_path = save_path.rstrip('/\\')
+    return lambda torrent: (torrent is not None and
+                            torrent.get('state') != 'moving' and
+                            torrent.get('save_path', '').rstrip('/\\') ==
+                            save_path)
+
+
+class _Waiter(object):
+    __slots__ = ('hashes', 'pending', 'predicate', 'satisfied', 'error',
+                 '_event', '_future', '_loop')
+
+    def __init__(self, hashes, predicate, loop=None):
+        self.hashes = hashes
+        self.pending = set(hashes)
+        self.predicate = predicate
+        self.satisfied = {}
+        self.error = None
+        if loop is None:
+            self._event = threading.Event()
+            self._future = None
+        else:
+            self._event = None
+            self._future = loop.create_future()
+        self._loop = loop
+
+    def check(self, infohash, torrent):
+        if infohash not in self.pending:
+            return
+        try:
+            matched = self.predicate(torrent)
+        except Exception as e:
+            self.fail(e)
+            return
+        if matched:
+            self.pending.discard(infohash)
+            self.satisfied[infohash] = torrent
+            if not self.pending:
+                self._done()
+
+    def fail(self, error):
+        if self.error is None:
+            self.error = error
+        self._done()
+
+    def _done(self):
+        if self._event is not None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+
+class SyncPoller(object):
+    """
+    Single ``sync/maindata`` poller shared by everything watching the
+    torrents of a client.
+
+    While something is registered, it polls the deltas every
+    ``interval`` seconds, from a background thread with ``Client`` or
+    an asyncio task with ``AsyncClient``, and only evaluates the
+    waiters of the torrents a delta touched. The cost is one request
+    per tick however many torrents are watched::
+
+        qb.wait_for(hashes, has_metadata, timeout=300)
+        qb.poller.add_listener(lambda changes, state: ...)
+
+    :param client: ``Client`` or ``AsyncClient`` to poll.
+    :param interval: Seconds between polls.
+    :param sync_state: ``SyncState`` to keep current, a new one by default.
+    :param max_errors: Consecutive failed polls after which the waiters
+                       fail with the last error. Earlier failures are
+                       retried on the next tick.
+
+    :ivar state: The ``SyncState`` kept current by the poller.
+    :ivar listener_errors: Last exceptions raised by listeners, as
+                           ``(listener, error)`` tuples.
+    """
+    def __init__(self, client, interval=1.0, sync_state=None, max_errors=5):
+        self.client = client
+        self.interval = interval
+        self.max_errors = max_errors
+        self.state = (sync_state if sync_state is not None
+                      else SyncState(client))
+        self._errors = 0
+        self._waiters = {}
+        self._fresh = []
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._task = None
+        self.listener_errors = deque(maxlen=100)
+
+    def __len__(self):
+        return len(set(itertools.chain.from_iterable(
+            self._waiters.values())))
+
+    @property
+    def busy(self):
+        """
+        Whether any waiter or listener is registered.
+        """
+        return bool(self._waiters or self._listeners)
+
+    def add_listener(self, listener):
+        """
+        Call ``listener(changes, state)`` after every poll, with the
+        ``SyncChanges`` of the poll and the ``SyncState``.
+
+        Listeners keep a running poller busy until they are removed,
+        see :meth:`start` and :meth:`start_async`.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Stop calling a listener.
+        """
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def _register(self, waiter):
+        with self._lock:
+            for infohash in waiter.hashes:
+                self._waiters.setdefault(infohash, set()).add(waiter)
+            # the state may be stale, evaluate with the next delta
+            self._fresh.append(waiter)
+
+    def _unregister(self, waiter):
+        with self._lock:
+            if waiter in self._fresh:
+                self._fresh.remove(waiter)
+            for infohash in waiter.hashes:
+                waiters = self._waiters.get(infohash)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[infohash]
+
+    def dispatch(self, changes):
+        """
+        Evaluate the waiters of the torrents touched by a delta and call
+        the listeners.
+
+        :param changes: ``SyncChanges`` merged into :attr:`state`.
+        """
+        torrents = self.state.torrents
+        with self._lock:
+            if changes.full_update:
+                touched = list(self._waiters)
+            else:
+                touched = [h for h in itertools.chain(
+                    changes.added, changes.updated, changes.removed)
+                    if h in self._waiters]
+            for infohash in touched:
+                torrent = torrents.get(infohash)
+                for waiter in self._waiters[infohash]:
+                    waiter.check(infohash, torrent)
+            for waiter in self._fresh:
+                for infohash in waiter.hashes:
+                    waiter.check(infohash, torrents.get(infohash))
+            self._fresh = []
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(changes, self.state)
+            except Exception as e:
+                # a failing listener must not stop the poller
+                self.listener_errors.append((listener, e))
+
+    def _failed_poll(self, error):
+        # transient errors are retried, waiters only fail when the
+        # daemon keeps failing
+        self._errors += 1
+        if self._errors >= self.max_errors:
+            self._errors = 0
+            self._fail(error)
+
+    def _fail(self, error):
+        with self._lock:
+            for waiters in self._waiters.values():
+                for waiter in waiters:
+                    waiter.fail(error)
+
+    def poll(self):
+        """
+        Poll one delta and dispatch it.
+
+        :return: ``SyncChanges`` of the delta.
+        """
+        changes = self.state.update()
+        self.dispatch(changes)
+        return changes
+
+    async def async_poll(self):
+        """
+        Same as :meth:`poll`, for use with ``AsyncClient``.
+        """
+        changes = await self.state.async_update()
+        self.dispatch(changes)
+        return changes
+
+    def start(self):
+        """
+        Poll from a background thread until nothing is registered.
+        Waiters of :meth:`wait_for` start it on their own.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name='qbittorrent-sync-poller')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def start_async(self):
+        """
+        Poll from a task of the running event loop until nothing is
+        registered, for ``AsyncClient``. Waiters of
+        :meth:`async_wait_for` start it on their own.
+        """
+        with self._lock:
+            if self._task is None:
+                self._task = asyncio.get_running_loop().create_task(
+                    self._run_async())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self.busy:
+                    self._thread = None
+                    return
+            try:
+                changes = self.state.update()
+            except Exception as e:
+                self._failed_poll(e)
+            else:
+                self._errors = 0
+                self.dispatch(changes)
+            time.sleep(self.interval)
+
+    async def _run_async(self):
+        try:
+            while self.busy:
+                try:
+                    changes = await self.state.async_update()
+                except Exception as e:
+                    self._failed_poll(e)
+                else:
+                    self._errors = 0
+                    self.dispatch(changes)
+                if not self.busy:
+                    break
+                await asyncio.sleep(self.interval)
+        finally:
+            self._task = None
+
+    def wait_for(self, hashes, predicate, timeout=None):
+        """
+        Block until every torrent satisfies ``predicate``.
+
+        :param hashes: Single or list() of infohashes.
+        :param predicate: Callable taking the torrent dict of the
+                          ``SyncState``, or None if the torrent is not
+                          present, e.g. :func:`has_metadata`.
+        :param timeout: Maximum number of seconds to wait.
+
+        :return: dict() of infohash to torrent.
+        :raises WaitTimeout: if the timeout expires first.
+        :raises: the error of the last poll after ``max_errors`` consecutive
+                 failures, or of a failing predicate.
+        """
+        waiter = _Waiter(_normalize(hashes), predicate)
+        self._register(waiter)
+        try:
+            if waiter.pending and waiter.error is None:
+                self.start()
+                if not waiter._event.wait(timeout):
+                    raise WaitTimeout(dict(waiter.satisfied),
+                                      set(waiter.pending))
+            if waiter.error is not None:
+                raise waiter.error
+            return waiter.satisfied
+        finally:
+            self._unregister(waiter)
+
+    async def async_wait_for(self, hashes, predicate, timeout=None):
+        """
+        Same as :meth:`wait_for`, for use with ``AsyncClient``.
+        """
+        waiter = _Waiter(_normalize(hashes), predicate,
+                         asyncio.get_running_loop())
+        self._register(waiter)
+        try:
+            if waiter.pending and waiter.error is None:
+                self.start_async()
+                try:
+                    await asyncio.wait_for(waiter._future, timeout)
+                except asyncio.TimeoutError:
+                    raise WaitTimeout(dict(waiter.satisfied),
+                                      set(waiter.pending))
+            if waiter.error is not None:
+                raise waiter.error
+            return waiter.satisfied
+        finally:
+            self._unregister(waiter)
+
+
+def _normalize(hashes):
+    if isinstance(hashes, str):
+        hashes = [hashes]
+    return tuple(set(h.lower() for h in hashes))
@@ -0,0 +1,421 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from qbittorrentv2.async_client import AsyncClient
+from qbittorrentv2.client import Client
+from qbittorrentv2.records import Torrent
+from qbittorrentv2.sync import SyncState
+
+#: Client methods whose first argument is a single infohash or a list.
+HASH_LIST_METHODS = frozenset((
+    'pause', 'resume', 'delete', 'delete_permanently', 'recheck',
+    'reannounce', 'increase_priority', 'decrease_priority',
+    'set_max_priority', 'set_min_priority', 'get_torrent_download_limit',
+    'set_torrent_download_limit', 'set_torrent_share_limit',
+    'get_torrent_upload_limit', 'set_torrent_upload_limit', 'set_location',
+    'set_category', 'set_automatic_torrent', 'toggle_sequential_download',
+    'toggle_first_last_piece_priority', 'force_start', 'set_super_seeding',
+))
+
+#: Client methods whose first argument is exactly one infohash.
+HASH_METHODS = frozenset((
+    'get_torrent', 'get_torrent_trackers', 'get_torrent_webseeds',
+    'get_torrent_files', 'get_torrent_pieces_state',
+    'get_torrent_pieces_hashes', 'add_trackers', 'set_file_priority',
+    'set_torrent_name', 'get_sync_torrentPeers',
+))
+
+
+#: Torrent states counted as load by :meth:`ClientPool.least_loaded`.
+DOWNLOADING_STATES = frozenset((
+    'downloading', 'metaDL', 'queuedDL', 'stalledDL', 'forcedDL',
+))
+
+
+class PoolResult(dict):
+    """
+    Results of a call on every instance of a :class:`ClientPool`,
+    keyed by instance name.
+
+    :ivar errors: dict() of instance name to the exception it raised.
+                  Routed calls report the infohashes no instance holds
+                  as an :class:`UnknownTorrent` under the ``None`` key.
+    """
+    def __init__(self, *args, **kwargs):
+        super(PoolResult, self).__init__(*args, **kwargs)
+        self.errors = {}
+
+
+class PoolListResult(list):
+    """
+    Merged list results of a :class:`ClientPool` call.
+
+    :ivar errors: dict() of instance name to the exception it raised.
+    """
+    errors = None
+
+
+class UnknownTorrent(KeyError):
+    """
+    No instance of the pool holds the torrent, or the torrents listed
+    in ``args[0]``.
+    """
+
+
+def _check_client(client):
+    """
+    Refuse clients whose methods return awaitables.
+    """
+    if isinstance(client, AsyncClient):
+        raise TypeError('ClientPool needs synchronous Client instances, '
+                        'not AsyncClient.')
+    return client
+
+
+class ClientPool(object):
+    """
+    Group of ``Client`` instances, one per qBittorrent daemon.
+
+    Read calls run on all instances concurrently and their results are
+    tagged by instance name. Hash-addressed calls are routed to the
+    instances owning the torrents, using an infohash to instance index
+    kept current by :meth:`torrents` and :meth:`sync`. New torrents
+    are placed on the least loaded instance::
+
+        pool = ClientPool({'nas': Client(url1), 'seedbox': Client(url2)})
+        pool.torrents(filter='downloading')   # torrents carry 'instance'
+        pool.pause(hashes)                    # routed to owning instances
+        pool.download_from_link(magnet)       # least loaded instance
+
+    Any other ``Client`` method or property is available and runs on
+    all instances, returning a :class:`PoolResult`.
+
+    :param clients: dict() of name to ``Client``, or a list of clients
+                    named after their URL. ``AsyncClient`` is not
+                    supported.
+    :param max_workers: Maximum number of concurrent requests,
+                        defaults to one per instance.
+    :param min_free_space: Instances with less free disk space, in
+                           bytes, are not used for new torrents.
+    :param state_ttl: Seconds a synced instance state is reused to
+                      place new torrents before syncing it again.
+    """
+    def __init__(self, clients, max_workers=None, min_free_space=0,
+                 state_ttl=2):
+        if not isinstance(clients, dict):
+            clients = dict((client.url, client) for client in clients)
+        self.clients = dict((name, _check_client(client))
+                            for name, client in clients.items())
+        self.max_workers = max_workers
+        self.min_free_space = min_free_space
+        self.state_ttl = state_ttl
+        self.states = dict((name, SyncState(client))
+                           for name, client in self.clients.items())
+        self._owners = {}
+        # instance name -> time of its last sync, infohashes of its
+        # downloading torrents and torrents placed on it since
+        self._synced = {}
+        self._downloading = dict((name, set()) for name in self.clients)
+        self._placed = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not hasattr(Client, name):
+            raise AttributeError(name)
+        if name in HASH_LIST_METHODS or name in HASH_METHODS:
+            return lambda infohash, *args, **kwargs: self.route(
+                name, infohash, *args, **kwargs)
+        if isinstance(getattr(Client, name, None), property):
+            return self.call(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def add(self, name, client):
+        """
+        Add an instance to the pool.
+        """
+        self.clients[name] = _check_client(client)
+        self.states[name] = SyncState(client)
+        self._downloading[name] = set()
+
+    def remove(self, name):
+        """
+        Remove an instance and forget the torrents it owns.
+        """
+        del self.clients[name]
+        del self.states[name]
+        with self._lock:
+            self._owners = dict((h, n) for h, n in self._owners.items()
+                                if n != name)
+            self._synced.pop(name, None)
+            self._downloading.pop(name, None)
+            self._placed.pop(name, None)
+
+    def _executor(self, count):
+        return ThreadPoolExecutor(max_workers=self.max_workers or
+                                  max(1, count))
+
+    def map(self, func, names=None):
+        """
+        Run ``func(client)`` on instances concurrently.
+
+        :param func: Callable taking a client.
+        :param names: Instance names, defaults to all.
+
+        :return: :class:`PoolResult`.
+        """
+        return self._map(lambda name: func(self.clients[name]), names)
+
+    def _map(self, func, names=None):
+        """
+        Run ``func(name)`` for instances concurrently.
+        """
+        if names is None:
+            names = list(self.clients)
+        result = PoolResult()
+        with self._executor(len(names)) as executor:
+            futures = dict((name, executor.submit(func, name))
+                           for name in names)
+        for name, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                result.errors[name] = error
+            else:
+                result[name] = future.result()
+        return result
+
+    def call(self, method, *args, **kwargs):
+        """
+        Call a ``Client`` method or property on every instance.
+
+        :param method: Name of the method or property.
+
+        :return: :class:`PoolResult`.
+        """
+        def run(client):
+            value = getattr(client, method)
+            return value(*args, **kwargs) if callable(value) else value
+        return self.map(run)
+
+    @property
+    def global_transfer_info(self):
+        """
+        Global transfer info of every instance.
+        """
+        return self.call('global_transfer_info')
+
+    def torrents(self, typed=False, **filters):
+        """
+        Torrents of all instances matching the filters, each with an
+        ``instance`` key naming its instance.
+
+        :param typed: Return :class:`~qbittorrentv2.records.Torrent`
+                      records instead of dicts.
+        :param filters: Filters of ``Client.torrents``.
+
+        :return: list() of torrents, ``.errors`` holds failed instances.
+        """
+        results = self.call('torrents', **filters)
+        merged = PoolListResult()
+        merged.errors = results.errors
+        with self._lock:
+            for name, torrents in results.items():
+                # the responses may be shared with other callers through
+                # coalescing or the cache, tag copies
+                torrents = [dict(t, instance=name) for t in torrents]
+                for torrent in torrents:
+                    self._owners[torrent['hash'].lower()] = name
+                if typed:
+                    torrents = [Torrent(t) for t in torrents]
+                merged.extend(torrents)
+        return merged
+
+    def get_sync_maindata(self):
+        """
+        Fetch the ``sync/maindata`` delta of every instance, each from
+        its own last response ID, and merge it into ``states``.
+
+        :return: :class:`PoolResult` of instance name to raw delta.
+        """
+        return self._sync()[0]
+
+    def sync(self):
+        """
+        Update the ``SyncState`` of every instance.
+
+        :return: :class:`PoolResult` of instance name to ``SyncChanges``.
+        """
+        return self._sync()[1]
+
+    def _sync(self, names=None):
+        deltas = self._map(lambda name: self.clients[name].get_sync_maindata(
+            self.states[name].rid), names)
+        changes = PoolResult()
+        changes.errors = deltas.errors
+        for name, delta in deltas.items():
+            changes[name] = self._apply(name, delta)
+        return deltas, changes
+
+    def _apply(self, name, delta):
+        """
+        Merge a delta into the state of an instance and the owner index.
+        """
+        state = self.states[name]
+        changes = state.apply(delta)
+        with self._lock:
+            for infohash in changes.removed:
+                if self._owners.get(infohash.lower()) == name:
+                    del self._owners[infohash.lower()]
+            added = state.torrents if changes.full_update else changes.added
+            for infohash in added:
+                self._owners[infohash.lower()] = name
+
+            # only the torrents of the delta can have changed state
+            if changes.full_update:
+                downloading = self._downloading[name] = set()
+                touched = state.torrents
+            else:
+                downloading = self._downloading[name]
+                touched = changes.added.union(changes.updated)
+            downloading.difference_update(changes.removed)
+            for infohash in touched:
+                if state.torrents[infohash].get('state') in \
+                        DOWNLOADING_STATES:
+                    downloading.add(infohash)
+                else:
+                    downloading.discard(infohash)
+            # torrents placed on the instance are part of its state now
+            self._synced[name] = time.time()
+            self._placed.pop(name, None)
+        return changes
+
+    def owner(self, infohash):
+        """
+        Name of the instance holding a torrent.
+
+        The index is refreshed with :meth:`sync` once if the torrent
+        is unknown.
+
+        :raises UnknownTorrent: if no instance holds the torrent.
+        """
+        infohash = infohash.lower()
+        name = self._owners.get(infohash)
+        if name is None:
+            self.sync()
+            name = self._owners.get(infohash)
+        if name is None:
+            raise UnknownTorrent(infohash)
+        return name
+
+    def route(self, method, infohash_list, *args, **kwargs):
+        """
+        Call a hash-addressed method on the instances owning the torrents.
+
+        Lists of infohashes are split per owning instance, with a
+        single :meth:`sync` if some are not indexed. As qBittorrent
+        ignores unknown infohashes, those held by no instance are
+        reported in ``errors[None]`` and the others are still sent.
+        ``'all'`` is sent to every instance.
+
+        :param method: Name of the ``Client`` method.
+        :param infohash_list: Single or list() of infohashes.
+
+        :return: Result of the call for a single infohash, else a
+                 :class:`PoolResult` keyed by instance name.
+        """
+        if infohash_list == 'all':
+            return self.call(method, infohash_list, *args, **kwargs)
+        if not isinstance(infohash_list, list):
+            client = self.clients[self.owner(infohash_list)]
+            return getattr(client, method)(infohash_list, *args, **kwargs)
+
+        misses = [h for h in infohash_list
+                  if h.lower() not in self._owners]
+        if misses:
+            self.sync()
+        groups = {}
+        unknown = []
+        for infohash in infohash_list:
+            name = self._owners.get(infohash.lower())
+            if name is None:
+                unknown.append(infohash)
+            else:
+                groups.setdefault(name, []).append(infohash)
+        result = self._map(
+            lambda name: getattr(self.clients[name], method)(
+                groups[name], *args, **kwargs),
+            names=list(groups))
+        if unknown:
+            result.errors[None] = UnknownTorrent(unknown)
+        return result
+
+    def least_loaded(self):
+        """
+        Name of the instance new torrents should go to.
+
+        Instance states older than ``state_ttl`` are refreshed with a
+        sync. Among the instances with at least ``min_free_space`` bytes
+        free, the one with the fewest queued or downloading torrents
+        wins, torrents placed on it since its last sync included. Ties
+        go to the lowest combined transfer rate, then to the most free
+        space.
+        """
+        now = time.time()
+        stale = [name for name in self.clients
+                 if name not in self._synced or
+                 now - self._synced[name] > self.state_ttl]
+        if stale:
+            self._sync(stale)
+        candidates = []
+        with self._lock:
+            for name in self.clients:
+                if name not in self._synced or \
+                        now - self._synced[name] > self.state_ttl:
+                    # its sync failed
+                    continue
+                server = self.states[name].server_state
+                free = server.get('free_space_on_disk', 0)
+                if free < self.min_free_space:
+                    continue
+                load = len(self._downloading[name]) + self._placed[name]
+                rate = (server.get('dl_info_speed', 0) +
+                        server.get('up_info_speed', 0))
+                candidates.append(((load, rate, -free), name))
+        if not candidates:
+            raise RuntimeError('No instance has enough free disk space.')
+        return min(candidates)[1]
+
+    def _place(self, name, count):
+        """
+        Count torrents added to an instance until its next sync.
+        """
+        with self._lock:
+            self._placed[name] += count
+
+    def download_from_link(self, link, **kwargs):
+        """
+        Add torrents from links on the least loaded instance.
+
+        :return: Tuple of the instance name and its response.
+        """
+        name = self.least_loaded()
+        response = self.clients[name].download_from_link(link, **kwargs)
+        self._place(name, len(link) if isinstance(link, list) else 1)
+        return name, response
+
+    def download_from_file(self, file_buffer, **kwargs):
+        """
+        Add torrents from files on the least loaded instance.
+
+        :return: Tuple of the instance name and its response.
+        """
+        name = self.least_loaded()
+        response = self.clients[name].download_from_file(file_buffer,
+                                                          **kwargs)
+        self._place(name, len(file_buffer)
+                    if isinstance(file_buffer, list) else 1)
+        return name, response
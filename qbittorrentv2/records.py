@@ -0,0 +1,135 @@
+from sys import intern as _intern
+
+#: Fields of ``torrents/info`` entries stored in slots.
+TORRENT_FIELDS = (
+    'added_on', 'amount_left', 'auto_tmm', 'availability', 'category',
+    'completed', 'completion_on', 'content_path', 'dl_limit', 'dlspeed',
+    'download_path', 'downloaded', 'downloaded_session', 'eta',
+    'f_l_piece_prio', 'force_start', 'hash', 'infohash_v1', 'infohash_v2',
+    'last_activity', 'magnet_uri', 'max_ratio', 'max_seeding_time', 'name',
+    'num_complete', 'num_incomplete', 'num_leechs', 'num_seeds', 'priority',
+    'progress', 'ratio', 'ratio_limit', 'save_path', 'seeding_time',
+    'seeding_time_limit', 'seen_complete', 'seq_dl', 'size', 'state',
+    'super_seeding', 'tags', 'time_active', 'total_size', 'tracker',
+    'trackers_count', 'up_limit', 'uploaded', 'uploaded_session', 'upspeed',
+)
+
+#: String fields with few distinct values, shared between records.
+INTERNED_FIELDS = frozenset((
+    'state', 'category', 'tags', 'tracker', 'save_path', 'download_path',
+))
+
+
+class Torrent(object):
+    """
+    Compact record of a torrent returned by ``torrents(typed=True)``.
+
+    Known fields are stored in ``__slots__`` and repeated string values
+    such as ``state``, ``category`` or ``tracker`` are interned, which
+    takes a fraction of the memory of the equivalent dict. Fields a
+    newer qBittorrent adds are kept in a small overflow dict.
+
+    Fields are read as attributes or items::
+
+        torrent.state
+        torrent['dlspeed']
+        torrent.to_dict()
+
+    Fields missing from the server response raise ``AttributeError``
+    (``KeyError`` for item access), as with the original dict.
+    """
+    __slots__ = TORRENT_FIELDS + ('_extra',)
+
+    def __init__(self, data):
+        setter = object.__setattr__
+        extra = None
+        for key, value in data.items():
+            if key in INTERNED_FIELDS and type(value) is str:
+                value = _intern(value)
+            if key in _SLOTS:
+                setter(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        setter(self, '_extra', extra)
+
+    def __getattr__(self, name):
+        # only called for unset slots and unknown fields
+        extra = object.__getattribute__(self, '_extra')
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
+    def _field(self, key):
+        """
+        Value of a field, methods and other attributes excluded.
+
+        :raises AttributeError: if the field is missing.
+        """
+        if key in _SLOTS:
+            return object.__getattribute__(self, key)
+        extra = object.__getattribute__(self, '_extra')
+        if extra is not None and key in extra:
+            return extra[key]
+        raise AttributeError(key)
+
+    def __getitem__(self, key):
+        try:
+            return self._field(key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self._field(key)
+        except AttributeError:
+            return False
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, Torrent):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<Torrent %s %r>' % (getattr(self, 'hash', '?'),
+                                    getattr(self, 'name', None))
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+    def get(self, key, default=None):
+        """
+        Get a field, or ``default`` if it is missing.
+        """
+        try:
+            return self._field(key)
+        except AttributeError:
+            return default
+
+    def to_dict(self):
+        """
+        Convert the record back to the dict returned by the API.
+        """
+        data = {}
+        for name in TORRENT_FIELDS:
+            try:
+                data[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+
+_SLOTS = frozenset(TORRENT_FIELDS)
@@ -0,0 +1,93 @@
+import threading
+
+
+class _Call(object):
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesce concurrent calls sharing a key into a single execution.
+
+    The first caller of :meth:`do` for a key runs the function. Callers
+    arriving with the same key while it runs wait for it and get the
+    same result, or the same exception. Once it finishes the key is
+    released, so later calls run the function again.
+
+    :meth:`forget` releases the keys early, for calls whose result is
+    already outdated.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    def do(self, key, func):
+        """
+        Run ``func()`` unless a call with the same key is in flight,
+        in which case wait for that call instead.
+
+        :param key: Hashable key identifying the call.
+        :param func: Callable without arguments.
+
+        :return: Result of ``func()``.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def forget(self):
+        """
+        Make later callers run the function again instead of waiting
+        for the calls in flight. Those calls still complete for their
+        current waiters.
+        """
+        with self._lock:
+            self._calls.clear()
+
+
+def request_key(endpoint, kwargs):
+    """
+    Key identifying a GET request for coalescing, None if the request
+    has arguments other than ``params`` and ``data``.
+
+    :param endpoint: Endpoint of the API.
+    :param kwargs: Keyword arguments of the request.
+    """
+    key = [endpoint]
+    for name, value in sorted(kwargs.items()):
+        if name not in ('params', 'data'):
+            return None
+        if isinstance(value, dict):
+            value = tuple(sorted((k, repr(v)) for k, v in value.items()))
+        else:
+            value = repr(value)
+        key.append((name, value))
+    return tuple(key)
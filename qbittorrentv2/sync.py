@@ -0,0 +1,181 @@
+class SyncChanges(object):
+    """
+    Summary of what a single ``sync/maindata`` response changed.
+
+    :ivar rid: Response ID the changes were received with.
+    :ivar full_update: True if the server sent a full snapshot.
+    :ivar added: set() of infohashes that appeared.
+    :ivar updated: dict() of infohash to the fields that changed.
+    :ivar removed: dict() of infohash to the last known torrent data.
+    """
+    __slots__ = ('rid', 'full_update', 'added', 'updated', 'removed')
+
+    def __init__(self, rid, full_update):
+        self.rid = rid
+        self.full_update = full_update
+        self.added = set()
+        self.updated = {}
+        self.removed = {}
+
+    def __bool__(self):
+        return bool(self.added or self.updated or self.removed)
+
+    def __repr__(self):
+        return '<SyncChanges rid=%s added=%d updated=%d removed=%d>' % (
+            self.rid, len(self.added), len(self.updated), len(self.removed))
+
+
+class SyncState(object):
+    """
+    In-memory model of the qBittorrent state kept current with
+    ``sync/maindata`` deltas.
+
+    Only the fields that changed since the last response ID are
+    transferred and merged, so the cost of a poll is proportional to
+    the amount of activity rather than to the size of the library::
+
+        state = SyncState(qb)
+        state.update()          # full snapshot
+        ...
+        changes = state.update()  # only what changed since
+        torrent = state[infohash]
+
+    Torrents are stored in a dict keyed by infohash, so lookups are O(1).
+    The model can also be fed manually through :meth:`apply`.
+
+    :param client: ``Client`` (or ``AsyncClient``) instance to poll.
+    """
+    def __init__(self, client=None):
+        self.client = client
+        self.rid = 0
+        self.torrents = {}
+        self.categories = {}
+        self.tags = set()
+        self.trackers = {}
+        self.server_state = {}
+
+    def __len__(self):
+        return len(self.torrents)
+
+    def __contains__(self, infohash):
+        return infohash.lower() in self.torrents
+
+    def __getitem__(self, infohash):
+        return self.torrents[infohash.lower()]
+
+    def __iter__(self):
+        return iter(self.torrents)
+
+    def get(self, infohash, default=None):
+        """
+        Get the data of a torrent by its infohash.
+
+        :param infohash: INFO HASH of the torrent.
+        :param default: Value returned if the torrent is unknown.
+        """
+        return self.torrents.get(infohash.lower(), default)
+
+    def reset(self):
+        """
+        Drop all state, the next update will fetch a full snapshot.
+        """
+        self.__init__(self.client)
+
+    def update(self):
+        """
+        Fetch and merge the changes since the last known response ID.
+
+        :return: :class:`SyncChanges` describing the merged delta.
+        """
+        return self.apply(self.client.get_sync_maindata(self.rid))
+
+    async def async_update(self):
+        """
+        Same as :meth:`update`, for use with ``AsyncClient``.
+        """
+        return self.apply(await self.client.get_sync_maindata(self.rid))
+
+    def apply(self, delta):
+        """
+        Merge a raw ``sync/maindata`` response into the model.
+
+        :param delta: Decoded ``sync/maindata`` response.
+
+        :return: :class:`SyncChanges` describing the merged delta.
+        """
+        full_update = bool(delta.get('full_update'))
+        changes = SyncChanges(delta.get('rid', self.rid), full_update)
+
+        if full_update:
+            self._apply_full(delta, changes)
+        else:
+            self._apply_partial(delta, changes)
+
+        if 'server_state' in delta:
+            if full_update:
+                self.server_state = dict(delta['server_state'])
+            else:
+                self.server_state.update(delta['server_state'])
+
+        self.rid = changes.rid
+        return changes
+
+    def _apply_full(self, delta, changes):
+        """
+        Replace the model with a full snapshot, diffing it against the
+        previous one.
+        """
+        old = self.torrents
+        new = delta.get('torrents', {})
+        for infohash, torrent in new.items():
+            previous = old.get(infohash)
+            if previous is None:
+                changes.added.add(infohash)
+                continue
+            fields = dict((k, v) for k, v in torrent.items()
+                          if previous.get(k) != v)
+            if fields:
+                changes.updated[infohash] = fields
+        for infohash in old:
+            if infohash not in new:
+                changes.removed[infohash] = old[infohash]
+
+        self.torrents = dict((h, dict(t)) for h, t in new.items())
+        for infohash, torrent in self.torrents.items():
+            torrent['hash'] = infohash
+        self.categories = dict(delta.get('categories', {}))
+        self.tags = set(delta.get('tags', ()))
+        self.trackers = dict(delta.get('trackers', {}))
+
+    def _apply_partial(self, delta, changes):
+        """
+        Merge a partial delta into the model.
+        """
+        torrents = self.torrents
+        for infohash, fields in delta.get('torrents', {}).items():
+            torrent = torrents.get(infohash)
+            if torrent is None:
+                torrent = torrents[infohash] = dict(fields)
+                torrent['hash'] = infohash
+                changes.added.add(infohash)
+            else:
+                torrent.update(fields)
+                changes.updated[infohash] = fields
+        for infohash in delta.get('torrents_removed', ()):
+            torrent = torrents.pop(infohash, None)
+            if torrent is not None:
+                changes.removed[infohash] = torrent
+                changes.added.discard(infohash)
+                changes.updated.pop(infohash, None)
+
+        for name, category in delta.get('categories', {}).items():
+            self.categories.setdefault(name, {}).update(category)
+        for name in delta.get('categories_removed', ()):
+            self.categories.pop(name, None)
+
+        self.tags.update(delta.get('tags', ()))
+        self.tags.difference_update(delta.get('tags_removed', ()))
+
+        self.trackers.update(delta.get('trackers', {}))
+        for url in delta.get('trackers_removed', ()):
+            self.trackers.pop(url, None)
@@ -0,0 +1,128 @@
+import random
+
+from requests.adapters import HTTPAdapter
+
+#: GET endpoints which change state, never retried.
+UNSAFE_GETS = frozenset((
+    'auth/logout', 'app/shutdown', 'transfer/toggleSpeedLimitsMode',
+))
+
+#: POST endpoints which only read data and can be retried safely.
+IDEMPOTENT_POSTS = frozenset((
+    'log/main', 'log/peers',
+    'torrents/properties', 'torrents/trackers', 'torrents/webseeds',
+    'torrents/files', 'torrents/pieceStates', 'torrents/pieceHashes',
+    'torrents/downloadLimit', 'torrents/uploadLimit',
+))
+
+
+class TransportConfig(object):
+    """
+    HTTP transport settings of a :class:`~qbittorrentv2.client.Client`.
+
+    Controls the connection pool shared by all requests of a client,
+    request timeouts, and retries of idempotent requests failing with a
+    connection error or one of ``retry_statuses``. Retries wait with
+    "full jitter" exponential backoff: a random delay between 0 and
+    ``backoff_factor * 2 ** attempt``, capped at ``backoff_max``::
+
+        transport = TransportConfig(pool_maxsize=32, timeout=10, retries=3)
+        qb = Client('http://127.0.0.1:8080/', transport=transport)
+
+    :param pool_connections: Number of hosts with a cached pool.
+    :param pool_maxsize: Connections kept open per host, set it to the
+                         number of threads sharing the client.
+    :param pool_block: Wait for a free connection instead of opening
+                       a throwaway one when the pool is exhausted.
+    :param timeout: Default timeout of a request, in seconds.
+    :param timeouts: dict() of endpoint to timeout overriding ``timeout``.
+    :param retries: Retries of a failed idempotent request.
+    :param backoff_factor: Base delay of the backoff, in seconds.
+    :param backoff_max: Longest delay between retries, in seconds.
+    :param retry_statuses: HTTP statuses which are retried.
+    :param idempotent_posts: POST endpoints which may be retried.
+    """
+    def __init__(self, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, timeout=None, timeouts=None, retries=0,
+                 backoff_factor=0.5, backoff_max=30,
+                 retry_statuses=(500, 502, 503, 504),
+                 idempotent_posts=IDEMPOTENT_POSTS):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_posts = frozenset(idempotent_posts)
+
+    def mount(self, session):
+        """
+        Install a pooled adapter with these settings on a session.
+
+        :param session: ``requests.Session`` to configure.
+        """
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+    def timeout_for(self, endpoint):
+        """
+        Timeout of a request to an endpoint.
+        """
+        return self.timeouts.get(endpoint, self.timeout)
+
+    def is_idempotent(self, method, endpoint):
+        """
+        Whether a request can be sent again without side effects.
+        """
+        if method == 'get':
+            return endpoint not in UNSAFE_GETS
+        return endpoint in self.idempotent_posts
+
+    def backoff(self, attempt):
+        """
+        Delay before retry number ``attempt`` (starting at 0).
+        """
+        ceiling = min(self.backoff_max, self.backoff_factor * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+
+def pool_stats(session):
+    """
+    Usage of the connection pools of a session.
+
+    :param session: ``requests.Session`` to inspect.
+
+    :return: list() of dicts with ``host``, ``maxsize``, ``idle``
+             (open connections waiting in the pool), ``in_use``
+             (connections checked out of the pool), ``opened``
+             (connections opened so far) and ``requests`` (requests sent).
+    """
+    stats = []
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            queue = getattr(pool.pool, 'queue', ())
+            # the queue holds a connection or an empty slot per free place
+            free = len(queue)
+            stats.append({
+                'host': '%s://%s:%s' % (pool.scheme, pool.host, pool.port),
+                'maxsize': pool.pool.maxsize,
+                'idle': sum(1 for conn in queue if conn is not None),
+                'in_use': max(0, pool.pool.maxsize - free),
+                'opened': pool.num_connections,
+                'requests': pool.num_requests,
+            })
+    return stats
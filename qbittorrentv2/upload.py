@@ -0,0 +1,325 @@
+import io
+import mmap
+import os
+import uuid
+from collections import namedtuple
+
+from qbittorrentv2.bencode import BencodeError, TorrentInfo
+
+#: Bytes read from a file per chunk of a streamed upload.
+CHUNK_SIZE = 64 * 1024
+
+#: Default limits of one ``torrents/add`` request of a bulk upload.
+DEFAULT_BATCH_BYTES = 8 * 1024 * 1024
+DEFAULT_BATCH_FILES = 100
+
+UploadBatch = namedtuple('UploadBatch', 'index files hashes response error')
+
+
+class UploadRejected(Exception):
+    """
+    The daemon answered a ``torrents/add`` request with "Fails.".
+    """
+    def __str__(self):
+        return 'No torrent of the batch was added.'
+
+
+class TorrentSource(object):
+    """
+    A .torrent file to upload, read lazily when the request is sent.
+
+    :param source: Path, bytes or binary file object. File objects are
+                   read from their current position.
+    """
+    __slots__ = ('source', 'filename', 'size', 'infohash', '_offset')
+
+    def __init__(self, source):
+        self.source = source
+        self.infohash = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.filename = 'file.torrent'
+            self.size = len(source)
+            self._offset = 0
+        elif isinstance(source, (str, os.PathLike)):
+            self.filename = os.path.basename(os.fspath(source))
+            self.size = os.path.getsize(source)
+            self._offset = 0
+        else:
+            name = getattr(source, 'name', None)
+            self.filename = (os.path.basename(name)
+                             if isinstance(name, str) else 'file.torrent')
+            self._offset = source.tell()
+            self.size = source.seek(0, io.SEEK_END) - self._offset
+            source.seek(self._offset)
+
+    def __repr__(self):
+        return '<TorrentSource %s (%d bytes)>' % (self.filename, self.size)
+
+    def info(self):
+        """
+        Parse the torrent metadata and remember its infohash.
+
+        :return: :class:`~qbittorrentv2.bencode.TorrentInfo`.
+        :raises BencodeError: if the file is not a valid torrent.
+        """
+        source = self.source
+        if isinstance(source, (str, os.PathLike)):
+            info = TorrentInfo.from_file(source)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            info = TorrentInfo.from_bytes(source)
+        else:
+            source.seek(self._offset)
+            try:
+                info = TorrentInfo.from_bytes(source.read(self.size))
+            finally:
+                source.seek(self._offset)
+        self.infohash = info.hash
+        return info
+
+    def chunks(self):
+        """
+        Yield the content in chunks of at most ``CHUNK_SIZE`` bytes.
+
+        Paths are memory-mapped. Each call starts from the beginning,
+        so a request can be sent again.
+        """
+        source = self.source
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source)
+            for start in range(0, self.size, CHUNK_SIZE):
+                yield bytes(view[start:start + CHUNK_SIZE])
+            return
+
+        if isinstance(source, (str, os.PathLike)):
+            if not self.size:
+                return
+            with open(source, 'rb') as f:
+                with mmap.mmap(f.fileno(), self.size,
+                               access=mmap.ACCESS_READ) as mapped:
+                    for start in range(0, self.size, CHUNK_SIZE):
+                        yield mapped[start:start + CHUNK_SIZE]
+            return
+
+        source.seek(self._offset)
+        remaining = self.size
+        while remaining:
+            chunk = source.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError('%s is shorter than when the upload was '
+                              'planned.' % self.filename)
+            remaining -= len(chunk)
+            yield chunk
+
+
+class MultipartBody(object):
+    """
+    ``multipart/form-data`` request body streamed from its sources.
+
+    Its length is known up front, so it is sent with a Content-Length
+    rather than chunked transfer encoding, and file contents are only
+    read while the request is written. The body can be iterated again,
+    e.g. to resend the request after logging in again.
+
+    :param fields: dict() of form field name to value.
+    :param sources: list() of :class:`TorrentSource`.
+    :param file_field: Form field name of the files.
+    """
+    def __init__(self, fields, sources, file_field='torrents'):
+        boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary=%s' % boundary
+        self._parts = []
+        for name, value in fields.items():
+            if not isinstance(value, (bytes, str)):
+                value = str(value)
+            if isinstance(value, str):
+                value = value.encode('utf_8')
+            header = ('--%s\r\nContent-Disposition: form-data; '
+                      'name="%s"\r\n\r\n' % (boundary, name))
+            self._parts.append((header.encode('utf_8'), value))
+        for source in sources:
+            header = ('--%s\r\nContent-Disposition: form-data; name="%s"; '
+                      'filename="%s"\r\nContent-Type: '
+                      'application/x-bittorrent\r\n\r\n' % (
+                          boundary, file_field,
+                          source.filename.replace('"', '%22')))
+            self._parts.append((header.encode('utf_8'), source))
+        self._trailer = ('--%s--\r\n' % boundary).encode('ascii')
+        self._length = len(self._trailer) + sum(
+            len(header) + 2 +
+            (len(part) if isinstance(part, bytes) else part.size)
+            for header, part in self._parts)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def headers(self):
+        """
+        Content-Type and Content-Length headers of the body.
+        """
+        return {'Content-Type': self.content_type,
+                'Content-Length': str(self._length)}
+
+    def __iter__(self):
+        for header, part in self._parts:
+            yield header
+            if isinstance(part, bytes):
+                yield part
+            else:
+                for chunk in part.chunks():
+                    yield chunk
+            yield b'\r\n'
+        yield self._trailer
+
+    async def __aiter__(self):
+        for chunk in self:
+            yield chunk
+
+
+def plan_batches(sources, max_bytes=DEFAULT_BATCH_BYTES,
+                 max_files=DEFAULT_BATCH_FILES):
+    """
+    Split sources into consecutive batches within the limits. A file
+    larger than ``max_bytes`` gets a batch of its own.
+
+    :param sources: list() of :class:`TorrentSource`.
+    :param max_bytes: Maximum total size of the files of a batch.
+    :param max_files: Maximum number of files of a batch.
+
+    :return: list() of lists of sources.
+    """
+    batches, batch, size = [], [], 0
+    for source in sources:
+        if batch and (len(batch) >= max_files or
+                      size + source.size > max_bytes):
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(source)
+        size += source.size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def add_options(options):
+    """
+    Form fields of a ``torrents/add`` request from keyword options, with
+    ``save_path`` accepted for ``savepath`` as in ``download_from_file``.
+    """
+    fields = dict(options)
+    if fields.get('save_path'):
+        fields['savepath'] = fields.pop('save_path')
+    return fields
+
+
+def check_added(response):
+    """
+    Raise :class:`UploadRejected` if a ``torrents/add`` response reports
+    that nothing was added.
+
+    :return: The response.
+    """
+    if isinstance(response, str) and response.strip() == 'Fails.':
+        raise UploadRejected()
+    return response
+
+
+def _key(source):
+    """
+    Key of a source given by the caller: paths and bytes by value,
+    unhashable buffers by identity.
+    """
+    try:
+        hash(source)
+    except TypeError:
+        return id(source)
+    return source
+
+
+class IngestResult(object):
+    """
+    Outcome of a bulk upload.
+
+    :ivar batches: list() of ``UploadBatch(index, files, hashes,
+                   response, error)`` in the order they were sent.
+                   ``files`` holds the sources as given by the caller,
+                   ``hashes`` their infohashes if they were parsed.
+    :ivar skipped: list() of files not sent because their torrent is
+                   known or appeared earlier in the input.
+    :ivar invalid: list() of ``(file, error)`` of files which are not
+                   valid torrents, they are not sent.
+    """
+    def __init__(self):
+        self.batches = []
+        self.skipped = []
+        self.invalid = []
+        self._assignments = {}
+
+    def _prepare(self, files, known=None, parse=True):
+        """
+        Sources of the files to send. Parsed files which are invalid or
+        duplicates are recorded and left out.
+        """
+        sources = [TorrentSource(f) for f in files]
+        if not parse:
+            return sources
+        seen = set(h.lower() for h in known or ())
+        selected = []
+        for source in sources:
+            try:
+                infohash = source.info().hash
+            except (BencodeError, EnvironmentError) as e:
+                self.invalid.append((source.source, e))
+                continue
+            if infohash in seen:
+                self.skipped.append(source.source)
+                continue
+            seen.add(infohash)
+            selected.append(source)
+        return selected
+
+    @property
+    def hashes(self):
+        """
+        Infohashes of the parsed files which were accepted.
+        """
+        return [h for batch in self.batches if batch.error is None
+                for h in batch.hashes if h is not None]
+
+    def __iter__(self):
+        return iter(self.batches)
+
+    def __len__(self):
+        return len(self.batches)
+
+    def _record(self, files, response, error):
+        batch = UploadBatch(len(self.batches), [f.source for f in files],
+                            [f.infohash for f in files], response, error)
+        self.batches.append(batch)
+        for source in files:
+            self._assignments[_key(source.source)] = batch.index
+        return batch
+
+    def batch_of(self, source):
+        """
+        The last batch a file was sent in.
+
+        :param source: Path, bytes or file object as given.
+        """
+        return self.batches[self._assignments[_key(source)]]
+
+    @property
+    def failed(self):
+        """
+        Files which are invalid or whose last batch failed.
+        """
+        return [f for f, _ in self.invalid] + [f for batch in self.batches if batch.error is not None
+                for f in batch.files
+                if self._assignments[_key(f)] == batch.index]
+
+    @property
+    def ok(self):
+        """
+        Whether every file was accepted.
+        """
+        return not self.failed
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# the simulated WebAPI of the benchmarks doubles as the test server
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from stub_server import serve  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    """
+    Simulated WebAPI with 50 torrents, ``stub.url`` to connect to and
+    ``stub.simulation`` to inspect or change its state.
+    """
+    server, url = serve(50)
+    server.url = url
+    server.simulation = server.RequestHandlerClass.simulation
+    yield server
+    server.shutdown()
+    server.server_close()
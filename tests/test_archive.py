@@ -0,0 +1,116 @@
+import pytest
+
+from qbittorrentv2 import Client, LogArchive
+from qbittorrentv2.archive import LOG_INFO, LOG_WARNING
+
+DAY = 86400
+
+
+class LogSource(object):
+    """
+    Client serving scripted main and peers logs.
+    """
+    def __init__(self, main, peers=()):
+        self.main = list(main)
+        self.peers = list(peers)
+
+    def get_log(self, last_known_id=-1):
+        return [e for e in self.main if e['id'] > last_known_id]
+
+    def get_peer_log(self, last_known_id=-1):
+        return [e for e in self.peers if e['id'] > last_known_id]
+
+
+def message(id, timestamp, type=LOG_INFO):
+    return {'id': id, 'timestamp': timestamp, 'type': type,
+            'message': 'message %d' % id}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    with LogArchive(str(tmp_path), segment_seconds=DAY) as archive:
+        yield archive
+
+
+def test_sync_only_fetches_new_entries(archive):
+    source = LogSource([message(i, 1000 + i) for i in range(5)])
+    assert archive.sync(source) == 5
+    source.main.append(message(5, 1005))
+    assert archive.sync(source) == 1
+    assert archive.sync(source) == 0
+    assert [m['id'] for m in archive.query()] == list(range(6))
+
+
+def test_restarted_daemon_is_detected(archive):
+    source = LogSource([message(i, 1000 + i) for i in range(5)])
+    archive.sync(source)
+    # ids start over after a restart, the marker entry is gone
+    source.main = [message(i, 5000 + i) for i in range(3)]
+    assert archive.sync(source) == 3
+    assert archive.cursor['main'] == 2
+    assert len(list(archive.query())) == 8
+
+
+def test_restart_with_more_entries_than_before(archive):
+    source = LogSource([message(i, 1000 + i) for i in range(3)])
+    archive.sync(source)
+    source.main = [message(i, 5000 + i) for i in range(10)]
+    assert archive.sync(source) == 10
+    assert len(list(archive.query(since=5000))) == 10
+
+
+def test_duplicates_are_ignored(archive):
+    entries = [message(i, 1000 + i) for i in range(3)]
+    archive.add('main', entries)
+    archive.add('main', entries)
+    assert len(list(archive.query())) == 3
+
+
+def test_cursor_survives_reopening(tmp_path):
+    source = LogSource([message(i, 1000 + i) for i in range(4)])
+    with LogArchive(str(tmp_path)) as archive:
+        archive.sync(source)
+    source.main.append(message(4, 1004))
+    with LogArchive(str(tmp_path)) as archive:
+        assert archive.sync(source) == 1
+
+
+def test_queries_use_segments_and_filters(archive):
+    archive.add('main', [message(0, 10, LOG_INFO),
+                         message(1, DAY + 10, LOG_WARNING),
+                         message(2, 2 * DAY + 10, LOG_INFO),
+                         message(3, 2 * DAY + 20, LOG_WARNING)])
+    archive.add('peers', [{'id': 0, 'timestamp': DAY, 'ip': '1.1.1.1',
+                           'blocked': True, 'reason': 'banned'}])
+    archive.flush()
+    assert len(archive.segments()) == 3
+    assert [m['id'] for m in archive.query(min_type=LOG_WARNING)] == [1, 3]
+    assert [m['id'] for m in archive.query(since=DAY, until=2 * DAY + 15)] \
+        == [1, 2]
+    assert [m['id'] for m in archive.query(limit=3)] == [0, 1, 2]
+    assert [p['reason'] for p in archive.query('peers', ip='1.1.1.1')] == \
+        ['banned']
+
+
+def test_millisecond_timestamps(archive):
+    archive.add('main', [message(0, 1600000000123)])
+    assert next(archive.query())['timestamp'] == 1600000000
+
+
+def test_rotation(tmp_path):
+    with LogArchive(str(tmp_path), segment_seconds=DAY,
+                    max_segments=2) as archive:
+        archive.add('main', [message(i, i * DAY) for i in range(4)])
+        archive.flush()
+        assert archive.segments() == [2 * DAY, 3 * DAY]
+        assert [m['id'] for m in archive.query()] == [2, 3]
+
+
+def test_unknown_kind(archive):
+    with pytest.raises(ValueError):
+        archive.add('tracker', [])
+
+
+def test_sync_from_the_daemon(stub, archive):
+    assert archive.sync(Client(stub.url), peers=False) == 20
+    assert len(list(archive.query())) == 20
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from stub_server import Handler, Simulation, ThreadingHTTPServer  # noqa: E402
+
+from qbittorrentv2 import (AsyncClient, ClientPool,  # noqa: E402
+                           LoginRequired)
+from qbittorrentv2.async_client import AsyncPreferences  # noqa: E402
+
+PASSWORD = 'adminadmin'
+
+
+class StubHandler(Handler):
+    """
+    Simulated WebAPI recording the requests and how many of them are
+    served at once.
+    """
+    stats = None
+
+    def _counted(self):
+        stats = self.stats
+        endpoint = self.path.split('/api/v2/', 1)[-1].split('?', 1)[0]
+        if endpoint == 'transfer/downloadLimit':
+            return self._reply(b'1024')
+
+        with stats['lock']:
+            stats['requests'].append(endpoint)
+            stats['in_flight'] += 1
+            stats['peak'] = max(stats['peak'], stats['in_flight'])
+        try:
+            return self._handle()
+        finally:
+            with stats['lock']:
+                stats['in_flight'] -= 1
+
+    do_GET = do_POST = _counted
+
+
+@pytest.fixture
+def server():
+    stats = {'lock': threading.Lock(), 'requests': [], 'in_flight': 0,
+             'peak': 0}
+    simulation = Simulation(50)
+    simulation.password = PASSWORD
+    handler = type('StubHandler', (StubHandler,), {
+        'simulation': simulation,
+        'latency': 0.02,
+        'stats': stats,
+    })
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    httpd.stats = stats
+    httpd.simulation = handler.simulation
+    httpd.url = 'http://%s:%d/' % httpd.server_address
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_login_required_then_accepted(server):
+    async def scenario():
+        async with AsyncClient(server.url) as qb:
+            with pytest.raises(LoginRequired):
+                await qb.torrents()
+            assert await qb.login('admin', 'wrong') == 'Fails.'
+            assert await qb.login('admin', PASSWORD) is None
+            return await qb.torrents()
+
+    torrents = run(scenario())
+    assert len(torrents) == 50
+
+
+def test_decoding_rules(server):
+    async def scenario():
+        async with AsyncClient(server.url) as qb:
+            await qb.login('admin', PASSWORD)
+            return (await qb.torrents(limit=2),
+                    await qb.qbittorrent_version,
+                    await qb.get_global_download_limit,
+                    await qb.resume('a' * 40))
+
+    torrents, version, limit, empty = run(scenario())
+    assert isinstance(torrents, list) and isinstance(torrents[0], dict)
+    assert version == 'v4.6.0'
+    assert limit == 1024
+    assert empty == {}
+
+
+def test_concurrency_is_bounded(server):
+    async def scenario():
+        async with AsyncClient(server.url, max_concurrency=4) as qb:
+            await qb.login('admin', PASSWORD)
+            # distinct parameters, identical GETs would be coalesced
+            return await asyncio.gather(*[qb.torrents(limit=1, offset=i)
+                                          for i in range(20)])
+
+    pages = run(scenario())
+    assert len(pages) == 20
+    assert server.stats['requests'].count('torrents/info') == 20
+    assert 1 < server.stats['peak'] <= 4
+
+
+def test_preferences_view(server):
+    async def scenario():
+        async with AsyncClient(server.url) as qb:
+            await qb.login('admin', PASSWORD)
+            assert isinstance(qb.preferences, AsyncPreferences)
+            before = await qb.preferences
+            async with qb.preferences.batch() as prefs:
+                prefs['dl_limit'] = 1024
+                prefs['up_limit'] = 512
+            return before, await qb.preferences.get('dl_limit')
+
+    before, limit = run(scenario())
+    assert before['save_path'] == '/data/torrents/'
+    assert limit == 1024
+    assert server.simulation.preferences['up_limit'] == 512
+    assert server.stats['requests'].count('app/setPreferences') == 1
+    # the committed values were merged, not fetched again
+    assert server.stats['requests'].count('app/preferences') == 1
+
+
+def test_preferences_need_await(server):
+    qb = AsyncClient(server.url)
+    with pytest.raises(TypeError):
+        qb.preferences['dl_limit']
+    with pytest.raises(TypeError):
+        qb.preferences['dl_limit'] = 1024
+
+
+def test_expired_session_is_renewed(server):
+    async def scenario():
+        async with AsyncClient(server.url) as qb:
+            await qb.login('admin', PASSWORD)
+            server.simulation.sessions.clear()
+            torrents = await qb.torrents()
+            return torrents, qb._session_generation
+
+    torrents, generation = run(scenario())
+    assert len(torrents) == 50
+    assert generation == 2
+
+
+def test_pool_refuses_async_clients(server):
+    with pytest.raises(TypeError):
+        ClientPool({'async': AsyncClient(server.url)})
+
+
+def test_metrics_measure_form_bodies(server):
+    async def scenario():
+        async with AsyncClient(server.url) as qb:
+            qb.enable_metrics()
+            await qb.login('admin', PASSWORD)
+            await qb.pause('a' * 40)
+            return qb.metrics.snapshot()
+
+    snapshot = run(scenario())
+    assert snapshot['torrents/pause']['request_bytes'] == len('hashes=' +
+                                                              'a' * 40)
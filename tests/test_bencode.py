@@ -0,0 +1,71 @@
+import hashlib
+
+import pytest
+
+from qbittorrentv2.bencode import (MAX_DEPTH, BencodeError, TorrentInfo,
+                                   decode, encode)
+
+
+def test_round_trip():
+    value = {'b': [1, -2, 'x'], 'a': {'n': b'\x00\xff'}}
+    data = encode(value)
+    assert data == b'd1:ad1:n2:\x00\xffe1:bli1ei-2e1:xee'
+    assert decode(data) == {b'a': {b'n': b'\x00\xff'},
+                            b'b': [1, -2, b'x']}
+
+
+@pytest.mark.parametrize('data', [
+    b'', b'i12', b'5:abc', b'x', b'i1ei2e', b'l', b'd1:ae', b'di1ei2ee',
+])
+def test_invalid_data(data):
+    with pytest.raises(BencodeError):
+        decode(data)
+
+
+def test_nesting_is_limited():
+    decode(b'l' * MAX_DEPTH + b'e' * MAX_DEPTH)
+    deep = b'l' * (MAX_DEPTH + 1) + b'e' * (MAX_DEPTH + 1)
+    with pytest.raises(BencodeError):
+        decode(deep)
+    with pytest.raises(BencodeError):
+        TorrentInfo.from_bytes(b'd4:infod4:name1:ae5:extra' + deep + b'e')
+
+
+def test_v1_multi_file_torrent(tmp_path):
+    info = {'name': 'album', 'piece length': 16384, 'pieces': b'x' * 40,
+            'private': 1,
+            'files': [{'length': 10, 'path': ['cd1', 'a.flac']},
+                      {'length': 5, 'path': ['.pad', '5'], 'attr': 'p'},
+                      {'length': 20, 'path': ['b.flac']}]}
+    data = encode({'announce': 'udp://a', 'info': info,
+                   'announce-list': [['udp://a'], ['udp://b']]})
+    path = tmp_path / 'album.torrent'
+    path.write_bytes(data)
+    parsed = TorrentInfo.from_file(str(path))
+    assert parsed.hash == hashlib.sha1(encode(info)).hexdigest()
+    assert parsed.infohash_v2 is None
+    assert parsed.files == [('album/cd1/a.flac', 10), ('album/b.flac', 20)]
+    assert parsed.total_size == 30
+    assert parsed.private is True
+    assert parsed.trackers == ['udp://a', 'udp://b']
+
+
+def test_v2_only_torrent():
+    info = {'name': 'dir', 'meta version': 2, 'piece length': 16384,
+            'file tree': {'a.txt': {'': {'length': 3}},
+                          'sub': {'b.txt': {'': {'length': 4}}}}}
+    parsed = TorrentInfo.from_bytes(encode({'info': info}))
+    digest = hashlib.sha256(encode(info)).hexdigest()
+    assert parsed.infohash_v1 is None
+    assert parsed.infohash_v2 == digest
+    assert parsed.hash == digest[:40]
+    assert parsed.files == [('dir/a.txt', 3), ('dir/sub/b.txt', 4)]
+
+
+def test_not_a_torrent(tmp_path):
+    with pytest.raises(BencodeError):
+        TorrentInfo.from_bytes(encode({'announce': 'udp://a'}))
+    path = tmp_path / 'empty.torrent'
+    path.write_bytes(b'')
+    with pytest.raises(BencodeError):
+        TorrentInfo.from_file(str(path))
@@ -0,0 +1,99 @@
+import threading
+
+from qbittorrentv2 import Client, cache as cache_module
+from qbittorrentv2.cache import ResponseCache
+
+VERSION = ('app/version',)
+PREFS = ('app/preferences',)
+
+
+def test_hits_misses_and_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: now[0])
+    cache = ResponseCache(ttls={'app/version': 10})
+    assert cache.get(VERSION) == (False, None)
+    cache.set(VERSION, 'v4.6.0')
+    assert cache.get(VERSION) == (True, 'v4.6.0')
+    now[0] += 11
+    assert cache.get(VERSION) == (False, None)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert not cache.cacheable('torrents/info')
+
+
+def test_least_recently_used_are_evicted():
+    cache = ResponseCache(ttls={'app/version': 60}, maxsize=2)
+    for i in range(3):
+        cache.set(('app/version', i), i)
+        cache.get(('app/version', 0))
+    assert cache.get(('app/version', 0)) == (True, 0)
+    assert cache.get(('app/version', 1)) == (False, None)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_writes_invalidate_what_they_affect():
+    cache = ResponseCache()
+    cache.set(VERSION, 'v4.6.0')
+    cache.set(PREFS, {})
+    cache.on_write('app/setPreferences')
+    assert cache.get(PREFS)[0] is False
+    assert cache.get(VERSION)[0] is True
+    cache.on_write('torrents/pause')
+    assert cache.get(VERSION)[0] is True
+    cache.on_write('auth/logout')
+    assert len(cache) == 0
+
+
+def test_responses_older_than_an_invalidation_are_dropped():
+    cache = ResponseCache()
+    generation = cache.generation('app/preferences')
+    cache.on_write('app/setPreferences')
+    cache.set(PREFS, {'dl_limit': 0}, generation)
+    assert cache.get(PREFS)[0] is False
+
+    generation = cache.generation('app/preferences')
+    cache.invalidate()
+    cache.set(PREFS, {'dl_limit': 0}, generation)
+    assert cache.get(PREFS)[0] is False
+
+    generation = cache.generation('app/preferences')
+    cache.on_write('rss/setRule')
+    cache.set(PREFS, {'dl_limit': 0}, generation)
+    assert cache.get(PREFS)[0] is True
+
+
+def test_client_serves_cached_responses(stub):
+    qb = Client(stub.url)
+    qb.enable_cache()
+    assert qb.qbittorrent_version == qb.qbittorrent_version == 'v4.6.0'
+    assert stub.simulation.requests['app/version'] == 1
+    qb.login('admin', 'adminadmin')
+    qb.qbittorrent_version
+    assert stub.simulation.requests['app/version'] == 2
+
+
+def test_read_racing_a_write_is_not_cached(stub):
+    qb = Client(stub.url)
+    qb.enable_cache()
+    perform = qb._perform
+    done, release = threading.Event(), threading.Event()
+
+    def held(endpoint, method, data=None, **kwargs):
+        response = perform(endpoint, method, data, **kwargs)
+        if endpoint == 'app/preferences' and not done.is_set():
+            # the response is read, hold it until the write is done
+            done.set()
+            release.wait(5)
+        return response
+
+    qb._perform = held
+    old = []
+    reader = threading.Thread(
+        target=lambda: old.append(qb._get('app/preferences')))
+    reader.start()
+    assert done.wait(5)
+    qb.set_preferences(dl_limit=2048)
+    release.set()
+    reader.join(5)
+    assert old[0]['dl_limit'] == 0
+    assert qb._get('app/preferences')['dl_limit'] == 2048
+    assert stub.simulation.requests['app/preferences'] == 3
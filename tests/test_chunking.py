@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from qbittorrentv2 import BulkRequestError, Client
+
+HASHES = ['%040x' % i for i in range(95)]
+
+
+def test_short_lists_are_sent_at_once(stub):
+    qb = Client(stub.url)
+    qb.hash_chunk_size = 100
+    assert qb.pause(HASHES) == {}
+    assert stub.simulation.requests['torrents/pause'] == 1
+    assert stub.simulation.processed_hashes == 95
+
+
+def test_long_lists_are_chunked(stub):
+    qb = Client(stub.url)
+    qb.hash_chunk_size = 10
+    assert qb.pause(HASHES) == {}
+    assert stub.simulation.requests['torrents/pause'] == 10
+    assert stub.simulation.processed_hashes == 95
+
+
+def test_failed_chunks_are_reported(stub):
+    stub.simulation.failing_hashes.add(HASHES[25])
+    qb = Client(stub.url)
+    qb.hash_chunk_size = 10
+    with pytest.raises(BulkRequestError) as info:
+        qb.pause(HASHES)
+    assert list(info.value.errors) == [2]
+    assert info.value.failed_hashes == HASHES[20:30]
+    assert info.value.results[2] is None
+    assert stub.simulation.processed_hashes == 85
+
+
+def test_async_chunks_are_gathered(stub):
+    pytest.importorskip('aiohttp')
+    from qbittorrentv2 import AsyncClient
+
+    async def scenario():
+        async with AsyncClient(stub.url, max_concurrency=8) as qb:
+            qb.hash_chunk_size = 10
+            return await qb.pause(HASHES)
+
+    assert asyncio.run(scenario()) == {}
+    assert stub.simulation.requests['torrents/pause'] == 10
+    assert stub.simulation.processed_hashes == 95
+
+
+def test_async_failed_chunks_are_reported(stub):
+    pytest.importorskip('aiohttp')
+    from qbittorrentv2 import AsyncClient
+    stub.simulation.failing_hashes.add(HASHES[-1])
+
+    async def scenario():
+        async with AsyncClient(stub.url) as qb:
+            qb.hash_chunk_size = 10
+            await qb.pause(HASHES)
+
+    with pytest.raises(BulkRequestError) as info:
+        asyncio.run(scenario())
+    assert list(info.value.errors) == [9]
+    assert info.value.chunks[9][-1] == HASHES[-1]
+    assert stub.simulation.processed_hashes == 90
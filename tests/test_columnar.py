@@ -0,0 +1,62 @@
+import pytest
+
+from qbittorrentv2 import SyncState, Torrent, TorrentTable, columnar
+
+TORRENTS = [
+    {'hash': 'a', 'state': 'downloading', 'category': 'linux',
+     'size': 100, 'dlspeed': 10, 'ratio': 0.5},
+    {'hash': 'b', 'state': 'uploading', 'category': 'linux',
+     'size': 300, 'dlspeed': 0, 'ratio': 2.0},
+    {'hash': 'c', 'state': 'downloading', 'category': None,
+     'size': 600, 'dlspeed': 30, 'ratio': 1.0},
+]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(columnar, 'numpy', None)
+    return request.param
+
+
+def test_aggregates(backend):
+    table = TorrentTable.from_torrents(TORRENTS)
+    assert len(table) == 3
+    assert table.sum('size') == 1000
+    assert table.mean('dlspeed') == pytest.approx(40 / 3.0)
+    assert table.percentile('ratio', 50) == pytest.approx(1.0)
+    assert table.percentile('size', 25) == pytest.approx(200)
+    assert table.group_sum('category', 'size') == {'linux': 400, '': 600}
+    assert table.group_count('state') == {'downloading': 2, 'uploading': 1}
+    assert table.values('hash') == ['a', 'b', 'c']
+
+
+def test_where(backend):
+    table = TorrentTable.from_torrents(TORRENTS)
+    downloading = table.where(state='downloading', dlspeed=lambda v: v > 20)
+    assert downloading.values('hash') == ['c']
+    assert table.where(state={'uploading', 'pausedUP'}).sum('size') == 300
+    assert table.where(category=lambda c: c.startswith('li')).values(
+        'hash') == ['a', 'b']
+    assert table.where() is table
+
+
+def test_empty_table(backend):
+    table = TorrentTable.from_torrents([])
+    assert len(table) == 0
+    assert table.sum('size') == 0
+    assert table.mean('size') is None
+    assert table.percentile('size', 90) is None
+    assert table.where(state='downloading').group_count('state') == {}
+
+
+def test_records_and_sync_state(backend):
+    records = TorrentTable.from_torrents([Torrent(t) for t in TORRENTS],
+                                         numeric=['size'])
+    assert list(records.columns) == ['size']
+    state = SyncState()
+    state.apply({'rid': 1, 'full_update': True, 'torrents': dict(
+        (t['hash'], t) for t in TORRENTS)})
+    assert TorrentTable.from_sync_state(state).sum('size') == 1000
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from qbittorrentv2 import decoding
+from qbittorrentv2.decoding import decode_response, decode_text
+
+
+@pytest.fixture
+def restore_backend():
+    yield
+    decoding.set_json_backend(None)
+
+
+def test_json_is_parsed_from_bytes():
+    assert decode_response(b'[{"a": 1}]', 'application/json') == [{'a': 1}]
+
+
+def test_empty_bodies_are_empty_dicts():
+    assert decode_response(b'', 'application/json') == {}
+    assert decode_text('') == {}
+
+
+def test_bare_numbers_are_parsed():
+    assert decode_response(b'1024', 'text/plain; charset=UTF-8') == 1024
+    assert decode_response(b'-1.5', 'text/plain') == -1.5
+    assert decode_response(b'v4.6.0', 'text/plain') == 'v4.6.0'
+
+
+def test_unknown_content_type_falls_back_to_text():
+    assert decode_response(b'{"a": 1}', None) == {'a': 1}
+    assert decode_response(b'Ok.', '') == 'Ok.'
+
+
+def test_charset_of_the_content_type():
+    assert decode_response(b'caf\xe9', 'text/plain; charset=ISO-8859-1') \
+        == 'caf\xe9'
+    assert decode_response('caf\xe9'.encode('utf_8'),
+                           'text/plain; charset="utf-8"') == 'caf\xe9'
+
+
+def test_undecodable_bytes_are_replaced():
+    assert decode_response(b'caf\xe9', 'text/plain') == 'caf�'
+    assert decode_response(b'caf\xe9', 'text/plain; charset=nope') == \
+        'caf�'
+
+
+def test_pluggable_backend(restore_backend):
+    calls = []
+
+    def loads(content):
+        calls.append(content)
+        return json.loads(content)
+
+    decoding.set_json_backend(loads)
+    assert decode_response(b'{}', 'application/json') == {}
+    assert decode_response(b'[1]', 'application/json',
+                           loads=json.loads) == [1]
+    assert calls == [b'{}']
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from qbittorrentv2 import Client
+
+MISSING = 'f' * 40
+
+
+def test_every_kind_of_every_torrent(stub):
+    qb = Client(stub.url)
+    hashes = [t['hash'] for t in stub.simulation.torrents[:10]]
+    details = list(qb.get_torrents_details(hashes, max_workers=4))
+    assert len(details) == 40
+    assert set((d.hash, d.kind) for d in details) == set(
+        (h, k) for h in hashes
+        for k in ('properties', 'files', 'trackers', 'webseeds'))
+    assert all(d.error is None for d in details)
+    files = [d.data for d in details if d.kind == 'files']
+    assert all(f[0]['name'] == 'part1' for f in files)
+
+
+def test_failures_are_reported_per_request(stub):
+    qb = Client(stub.url)
+    known = stub.simulation.torrents[0]['hash']
+    details = dict(((d.hash, d.kind), d) for d in qb.get_torrents_details(
+        [known, MISSING], kinds=['properties']))
+    assert details[known, 'properties'].data['save_path'] == \
+        '/data/torrents/'
+    assert details[MISSING, 'properties'].error is not None
+    assert details[MISSING, 'properties'].data is None
+
+
+def test_unknown_kind():
+    qb = Client('http://127.0.0.1:1/', lazy=True)
+    with pytest.raises(ValueError):
+        next(qb.get_torrents_details(['a' * 40], kinds=['peers']))
+
+
+def test_async_details_are_bounded(stub):
+    pytest.importorskip('aiohttp')
+    from qbittorrentv2 import AsyncClient
+    hashes = [t['hash'] for t in stub.simulation.torrents[:10]]
+
+    async def scenario():
+        async with AsyncClient(stub.url) as qb:
+            return [d async for d in qb.get_torrents_details(
+                hashes + [MISSING], kinds=['trackers'], max_workers=3)]
+
+    details = asyncio.run(scenario())
+    assert len(details) == 11
+    failed = [d.hash for d in details if d.error is not None]
+    assert failed == [MISSING]
+    assert stub.simulation.requests['torrents/trackers'] == 11
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from qbittorrentv2 import Client
+from qbittorrentv2.events import (ADDED, CATEGORY_CHANGE, COMPLETED, REMOVED,
+                                  STATE_CHANGE, EventWatcher)
+from qbittorrentv2.poller import SyncPoller
+
+A, B = 'a' * 40, 'b' * 40
+
+
+class FakeClient(object):
+    """
+    Client whose poller is fed deltas by the test.
+    """
+    def __init__(self):
+        self.poller = SyncPoller(self)
+        self.events = EventWatcher(self)
+
+    def _start_poller(self):
+        pass
+
+    def feed(self, delta):
+        self.poller.dispatch(self.poller.state.apply(delta))
+
+
+def full_update():
+    return {'rid': 1, 'full_update': True, 'torrents': {
+        A: {'state': 'downloading', 'progress': 0.5, 'category': 'linux',
+            'tags': 'watched, iso'},
+        B: {'state': 'uploading', 'progress': 1, 'category': ''}}}
+
+
+def drain(subscription):
+    events = []
+    while True:
+        event = subscription.get(timeout=0)
+        if event is None:
+            return events
+        events.append(event)
+
+
+def test_events_are_derived_from_deltas():
+    qb = FakeClient()
+    sub = qb.events.subscribe()
+    qb.feed(full_update())
+    assert drain(sub) == []
+
+    qb.feed({'rid': 2, 'torrents': {
+        A: {'state': 'uploading', 'progress': 1, 'category': 'done'},
+        'c' * 40: {'state': 'metaDL', 'progress': 0},
+        B: {'dlspeed': 10}},
+        'torrents_removed': [B]})
+    events = drain(sub)
+    assert [(e.kind, e.hash) for e in events] == [
+        (ADDED, 'c' * 40), (STATE_CHANGE, A), (COMPLETED, A),
+        (CATEGORY_CHANGE, A), (REMOVED, B)]
+    assert (events[1].previous, events[1].current) == ('downloading',
+                                                       'uploading')
+    assert (events[3].previous, events[3].current) == ('linux', 'done')
+    assert events[4].torrent['state'] == 'uploading'
+
+
+def test_filters():
+    qb = FakeClient()
+    by_tag = qb.events.subscribe([STATE_CHANGE], tag='iso')
+    by_category = qb.events.subscribe([STATE_CHANGE], category='linux')
+    by_hash = qb.events.subscribe([STATE_CHANGE], hashes=[B.upper()])
+    qb.feed(full_update())
+    qb.feed({'rid': 2, 'torrents': {A: {'state': 'pausedDL'},
+                                    B: {'state': 'pausedUP'}}})
+    assert [e.hash for e in drain(by_tag)] == [A]
+    assert [e.hash for e in drain(by_category)] == [A]
+    assert [e.hash for e in drain(by_hash)] == [B]
+
+
+@pytest.mark.parametrize('overflow, kept, closed', [
+    ('drop_oldest', ['downloading', 'stalledDL'], False),
+    ('drop_newest', ['pausedDL', 'downloading'], False),
+    ('disconnect', ['pausedDL', 'downloading'], True),
+])
+def test_overflow_policies(overflow, kept, closed):
+    qb = FakeClient()
+    sub = qb.events.subscribe([STATE_CHANGE], maxsize=2, overflow=overflow)
+    qb.feed(full_update())
+    for rid, state in enumerate(['pausedDL', 'downloading', 'stalledDL']):
+        qb.feed({'rid': rid + 2, 'torrents': {A: {'state': state}}})
+    assert [e.current for e in drain(sub)] == kept
+    assert sub.dropped == 1
+    assert sub.closed is closed
+    assert (sub in qb.events.subscriptions) is not closed
+
+
+def test_unknown_kinds_and_policies_are_refused():
+    qb = FakeClient()
+    with pytest.raises(ValueError):
+        qb.events.subscribe(['finished'])
+    with pytest.raises(ValueError):
+        qb.events.subscribe(overflow='block')
+
+
+def test_closing_the_last_subscription_removes_the_listener():
+    qb = FakeClient()
+    first, second = qb.events.subscribe(), qb.events.subscribe()
+    first.close()
+    assert qb.poller.busy
+    second.close()
+    assert not qb.poller.busy
+
+
+def test_callbacks_run_from_the_poller(stub):
+    qb = Client(stub.url)
+    qb.poller.interval = 0.02
+    seen, called = [], threading.Event()
+
+    def callback(event):
+        seen.append(event)
+        called.set()
+
+    sub = qb.events.on_added(callback)
+    # events are derived from the deltas after the first one
+    deadline = time.time() + 5
+    while qb.events._snapshot is None and time.time() < deadline:
+        time.sleep(0.01)
+    qb.download_from_link('magnet:?xt=urn:btih:' + 'c' * 40)
+    assert called.wait(5)
+    sub.close()
+    assert [(e.kind, e.hash) for e in seen] == [(ADDED, 'c' * 40)]
+    assert not sub.errors
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from qbittorrentv2 import Client, Torrent
+
+
+def hashes(torrents):
+    return [t['hash'] for t in torrents]
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_pages_cover_every_torrent_once(stub, prefetch):
+    qb = Client(stub.url)
+    torrents = list(qb.iter_torrents(page_size=7, prefetch=prefetch))
+    assert hashes(torrents) == sorted(t['hash']
+                                      for t in stub.simulation.torrents)
+    # 8 pages, the last one short
+    assert stub.simulation.requests['torrents/info'] == 8
+
+
+def test_exact_multiple_of_the_page_size(stub):
+    qb = Client(stub.url)
+    assert len(list(qb.iter_torrents(page_size=10))) == 50
+    # the empty page after the last full one ends the iteration
+    assert stub.simulation.requests['torrents/info'] == 6
+
+
+def test_offset_and_limit(stub):
+    qb = Client(stub.url)
+    everything = hashes(qb.torrents(sort='hash'))
+    window = list(qb.iter_torrents(page_size=4, offset=5, limit=10,
+                                   typed=True))
+    assert all(isinstance(t, Torrent) for t in window)
+    assert hashes(window) == everything[5:15]
+
+
+def test_stopping_early_does_not_fetch_everything(stub):
+    qb = Client(stub.url)
+    iterator = qb.iter_torrents(page_size=5, prefetch=False)
+    assert len([next(iterator) for _ in range(5)]) == 5
+    iterator.close()
+    assert stub.simulation.requests['torrents/info'] == 1
+
+
+def test_async_pages(stub):
+    pytest.importorskip('aiohttp')
+    from qbittorrentv2 import AsyncClient
+
+    async def scenario():
+        async with AsyncClient(stub.url) as qb:
+            return [t async for t in qb.iter_torrents(page_size=9,
+                                                      limit=40)]
+
+    torrents = asyncio.run(scenario())
+    assert hashes(torrents) == sorted(t['hash']
+                                      for t in stub.simulation.torrents)[:40]
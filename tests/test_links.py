@@ -0,0 +1,73 @@
+import base64
+import binascii
+
+from qbittorrentv2 import Client
+from qbittorrentv2.links import (METADATA_STATES, LinkFeeder,
+                                 infohash_from_magnet)
+
+HASH = '0123456789abcdef0123456789abcdef01234567'
+
+
+def magnet(i):
+    return 'magnet:?xt=urn:btih:%040x&dn=new.%d' % (0xabc0000 + i, i)
+
+
+class State(object):
+    def __init__(self, torrents):
+        self.torrents = torrents
+
+
+def test_infohash_from_magnet():
+    base32 = base64.b32encode(binascii.unhexlify(HASH)).decode('ascii')
+    assert infohash_from_magnet('magnet:?xt=urn:btih:' + HASH.upper()) == HASH
+    assert infohash_from_magnet('magnet:?dn=x&xt=urn:btih:' + base32) == HASH
+    assert infohash_from_magnet(
+        'magnet:?xt=urn:btmh:1220' + HASH + 'f' * 24) == HASH
+    assert infohash_from_magnet('magnet:?xt=urn:btih:nothex') is None
+    assert infohash_from_magnet('http://example.com/a.torrent') is None
+
+
+def test_feeder_room_counts_links_not_yet_seen():
+    feeder = LinkFeeder([magnet(i) for i in range(10)] + [magnet(0)],
+                        known=[], batch_size=4, max_metadata=6,
+                        max_queued=None)
+    assert feeder.result.skipped == [magnet(0)]
+    state = State({'a': {'state': 'metaDL'}})
+    feeder.observe(state)
+    assert feeder.room() == 4
+    batch = feeder.take(4)
+    feeder.sent(batch)
+    assert feeder.room() == 1
+    # sent links showing up are counted by their state only
+    state.torrents.update((h, {'state': 'stalledDL'}) for _, h in batch)
+    feeder.observe(state)
+    assert feeder.room() == 4
+    feeder.sent(feeder.take(2), error=IOError())
+    assert len(feeder.result.failed) == 2
+    result = feeder.finish()
+    assert len(result.submitted) == 4 and len(result.pending) == 4
+
+
+def test_ingest_links_in_batches(stub):
+    qb = Client(stub.url)
+    existing = stub.simulation.torrents[0]['magnet_uri']
+    links = [magnet(i) for i in range(12)] + [existing, magnet(3)]
+    result = qb.ingest_links(links, batch_size=5, max_metadata=None,
+                             max_queued=None, category='linux')
+    assert result.submitted == links[:12]
+    assert result.skipped == [existing, magnet(3)]
+    assert stub.simulation.requests['torrents/add'] == 3
+    assert set(result.hashes) <= set(stub.simulation.by_hash)
+
+
+def test_ingest_links_waits_for_metadata(stub):
+    simulation = stub.simulation
+    simulation.metadata_rate = 0
+    fetching = sum(t['state'] in METADATA_STATES for t in simulation.torrents)
+    qb = Client(stub.url)
+    links = [magnet(i) for i in range(8)]
+    result = qb.ingest_links(links, batch_size=5, max_metadata=fetching + 3,
+                             max_queued=None, poll_interval=0.05,
+                             timeout=0.3)
+    assert result.submitted == links[:3]
+    assert result.pending == links[3:]
@@ -0,0 +1,65 @@
+import pytest
+from requests.exceptions import HTTPError
+
+from qbittorrentv2 import Client
+from qbittorrentv2.metrics import Metrics, body_size
+
+
+def test_histogram_is_cumulative():
+    metrics = Metrics(buckets=(0.1, 1))
+    for latency in (0.05, 0.5, 0.5, 5):
+        metrics.observe('torrents/info', latency, status=200,
+                        response_bytes=10)
+    stats = metrics.snapshot()['torrents/info']
+    assert stats['count'] == 4
+    assert stats['latency_buckets'] == [1, 3, 4]
+    assert stats['latency_sum'] == pytest.approx(6.05)
+    assert stats['response_bytes'] == 40
+    assert stats['statuses'] == {200: 4}
+
+
+def test_body_sizes():
+    assert body_size(None) == 0
+    assert body_size(b'abc') == 3
+    assert body_size(u'\xe9') == 2
+    assert body_size({'hashes': 'a|b'}) == len('hashes=a%7Cb')
+    assert body_size([('a', 1)]) == 0
+
+
+def test_prometheus_rendering():
+    metrics = Metrics(buckets=(1,))
+    metrics.observe('app/version', 0.5, status=200)
+    metrics.observe('app/version', 2, error=ValueError())
+    text = metrics.render_prometheus(prefix='qbt')
+    assert '# TYPE qbt_requests_total counter' in text
+    assert 'qbt_requests_total{endpoint="app/version"} 2' in text
+    assert ('qbt_request_duration_seconds_bucket'
+            '{endpoint="app/version",le="1"} 1') in text
+    assert ('qbt_request_duration_seconds_bucket'
+            '{endpoint="app/version",le="+Inf"} 2') in text
+    assert 'qbt_responses_total{endpoint="app/version",status="200"} 1' in text
+    assert 'qbt_errors_total{endpoint="app/version",error="ValueError"} 1' in text
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+
+def test_client_records_requests_and_errors(stub):
+    qb = Client(stub.url)
+    assert qb.metrics is None
+    metrics = qb.enable_metrics()
+    qb.torrents()
+    qb.pause('a' * 40)
+    stub.simulation.failing_hashes.add('b' * 40)
+    with pytest.raises(HTTPError):
+        qb.pause('b' * 40)
+    snapshot = metrics.snapshot()
+    assert snapshot['torrents/info']['count'] == 1
+    assert snapshot['torrents/info']['response_bytes'] > 0
+    assert snapshot['torrents/pause']['count'] == 2
+    assert snapshot['torrents/pause']['statuses'] == {200: 1, 500: 1}
+    assert snapshot['torrents/pause']['errors'] == {'HTTPError': 1}
+    assert snapshot['torrents/pause']['request_bytes'] == len('hashes=' +
+                                                              'a' * 40)
+    qb.disable_metrics()
+    qb.torrents()
+    assert metrics.snapshot()['torrents/info']['count'] == 1
@@ -0,0 +1,88 @@
+from qbittorrentv2 import PeerTable, SyncState
+
+A, B = 'a' * 40, 'b' * 40
+
+
+class PeersClient(object):
+    """
+    Client serving scripted ``sync/torrentPeers`` responses.
+    """
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def get_sync_torrentPeers(self, infohash, rid=0):
+        self.calls.append((infohash, rid))
+        response = self.responses[infohash].pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def torrents(self, filter=None):
+        return [{'hash': h} for h in sorted(self.responses)]
+
+
+def peer(ip, client, country='FR'):
+    return {'ip': ip, 'client': client, 'country': country}
+
+
+def test_deltas_update_the_indexes():
+    table = PeerTable(None)
+    table.apply(A, {'rid': 1, 'full_update': True, 'peers': {
+        '1.1.1.1:1': peer('1.1.1.1', 'qBittorrent'),
+        '2.2.2.2:2': peer('2.2.2.2', 'Transmission', 'DE'),
+    }})
+    table.apply(B, {'rid': 1, 'full_update': True, 'peers': {
+        '1.1.1.1:1': peer('1.1.1.1', 'qBittorrent'),
+    }})
+    assert len(table) == 3
+    assert table.torrents_with_peer('1.1.1.1') == {A, B}
+    assert table.client_counts() == {'qBittorrent': 2, 'Transmission': 1}
+
+    table.apply(A, {'rid': 2, 'peers': {'1.1.1.1:1': {'client': 'uTorrent'}},
+                    'peers_removed': ['2.2.2.2:2']})
+    assert table.client_counts() == {'qBittorrent': 1, 'uTorrent': 1}
+    assert table.torrents_with_peer('2.2.2.2') == set()
+    assert table.peers_by_client('uTorrent') == [
+        (A, {'ip': '1.1.1.1', 'client': 'uTorrent', 'country': 'FR'})]
+    assert table.country_counts() == {'FR': 2}
+    assert table.rids == {A: 2, B: 1}
+
+
+def test_full_update_replaces_the_peers():
+    table = PeerTable(None)
+    table.apply(A, {'rid': 1, 'full_update': True,
+                    'peers': {'1.1.1.1:1': peer('1.1.1.1', 'qBittorrent')}})
+    table.apply(A, {'rid': 5, 'full_update': True,
+                    'peers': {'3.3.3.3:3': peer('3.3.3.3', 'Deluge')}})
+    assert table.torrents_with_peer('1.1.1.1') == set()
+    assert list(table.client_counts()) == ['Deluge']
+
+
+def test_update_polls_with_the_torrent_rids():
+    client = PeersClient({
+        A: [{'rid': 1, 'full_update': True,
+             'peers': {'1.1.1.1:1': peer('1.1.1.1', 'qBittorrent')}},
+            {'rid': 2}],
+        B: [IOError('gone')],
+    })
+    table = PeerTable(client)
+    errors = table.update()
+    assert list(errors) == [B]
+    assert table.update([A]) == {}
+    assert sorted(client.calls) == [(A, 0), (A, 1), (B, 0)]
+    assert len(table) == 1
+
+
+def test_inactive_torrents_are_forgotten():
+    state = SyncState()
+    state.apply({'rid': 1, 'full_update': True, 'torrents': {
+        A: {'dlspeed': 100, 'upspeed': 0}, B: {'dlspeed': 0, 'upspeed': 0}}})
+    table = PeerTable(None, sync_state=state)
+    assert table.active_hashes() == [A]
+    table.apply(B, {'rid': 1, 'full_update': True,
+                    'peers': {'1.1.1.1:1': peer('1.1.1.1', 'qBittorrent')}})
+    table.client = PeersClient({A: [{'rid': 1, 'full_update': True}]})
+    table.update()
+    assert B not in table.peers and B not in table.rids
+    assert table.torrents_with_peer('1.1.1.1') == set()
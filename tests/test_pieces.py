@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from qbittorrentv2 import Client, pieces as pieces_module
+from qbittorrentv2.pieces import (DOWNLOADED, DOWNLOADING, NOT_DOWNLOADED,
+                                  PieceStates, pack, unpack)
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(pieces_module, 'numpy', None)
+    return request.param
+
+
+def random_states(length, seed=1):
+    rng = random.Random(seed)
+    return [rng.choice((0, 1, 2, 2, 2)) for _ in range(length)]
+
+
+@pytest.mark.parametrize('length', [0, 1, 3, 4, 5, 1001])
+def test_pack_round_trip(length):
+    states = random_states(length)
+    data = pack(states)
+    assert len(data) == (length + 3) // 4
+    assert list(unpack(data, length)) == states
+    assert PieceStates(data, length).tolist() == states
+
+
+def test_invalid_states():
+    with pytest.raises(ValueError):
+        pack([0, 4])
+    with pytest.raises(ValueError):
+        PieceStates(b'\x00', 5)
+
+
+def test_counts_match_a_plain_count(backend):
+    states = random_states(1003)
+    pieces = PieceStates.from_states(states)
+    for state in (NOT_DOWNLOADED, DOWNLOADING, DOWNLOADED):
+        for first, last in ((0, None), (1, 2), (3, 9), (5, 1000), (7, 7)):
+            expected = states[first:last].count(state)
+            assert pieces.count(state, first, last) == expected
+    assert pieces.progress == states.count(DOWNLOADED) / 1003.0
+
+
+def test_ranges_and_files(backend):
+    states = [DOWNLOADED] * 10 + [DOWNLOADING] + [NOT_DOWNLOADED] * 9
+    pieces = PieceStates.from_states(states, piece_size=100)
+    assert pieces.piece_span(150, 100) == (1, 3)
+    assert pieces.has_range(0, 1000)
+    assert not pieces.has_range(950, 100)
+    assert not pieces.has_range(1900, 200)
+    files = [{'name': 'a', 'piece_range': [0, 9]},
+             {'name': 'b', 'piece_range': [9, 19]}]
+    assert pieces.file_progress(files) == {'a': 1.0, 'b': 1 / 11.0}
+    assert pieces.complete_files(files) == ['a']
+    assert pieces.heatmap(4) == [1.0, 1.0, 0.0, 0.0]
+    with pytest.raises(ValueError):
+        PieceStates.from_states(states).has_range(0, 1)
+
+
+def test_mutable_states():
+    pieces = PieceStates.from_states([0] * 6, mutable=True)
+    pieces[5] = DOWNLOADED
+    pieces[-2] = DOWNLOADING
+    assert pieces.tolist() == [0, 0, 0, 0, 1, 2]
+    with pytest.raises(IndexError):
+        pieces[6] = DOWNLOADED
+    with pytest.raises(TypeError):
+        PieceStates.from_states([0])[0] = DOWNLOADED
+
+
+def test_client_returns_packed_states(stub):
+    qb = Client(stub.url)
+    torrent = next(t for t in stub.simulation.torrents
+                   if 0 < t['progress'] < 1)
+    infohash = torrent['hash']
+    states = qb.get_torrent_pieces_state(infohash)
+    props = qb.get_torrent(infohash)
+    pieces = qb.get_torrent_pieces_state(infohash, packed=True,
+                                         piece_size=props['piece_size'])
+    assert pieces == PieceStates.from_states(states)
+    assert pieces.downloaded == props['pieces_have']
+    assert pieces.downloading == 1
+    progress = pieces.file_progress(qb.get_torrent_files(infohash))
+    assert set(progress) == {'part1', 'part2'}
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+from requests.exceptions import HTTPError
+
+from qbittorrentv2 import Client
+from qbittorrentv2.poller import (WaitTimeout, has_metadata, in_state,
+                                  is_removed, moved_to)
+
+HASH = '%040x' % 0xabc
+
+
+def client(stub):
+    qb = Client(stub.url)
+    qb.poller.interval = 0.02
+    return qb
+
+
+def test_predicates():
+    assert has_metadata({'state': 'stalledDL'})
+    assert not has_metadata({'state': 'metaDL'}) and not has_metadata(None)
+    assert in_state('uploading')({'state': 'uploading'})
+    assert is_removed(None)
+    assert moved_to('/data/done/')({'state': 'uploading',
+                                    'save_path': '/data/done'})
+    assert not moved_to('/data/done')({'state': 'moving',
+                                       'save_path': '/data/done'})
+
+
+def test_wait_for_metadata_of_added_magnets(stub):
+    stub.simulation.metadata_rate = 1
+    qb = client(stub)
+    qb.download_from_link('magnet:?xt=urn:btih:' + HASH.upper())
+    satisfied = qb.wait_for(HASH.upper(), has_metadata, timeout=5)
+    assert satisfied[HASH]['state'] == 'stalledDL'
+    # the poller stops once nothing waits
+    time.sleep(0.1)
+    assert qb.poller._thread is None
+
+
+def test_waiters_share_one_poller(stub):
+    qb = client(stub)
+    hashes = [t['hash'] for t in stub.simulation.torrents]
+    satisfied = qb.wait_for(hashes, lambda t: t is not None, timeout=5)
+    assert len(satisfied) == 50
+    assert stub.simulation.requests['sync/maindata'] <= 2
+
+
+def test_timeout_reports_pending_torrents(stub):
+    qb = client(stub)
+    present = stub.simulation.torrents[0]['hash']
+    with pytest.raises(WaitTimeout) as info:
+        qb.wait_for([present, HASH], lambda t: t is not None, timeout=0.2)
+    assert info.value.pending == {HASH}
+    assert list(info.value.satisfied) == [present]
+
+
+def test_predicate_errors_are_raised(stub):
+    qb = client(stub)
+
+    def broken(torrent):
+        raise KeyError('state')
+
+    with pytest.raises(KeyError):
+        qb.wait_for(HASH, broken, timeout=5)
+
+
+def test_waiters_fail_after_max_errors(stub):
+    stub.simulation.outages['sync/maindata'] = 100
+    qb = client(stub)
+    qb.poller.max_errors = 3
+    with pytest.raises(HTTPError):
+        qb.wait_for(HASH, has_metadata, timeout=5)
+    assert stub.simulation.requests['sync/maindata'] == 3
+
+
+def test_transient_errors_are_retried(stub):
+    stub.simulation.outages['sync/maindata'] = 2
+    qb = client(stub)
+    qb.poller.max_errors = 3
+    present = stub.simulation.torrents[0]['hash']
+    assert present in qb.wait_for(present, lambda t: t is not None,
+                                  timeout=5)
+
+
+def test_async_wait_for(stub):
+    pytest.importorskip('aiohttp')
+    from qbittorrentv2 import AsyncClient
+
+    async def scenario():
+        async with AsyncClient(stub.url) as qb:
+            qb.poller.interval = 0.02
+            await qb.download_from_link('magnet:?xt=urn:btih:' + HASH)
+            return await qb.wait_for(HASH, has_metadata, timeout=5)
+
+    assert HASH in asyncio.run(scenario())
@@ -0,0 +1,127 @@
+import pytest
+
+from stub_server import serve
+
+from qbittorrentv2 import Client, ClientPool
+from qbittorrentv2.pool import PoolResult, UnknownTorrent
+
+MISSING = 'f' * 40
+
+
+@pytest.fixture
+def daemons():
+    servers = {}
+    for name, first in (('nas', 0), ('seedbox', 100)):
+        server, url = serve(20, churn=0, first=first)
+        server.url = url
+        server.simulation = server.RequestHandlerClass.simulation
+        servers[name] = server
+    yield servers
+    for server in servers.values():
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def pool(daemons):
+    return ClientPool(dict((name, Client(server.url))
+                           for name, server in daemons.items()))
+
+
+def set_downloading(simulation, count):
+    for i, torrent in enumerate(simulation.torrents):
+        torrent['state'] = 'downloading' if i < count else 'uploading'
+
+
+def hashes_of(daemon):
+    return [t['hash'] for t in daemon.simulation.torrents]
+
+
+def test_torrents_are_tagged_with_their_instance(pool, daemons):
+    torrents = pool.torrents()
+    assert len(torrents) == 40 and not torrents.errors
+    owners = dict((t['hash'], t['instance']) for t in torrents)
+    assert set(owners[h] for h in hashes_of(daemons['nas'])) == {'nas'}
+
+
+def test_lists_are_routed_to_their_owners(pool, daemons):
+    nas, seedbox = hashes_of(daemons['nas']), hashes_of(daemons['seedbox'])
+    result = pool.pause(nas[:3] + seedbox[:2] + [MISSING])
+    assert sorted(result) == ['nas', 'seedbox']
+    assert isinstance(result.errors[None], UnknownTorrent)
+    assert result.errors[None].args[0] == [MISSING]
+    assert daemons['nas'].simulation.processed_hashes == 3
+    assert daemons['seedbox'].simulation.processed_hashes == 2
+
+
+def test_single_hash_is_routed(pool, daemons):
+    seedbox = hashes_of(daemons['seedbox'])
+    assert pool.pause(seedbox[0]) == {}
+    assert daemons['seedbox'].simulation.processed_hashes == 1
+    with pytest.raises(UnknownTorrent):
+        pool.pause(MISSING)
+
+
+def test_least_loaded_counts_downloading_torrents(pool, daemons):
+    set_downloading(daemons['nas'].simulation, 5)
+    set_downloading(daemons['seedbox'].simulation, 2)
+    assert pool.least_loaded() == 'seedbox'
+
+
+def test_placements_spread_between_syncs(pool, daemons):
+    set_downloading(daemons['nas'].simulation, 3)
+    set_downloading(daemons['seedbox'].simulation, 2)
+    pool.state_ttl = 60
+    placed = [pool.download_from_link('magnet:?xt=urn:btih:%040x' % i)[0]
+              for i in range(4)]
+    assert placed == ['seedbox', 'nas', 'seedbox', 'nas']
+    # the states were synced once and reused for every placement
+    for daemon in daemons.values():
+        assert daemon.simulation.requests['sync/maindata'] == 1
+
+
+def test_stale_states_are_synced_again(pool, daemons):
+    pool.state_ttl = 0
+    pool.least_loaded()
+    pool.least_loaded()
+    for daemon in daemons.values():
+        assert daemon.simulation.requests['sync/maindata'] == 2
+
+
+def test_downloading_counts_follow_deltas(pool, daemons):
+    set_downloading(daemons['nas'].simulation, 0)
+    set_downloading(daemons['seedbox'].simulation, 1)
+    pool.state_ttl = 0
+    assert pool.least_loaded() == 'nas'
+    daemons['nas'].simulation.add_links(
+        'magnet:?xt=urn:btih:%040x\nmagnet:?xt=urn:btih:%040x' % (1, 2))
+    assert pool.least_loaded() == 'seedbox'
+
+
+def test_free_space_is_required(pool, daemons):
+    set_downloading(daemons['nas'].simulation, 0)
+    set_downloading(daemons['seedbox'].simulation, 5)
+    daemons['nas'].simulation.free_space = 10
+    pool.min_free_space = 1000
+    assert pool.least_loaded() == 'seedbox'
+    pool.min_free_space = 10 ** 14
+    with pytest.raises(RuntimeError):
+        pool.least_loaded()
+
+
+def test_client_attributes_only(pool):
+    version = pool.qbittorrent_version
+    assert isinstance(version, PoolResult)
+    assert version == {'nas': 'v4.6.0', 'seedbox': 'v4.6.0'}
+    with pytest.raises(AttributeError):
+        pool.no_such_method
+    with pytest.raises(AttributeError):
+        pool._session
+
+
+def test_removed_instances_are_forgotten(pool, daemons):
+    pool.torrents()
+    pool.remove('nas')
+    with pytest.raises(UnknownTorrent):
+        pool.owner(hashes_of(daemons['nas'])[0])
+    assert pool.least_loaded() == 'seedbox'
@@ -0,0 +1,51 @@
+import pytest
+
+from qbittorrentv2 import Client
+
+
+def test_assignment_is_sent_even_if_cache_is_stale(stub):
+    qb = Client(stub.url)
+    prefs = qb.preferences
+    assert prefs['dl_limit'] == 0
+    # another client changes the value behind the cached copy
+    stub.simulation.preferences['dl_limit'] = 5000
+    prefs['dl_limit'] = 0
+    assert stub.simulation.preferences['dl_limit'] == 0
+
+
+def test_batch_sends_one_request(stub):
+    qb = Client(stub.url)
+    with qb.preferences.batch() as prefs:
+        prefs['dl_limit'] = 100
+        prefs['up_limit'] = 200
+        assert prefs['dl_limit'] == 100
+    assert stub.simulation.requests['app/setPreferences'] == 1
+    assert stub.simulation.preferences['up_limit'] == 200
+    assert qb.preferences()['dl_limit'] == 100
+
+
+def test_failed_commit_keeps_staged_values(stub, monkeypatch):
+    qb = Client(stub.url)
+    prefs = qb.preferences
+
+    def fail(**kwargs):
+        raise IOError('connection reset')
+    monkeypatch.setattr(qb, 'set_preferences', fail)
+    with pytest.raises(IOError):
+        prefs['dl_limit'] = 300
+    assert prefs['dl_limit'] == 300
+
+    monkeypatch.undo()
+    prefs.commit()
+    assert stub.simulation.preferences['dl_limit'] == 300
+    assert prefs.commit() is None
+
+
+def test_batch_discards_on_error(stub):
+    qb = Client(stub.url)
+    with pytest.raises(ValueError):
+        with qb.preferences.batch() as prefs:
+            prefs['dl_limit'] = 1
+            raise ValueError
+    assert stub.simulation.requests['app/setPreferences'] == 0
+    assert qb.preferences['dl_limit'] == 0
@@ -0,0 +1,47 @@
+import pickle
+
+import pytest
+
+from qbittorrentv2 import Client, Torrent
+
+DATA = {'hash': 'a' * 40, 'name': 'debian.iso', 'state': 'uploading',
+        'progress': 1.0, 'future_field': [1, 2]}
+
+
+def test_fields_as_attributes_and_items():
+    torrent = Torrent(DATA)
+    assert torrent.name == torrent['name'] == 'debian.iso'
+    assert torrent.future_field == [1, 2]
+    assert 'state' in torrent and 'future_field' in torrent
+    assert 'dlspeed' not in torrent and 'to_dict' not in torrent
+    assert torrent.get('dlspeed', 0) == 0
+
+
+def test_missing_fields_raise_like_the_dict():
+    torrent = Torrent(DATA)
+    with pytest.raises(AttributeError):
+        torrent.dlspeed
+    with pytest.raises(KeyError):
+        torrent['dlspeed']
+    with pytest.raises(KeyError):
+        torrent['to_dict']
+
+
+def test_round_trips():
+    torrent = Torrent(DATA)
+    assert torrent.to_dict() == DATA
+    assert pickle.loads(pickle.dumps(torrent)) == torrent
+    assert Torrent(dict(DATA, state='pausedUP')) != torrent
+
+
+def test_repeated_strings_are_shared():
+    first = Torrent({'state': ''.join(['upload', 'ing'])})
+    second = Torrent({'state': ''.join(['upl', 'oading'])})
+    assert first.state is second.state
+
+
+def test_typed_torrents(stub):
+    qb = Client(stub.url)
+    torrents = qb.torrents(typed=True, limit=5)
+    assert all(isinstance(t, Torrent) for t in torrents)
+    assert [t.to_dict() for t in torrents] == qb.torrents(limit=5)
@@ -0,0 +1,83 @@
+import json
+import os
+import stat
+
+import pytest
+
+from qbittorrentv2 import Client, LoginRequired
+
+PASSWORD = 'adminadmin'
+
+
+@pytest.fixture
+def cookie_file(tmp_path):
+    return str(tmp_path / 'session.json')
+
+
+def test_lazy_client_sends_nothing_until_used(stub):
+    qb = Client(stub.url, lazy=True)
+    assert sum(stub.simulation.requests.values()) == 0
+    assert len(qb.torrents()) == 50
+    assert stub.simulation.requests['app/preferences'] == 1
+
+
+def test_login_persists_the_session(stub, cookie_file):
+    stub.simulation.password = PASSWORD
+    qb = Client(stub.url, cookie_file=cookie_file)
+    qb.login('admin', PASSWORD)
+    with open(cookie_file) as f:
+        assert json.load(f)['SID'] in stub.simulation.sessions
+    assert stat.S_IMODE(os.stat(cookie_file).st_mode) == 0o600
+
+    reused = Client(stub.url, lazy=True, cookie_file=cookie_file)
+    assert reused.login('admin', PASSWORD) is None
+    assert len(reused.torrents()) == 50
+    assert stub.simulation.requests['auth/login'] == 1
+
+
+def test_probe_accepts_the_persisted_session(stub, cookie_file):
+    stub.simulation.password = PASSWORD
+    Client(stub.url, cookie_file=cookie_file).login('admin', PASSWORD)
+    reused = Client(stub.url, cookie_file=cookie_file)
+    assert reused.login('admin', PASSWORD) is None
+    assert stub.simulation.requests['auth/login'] == 1
+
+
+def test_expired_persisted_session_is_renewed(stub, cookie_file):
+    stub.simulation.password = PASSWORD
+    Client(stub.url, cookie_file=cookie_file).login('admin', PASSWORD)
+    stub.simulation.sessions.clear()
+
+    qb = Client(stub.url, lazy=True, cookie_file=cookie_file)
+    qb.login('admin', PASSWORD)
+    assert len(qb.torrents()) == 50
+    assert stub.simulation.requests['auth/login'] == 2
+    with open(cookie_file) as f:
+        assert json.load(f)['SID'] in stub.simulation.sessions
+
+
+def test_expired_session_is_renewed_once(stub):
+    stub.simulation.password = PASSWORD
+    qb = Client(stub.url)
+    qb.login('admin', PASSWORD)
+    stub.simulation.sessions.clear()
+    assert qb.qbittorrent_version == 'v4.6.0'
+    assert stub.simulation.requests['auth/login'] == 2
+
+
+def test_login_is_required_without_credentials(stub):
+    stub.simulation.password = PASSWORD
+    qb = Client(stub.url, lazy=True)
+    with pytest.raises(LoginRequired):
+        qb.torrents()
+    assert qb.login('admin', 'wrong') == 'Fails.'
+    with pytest.raises(LoginRequired):
+        qb.torrents()
+
+
+def test_logout_forgets_the_persisted_session(stub, cookie_file):
+    qb = Client(stub.url, cookie_file=cookie_file)
+    qb.login('admin', PASSWORD)
+    assert os.path.exists(cookie_file)
+    qb.logout()
+    assert not os.path.exists(cookie_file)
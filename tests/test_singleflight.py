@@ -0,0 +1,153 @@
+import asyncio
+import threading
+
+import pytest
+
+from qbittorrentv2 import Client, ClientPool
+from qbittorrentv2.singleflight import SingleFlight, request_key
+
+
+def start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls, results = [], []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return 'result'
+
+    threads = [start(lambda: results.append(flight.do('key', work)))
+               for _ in range(5)]
+    # let the other callers arrive while the first call runs
+    threading.Event().wait(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [1]
+    assert results == ['result'] * 5
+    assert len(flight) == 0
+
+
+def test_errors_are_shared():
+    flight = SingleFlight()
+    with pytest.raises(ZeroDivisionError):
+        flight.do('key', lambda: 1 / 0)
+    assert flight.do('key', lambda: 2) == 2
+
+
+def test_forget_starts_a_new_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    first = []
+    thread = start(lambda: first.append(flight.do('key', lambda: (
+        release.wait(5), 'old')[1])))
+    while not len(flight):
+        threading.Event().wait(0.01)
+    flight.forget()
+    assert flight.do('key', lambda: 'new') == 'new'
+    release.set()
+    thread.join(5)
+    assert first == ['old']
+    assert len(flight) == 0
+
+
+def test_request_keys():
+    assert request_key('torrents/info', {'params': {'a': 1, 'b': 2}}) == \
+        request_key('torrents/info', {'params': {'b': 2, 'a': 1}})
+    assert request_key('torrents/info', {'params': {'a': 1}}) != \
+        request_key('torrents/info', {'params': {'a': '1'}})
+    assert request_key('torrents/info', {'headers': {}}) is None
+
+
+def test_identical_reads_are_coalesced(stub):
+    qb = Client(stub.url)
+    stub.RequestHandlerClass.latency = 0.3
+    results = []
+    threads = [start(lambda: results.append(qb.torrents()))
+               for _ in range(5)]
+    for thread in threads:
+        thread.join(5)
+    assert stub.simulation.requests['torrents/info'] == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_reads_after_a_write_do_not_join_older_reads(stub):
+    qb = Client(stub.url)
+    perform = qb._perform
+    started, release = threading.Event(), threading.Event()
+
+    def held(endpoint, method, data=None, **kwargs):
+        if endpoint == 'torrents/info' and not started.is_set():
+            started.set()
+            release.wait(5)
+        return perform(endpoint, method, data, **kwargs)
+
+    qb._perform = held
+    old = start(qb.torrents)
+    assert started.wait(5)
+    qb.pause('a' * 40)
+    # would wait for the held request if it joined it
+    fresh = []
+    reader = start(lambda: fresh.append(qb.torrents()))
+    reader.join(2)
+    release.set()
+    old.join(5)
+    assert len(fresh) == 1
+    assert stub.simulation.requests['torrents/info'] == 2
+
+
+def test_pool_does_not_modify_shared_responses(stub):
+    qb = Client(stub.url)
+    qb.enable_cache(ttls={'torrents/info': 60})
+    pool = ClientPool({'nas': qb})
+    assert all(t['instance'] == 'nas' for t in pool.torrents())
+    assert all('instance' not in t for t in qb.torrents())
+
+
+def test_async_identical_reads_are_coalesced(stub):
+    pytest.importorskip('aiohttp')
+    from qbittorrentv2 import AsyncClient
+
+    async def scenario():
+        async with AsyncClient(stub.url) as qb:
+            return await asyncio.gather(*[qb.torrents() for _ in range(5)])
+
+    stub.RequestHandlerClass.latency = 0.1
+    results = asyncio.run(scenario())
+    assert all(r is results[0] for r in results)
+    assert stub.simulation.requests['torrents/info'] == 1
+
+
+def test_async_reads_after_a_write_do_not_join_older_reads(stub):
+    pytest.importorskip('aiohttp')
+    from qbittorrentv2 import AsyncClient
+
+    async def scenario():
+        async with AsyncClient(stub.url) as qb:
+            perform = qb._perform
+            release = asyncio.Event()
+
+            async def held(endpoint, method, data=None, **kwargs):
+                if endpoint == 'torrents/info' and not release.is_set():
+                    await release.wait()
+                return await perform(endpoint, method, data, **kwargs)
+
+            qb._perform = held
+            old = asyncio.ensure_future(qb.torrents())
+            await asyncio.sleep(0)
+            await qb.pause('a' * 40)
+            release.set()
+            fresh = await asyncio.wait_for(qb.torrents(), 5)
+            return await old, fresh
+
+    old, fresh = asyncio.run(scenario())
+    assert fresh is not old
+    assert stub.simulation.requests['torrents/info'] == 2
@@ -0,0 +1,83 @@
+from qbittorrentv2 import Client, SyncState
+
+A, B, C = 'a' * 40, 'b' * 40, 'c' * 40
+
+
+def full_snapshot():
+    return {
+        'rid': 1, 'full_update': True,
+        'torrents': {A: {'name': 'a', 'state': 'downloading'},
+                     B: {'name': 'b', 'state': 'uploading'}},
+        'categories': {'linux': {'name': 'linux', 'savePath': '/iso'}},
+        'tags': ['fast'],
+        'trackers': {'udp://t/announce': [A]},
+        'server_state': {'dl_info_speed': 10, 'up_info_speed': 20},
+    }
+
+
+def test_full_snapshot():
+    state = SyncState()
+    changes = state.apply(full_snapshot())
+    assert changes.full_update and changes.rid == 1
+    assert changes.added == {A, B}
+    assert state.rid == 1 and len(state) == 2
+    assert state[A.upper()]['hash'] == A
+    assert state.tags == {'fast'}
+    assert state.server_state['up_info_speed'] == 20
+
+
+def test_partial_delta_merges_fields():
+    state = SyncState()
+    state.apply(full_snapshot())
+    changes = state.apply({
+        'rid': 2,
+        'torrents': {A: {'state': 'uploading'}, C: {'name': 'c'}},
+        'torrents_removed': [B],
+        'categories': {'linux': {'savePath': '/data/iso'}},
+        'categories_removed': [],
+        'tags': ['new'], 'tags_removed': ['fast'],
+        'server_state': {'dl_info_speed': 5},
+    })
+    assert changes.added == {C}
+    assert changes.updated == {A: {'state': 'uploading'}}
+    assert changes.removed[B]['name'] == 'b'
+    assert state[A] == {'name': 'a', 'state': 'uploading', 'hash': A}
+    assert B not in state and C in state
+    assert state.categories['linux'] == {'name': 'linux',
+                                         'savePath': '/data/iso'}
+    assert state.tags == {'new'}
+    # partial server states only carry the changed counters
+    assert state.server_state == {'dl_info_speed': 5, 'up_info_speed': 20}
+
+
+def test_added_then_removed_in_one_delta():
+    state = SyncState()
+    state.apply(full_snapshot())
+    changes = state.apply({'rid': 2, 'torrents': {C: {'name': 'c'}},
+                           'torrents_removed': [C]})
+    assert not changes.added
+    assert C in changes.removed and C not in state
+
+
+def test_full_update_is_diffed_against_the_model():
+    state = SyncState()
+    state.apply(full_snapshot())
+    snapshot = full_snapshot()
+    snapshot['rid'] = 7
+    del snapshot['torrents'][B]
+    snapshot['torrents'][A]['state'] = 'pausedDL'
+    changes = state.apply(snapshot)
+    assert changes.updated == {A: {'state': 'pausedDL'}}
+    assert list(changes.removed) == [B]
+    assert state.rid == 7 and len(state) == 1
+
+
+def test_update_follows_response_ids(stub):
+    state = SyncState(Client(stub.url))
+    first = state.update()
+    assert first.full_update and len(first.added) == 50
+    second = state.update()
+    assert not second.full_update
+    assert second.rid > first.rid
+    assert set(second.updated) <= set(state)
+    assert len(state) == 50
@@ -0,0 +1,33 @@
+import itertools
+
+from qbittorrentv2 import Client, client
+
+
+def test_cursor_advances_without_repeats(stub):
+    qb = Client(stub.url)
+    messages = list(itertools.islice(qb.tail_log(min_interval=0), 50))
+    assert [m['id'] for m in messages] == list(range(50))
+    # 20 new messages per request
+    assert stub.simulation.requests['log/main'] == 3
+
+
+def test_resume_from_a_saved_id(stub):
+    qb = Client(stub.url)
+    first = next(qb.tail_log(last_known_id=4, min_interval=0))
+    assert first['id'] == 5
+
+
+def test_interval_backs_off_while_idle(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(client.time, 'sleep', sleeps.append)
+    responses = iter([[], [], [], [{'id': 3}], [], [{'id': 4}, {'id': 5}]])
+    cursors = []
+
+    def fetch(last_known_id):
+        cursors.append(last_known_id)
+        return next(responses)
+
+    tail = client.Client._tail(fetch, -1, 1, 5, 2)
+    assert [m['id'] for m in itertools.islice(tail, 3)] == [3, 4, 5]
+    assert cursors == [-1, -1, -1, -1, 3, 3]
+    assert sleeps == [2, 4, 5, 1, 2]
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+import requests
+
+from qbittorrentv2 import Client, TransportConfig
+
+
+def test_pool_stats(stub):
+    qb = Client(stub.url, transport=TransportConfig(pool_maxsize=4))
+    qb.torrents()
+    qb.torrents(limit=1)
+    stats, = qb.pool_stats()
+    assert stats['host'].startswith('http://127.0.0.1:')
+    assert stats['maxsize'] == 4
+    assert stats['idle'] == 1 and stats['in_use'] == 0
+    assert stats['opened'] == 1
+    assert stats['requests'] == 3
+
+
+def test_pool_stats_count_busy_connections(stub):
+    qb = Client(stub.url, transport=TransportConfig(pool_maxsize=4))
+    stub.RequestHandlerClass.latency = 0.3
+    thread = threading.Thread(target=qb.torrents, kwargs={'limit': 1})
+    thread.start()
+    try:
+        for _ in range(100):
+            stats = qb.pool_stats()
+            if stats and stats[0]['in_use']:
+                break
+            threading.Event().wait(0.01)
+        assert stats[0]['in_use'] == 1
+    finally:
+        thread.join()
+    assert qb.pool_stats()[0]['in_use'] == 0
+
+
+def test_idempotent_requests_are_retried(stub):
+    qb = Client(stub.url, transport=TransportConfig(retries=2,
+                                                    backoff_factor=0))
+    stub.simulation.outages['torrents/info'] = 2
+    assert len(qb.torrents()) == 50
+    assert stub.simulation.requests['torrents/info'] == 3
+
+
+def test_retries_give_up(stub):
+    qb = Client(stub.url, transport=TransportConfig(retries=1,
+                                                    backoff_factor=0))
+    stub.simulation.outages['torrents/info'] = 2
+    with pytest.raises(requests.HTTPError):
+        qb.torrents()
+    assert stub.simulation.requests['torrents/info'] == 2
+
+
+def test_writes_are_not_retried(stub):
+    qb = Client(stub.url, transport=TransportConfig(retries=3,
+                                                    backoff_factor=0))
+    stub.simulation.outages['torrents/pause'] = 1
+    with pytest.raises(requests.HTTPError):
+        qb.pause('a' * 40)
+    assert stub.simulation.requests['torrents/pause'] == 1
+
+
+def test_configuration():
+    transport = TransportConfig(timeout=5, timeouts={'torrents/add': 60},
+                                backoff_factor=1, backoff_max=3)
+    assert transport.timeout_for('torrents/add') == 60
+    assert transport.timeout_for('torrents/info') == 5
+    assert transport.is_idempotent('get', 'torrents/info')
+    assert not transport.is_idempotent('get', 'app/shutdown')
+    assert transport.is_idempotent('post', 'torrents/files')
+    assert not transport.is_idempotent('post', 'torrents/delete')
+    assert all(0 <= transport.backoff(10) <= 3 for _ in range(100))
+
+
+def test_async_pool_stats_have_the_same_keys(stub):
+    pytest.importorskip('aiohttp')
+    from qbittorrentv2 import AsyncClient
+
+    async def scenario():
+        async with AsyncClient(stub.url, max_concurrency=8) as qb:
+            await qb.torrents()
+            return qb.pool_stats()
+
+    qb = Client(stub.url)
+    stats, = asyncio.run(scenario())
+    assert set(stats) == set(qb.pool_stats()[0])
+    assert stats['maxsize'] == 8 and stats['in_use'] == 0
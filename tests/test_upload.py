@@ -0,0 +1,73 @@
+import io
+
+from qbittorrentv2 import Client
+from qbittorrentv2.bencode import TorrentInfo, encode
+from qbittorrentv2.upload import (MultipartBody, TorrentSource, UploadRejected,
+                                  plan_batches)
+
+
+def torrent(name, size=1024):
+    return encode({'announce': 'udp://tracker.example:1337',
+                   'info': {'name': name, 'length': size,
+                            'piece length': 16384, 'pieces': b'x' * 20}})
+
+
+def test_multipart_length_matches_content(tmp_path):
+    path = tmp_path / 'a.torrent'
+    path.write_bytes(torrent('a'))
+    sources = [TorrentSource(str(path)), TorrentSource(torrent('b')),
+               TorrentSource(io.BytesIO(torrent('c')))]
+    body = MultipartBody({'category': 'linux', 'paused': True}, sources)
+    content = b''.join(body)
+    assert len(content) == len(body)
+    assert body.headers['Content-Length'] == str(len(content))
+    assert b'filename="a.torrent"' in content
+    assert torrent('b') in content and torrent('c') in content
+    assert b'name="paused"\r\n\r\nTrue\r\n' in content
+    # the body can be sent again
+    assert b''.join(body) == content
+
+
+def test_batches_respect_both_limits():
+    sources = [TorrentSource(b'x' * size) for size in (3, 3, 3, 10, 1, 1, 1)]
+    batches = plan_batches(sources, max_bytes=7, max_files=2)
+    assert [[s.size for s in batch] for batch in batches] == [
+        [3, 3], [3], [10], [1, 1], [1]]
+
+
+def test_ingest_skips_duplicates_and_invalid_files(stub, tmp_path):
+    files = []
+    for i in range(5):
+        path = tmp_path / ('%d.torrent' % i)
+        path.write_bytes(torrent('t%d' % i))
+        files.append(str(path))
+    known = TorrentInfo.from_bytes(torrent('t0')).hash
+    qb = Client(stub.url)
+    result = qb.ingest_files(files + [torrent('t1'), b'not bencode'],
+                             max_batch_files=2, known=[known])
+    assert result.ok is False
+    assert result.skipped == [files[0], torrent('t1')]
+    assert [f for f, _ in result.invalid] == [b'not bencode']
+    assert len(result) == 2
+    assert result.hashes == [TorrentInfo.from_bytes(torrent('t%d' % i)).hash
+                             for i in range(1, 5)]
+    assert stub.simulation.requests['torrents/add'] == 2
+
+
+def test_rejected_batches_are_resent_per_file(stub):
+    qb = Client(stub.url)
+    post = qb._post
+
+    def rejecting(endpoint, data=None, **kwargs):
+        if b'4:name3:bad' in b''.join(data):
+            return 'Fails.'
+        return post(endpoint, data=data, **kwargs)
+
+    qb._post = rejecting
+    bad = torrent('bad')
+    result = qb.ingest_files([torrent('good'), bad])
+    assert len(result) == 3
+    assert isinstance(result.batches[0].error, UploadRejected)
+    assert result.batch_of(torrent('good')).error is None
+    assert isinstance(result.batch_of(bad).error, UploadRejected)
+    assert result.failed == [bad]